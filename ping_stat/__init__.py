@@ -49,9 +49,7 @@ def monitor_mean(ping_object):
 
     while monitor_mean:
         sleep(.5)
-        ping = ping_object
-        hist = ping.history[-1][-1]
-        print(f'Mean: {mean(hist)}')
+        print(f'Mean: {ping_object.stats.mean}')
 
 
 
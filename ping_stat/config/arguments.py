@@ -31,9 +31,9 @@ class PingPingArguments(ArgumentParser):
         self.add_argument(
             '-i',
             '--interval',
-            help='The time (in seconds) to wait between ping requests',
+            help='The time (in seconds) to wait between ping requests. Fractions down to 0.01 are accepted.',
             default=3,
-            type=int,
+            type=float,
             action='store',
             required=False
         )
@@ -51,10 +51,101 @@ class PingPingArguments(ArgumentParser):
             '--timeout',
             help='The time (in seconds) to wait for connection to be established before giving up.',
             default=3,
+            type=float,
+            action='store',
+            required=False
+
+        )
+
+        self.add_argument(
+            '--history-size',
+            help='How many ping results to keep in memory before overwriting the oldest. Defaults to 86400',
+            default=86400,
+            type=int,
+            action='store',
+            required=False
+        )
+
+        self.add_argument(
+            '--log-file',
+            help='Append every ping result to this binary log file (created if missing), for long captures.',
+            default=None,
             type=str,
             action='store',
             required=False
+        )
 
+        self.add_argument(
+            '--archive',
+            help='Also append every ping result to this compressed archive (created if missing), at about 6 bytes '
+                 'per result, for keeping months of results.',
+            default=None,
+            type=str,
+            action='store',
+            required=False
+        )
+
+        self.add_argument(
+            '--database',
+            help='Also write every ping result to this SQLite database (created if missing). The report subcommand '
+                 'reads from it.',
+            default=None,
+            type=str,
+            action='store',
+            required=False
+        )
+
+        self.add_argument(
+            '--raw-retention',
+            help='With --database, delete raw ping results older than this many days. The per-minute and per-hour '
+                 'rollups used by long reports are kept. Defaults to keeping everything',
+            default=None,
+            type=float,
+            action='store',
+            required=False
+        )
+
+        self.add_argument(
+            '--resume',
+            help='Journal every ping result and checkpoint the statistics in --state-dir, and on start pick up the '
+                 'history and averages left by the last run for the same target.',
+            action='store_true',
+            default=False,
+            required=False
+        )
+
+        self.add_argument(
+            '--state-dir',
+            help='Where --resume keeps its journal and checkpoint files. Defaults to ~/.ping-stat',
+            default='~/.ping-stat',
+            type=str,
+            action='store',
+            required=False
+        )
+
+        self.add_argument(
+            '--event-log',
+            help='Append outage and latency-shift events to this file, one JSON object per line.',
+            default=None,
+            type=str,
+            action='store',
+            required=False
+        )
+
+        self.add_argument(
+            '--pipelined',
+            help='Send each ping on the interval schedule without waiting for the reply to the previous one.',
+            action='store_true',
+            default=False,
+            required=False
+        )
+
+        self.add_argument(
+            '--high-rate',
+            help='Send prebuilt packets from a tight send loop, for intervals well below a second (down to 0.01).',
+            action='store_true',
+            default=False,
+            required=False
         )
 
         sub_parsers = self.add_subparsers(
@@ -86,15 +177,173 @@ class PingPingArguments(ArgumentParser):
             required=False
         )
 
+        ttl_test_parser.add_argument(
+            '--serial',
+            help='Try one TTL at a time instead of probing the whole range at once.',
+            action='store_true',
+            default=False,
+            required=False
+        )
+
+        fleet_parser = sub_parsers.add_parser('fleet')
+        fleet_parser.description = 'Monitor every target listed in a plain-text, CSV or JSON file from one process. ' \
+                                   'The global --interval and --timeout apply to targets that do not set their own.'
+
+        fleet_parser.add_argument(
+            '-f',
+            '--file',
+            help='The file listing the targets to monitor.',
+            type=str,
+            action='store',
+            required=True
+        )
+
+        fleet_parser.add_argument(
+            '--packet-size',
+            help='The payload size (in bytes) for targets that do not set their own. Defaults to 256',
+            default=256,
+            type=int,
+            action='store',
+            required=False
+        )
+
+        fleet_parser.add_argument(
+            '--max-in-flight',
+            help='The maximum number of unanswered probes at once, across all targets. Defaults to 1024',
+            default=1024,
+            type=int,
+            action='store',
+            required=False
+        )
+
+        fleet_parser.add_argument(
+            '--shards',
+            help='Split the targets across this many worker processes. Defaults to 1 (no extra processes)',
+            default=1,
+            type=int,
+            action='store',
+            required=False
+        )
+
+        fleet_parser.add_argument(
+            '--duration',
+            help='Stop after this many seconds. Runs until interrupted by default.',
+            default=None,
+            type=float,
+            action='store',
+            required=False
+        )
+
+        fleet_parser.add_argument(
+            '--report-every',
+            help='The time (in seconds) between summary reports. Defaults to 10',
+            default=10,
+            type=float,
+            action='store',
+            required=False
+        )
+
+        fleet_parser.add_argument(
+            '--show',
+            help='How many of the worst targets to list in each summary report. Defaults to 20',
+            default=20,
+            type=int,
+            action='store',
+            required=False
+        )
+
+        path_parser = sub_parsers.add_parser('path')
+        path_parser.description = 'Continuously probe every hop on the way to the target (like mtr) and report loss ' \
+                                  'and latency per hop. The global --interval and --timeout apply to each cycle.'
+
+        path_parser.add_argument(
+            '--max-hops',
+            help='The highest TTL to probe. Defaults to 30',
+            default=30,
+            type=int,
+            action='store',
+            required=False
+        )
+
+        path_parser.add_argument(
+            '--cycles',
+            help='Stop after this many cycles. Defaults to running until interrupted',
+            default=None,
+            type=int,
+            action='store',
+            required=False
+        )
+
+        path_parser.add_argument(
+            '--report-every',
+            help='Seconds between hop reports. Defaults to 5',
+            default=5,
+            type=float,
+            action='store',
+            required=False
+        )
+
+        report_parser = sub_parsers.add_parser('report')
+        report_parser.description = 'Summarize the ping results stored in the database given with --database, per ' \
+                                    'target. Aggregates are computed by SQLite, so long ranges stay fast.'
+
+        report_parser.add_argument(
+            '--hours',
+            help='Only include results from the last this many hours. Defaults to everything stored',
+            default=None,
+            type=float,
+            action='store',
+            required=False
+        )
+
+        report_parser.add_argument(
+            '--resolution',
+            help='Read raw samples, or the per-minute or per-hour rollups. By default, ranges up to 6 hours read raw '
+                 'samples, up to 14 days read minutes, and longer ones read hours',
+            choices=('auto', 'raw', 'minute', 'hour'),
+            default='auto',
+            action='store',
+            required=False
+        )
+
+        report_parser.add_argument(
+            '--bucket',
+            help='Break the report down into time buckets of this width, with percentiles and outage counts computed '
+                 'with NumPy from the raw results. Needs NumPy',
+            choices=('minute', 'hour', 'day'),
+            default=None,
+            action='store',
+            required=False
+        )
+
+        report_parser.add_argument(
+            '--source',
+            help='With --bucket, read the raw results from this binary log, block archive or SQLite database '
+                 'instead of --database',
+            default=None,
+            type=str,
+            action='store',
+            required=False
+        )
+
+        report_parser.add_argument(
+            '--only',
+            help='Only report on this target. Defaults to every target in the database',
+            default=None,
+            type=str,
+            action='store',
+            required=False
+        )
+
         monitor_parser = sub_parsers.add_parser('monitor')
         monitor_parser.description = 'Monitor your ping-time against the specified host server.'
 
         monitor_parser.add_argument(
             '-i',
             '--interval',
-            help='The time between ping requests',
+            help='The time (in seconds) between ping requests',
             default=2,
-            type=int,
+            type=float,
             action='store',
             required=False
 
@@ -2,7 +2,9 @@ from inspy_logger import InspyLogger
 from ping_stat.config.arguments import ARGUMENTS, PROG_NAME
 from ping_stat.utils import TTLTest
 from ping_stat import Ping
-from time import sleep
+from rich.console import Console
+from rich.table import Table
+from time import monotonic, sleep, time_ns
 
 LOG_LEVEL = ARGUMENTS.log_level
 
@@ -13,13 +15,355 @@ if not isl.device.started:
     MOD_LOG.debug(f'Logging started for {PROG_NAME}')
 
 ping = None
+console = Console()
+
+
+def print_fleet_report(fleet, show=20):
+    """
+    Print a summary of the fleet and a table of the `show` worst targets (by loss, then by mean ping time).
+    """
+    from ping_stat.models.stats import RunningStats
+
+    stats = fleet.stats
+    overall = RunningStats()
+    for s in stats.values():
+        overall.merge(s)
+
+    p99 = overall.sketch.quantile(0.99)
+
+    console.print(
+        f'[bold]{len(stats)} targets | {overall.sent} pings sent | {overall.received} returned | '
+        f'{overall.loss:.2%} lost | p99 {f"{p99 * 1000:.2f} ms" if p99 is not None else "-"}[/]'
+    )
+
+    worst = sorted(stats.items(), key=lambda item: (item[1].loss, item[1].mean or 0), reverse=True)[:show]
+
+    table = Table('Target', 'Sent', 'Lost', 'Loss', 'Min (ms)', 'Mean (ms)', 'P99 (ms)', 'Max (ms)')
+    for address, s in worst:
+        table.add_row(
+            address,
+            str(s.sent),
+            str(s.lost),
+            f'{s.loss:.1%}',
+            *(
+                f'{value * 1000:.2f}' if value is not None else '-'
+                for value in (s.min, s.mean, s.sketch.quantile(0.99), s.max)
+            )
+        )
+
+    console.print(table)
+
+
+def open_log_file():
+    """
+    Open the binary log named by --log-file for appending, or return None if none was given.
+    """
+    if not ARGUMENTS.log_file:
+        return None
+
+    from ping_stat.storage.binlog import BinaryLogWriter
+
+    return BinaryLogWriter(ARGUMENTS.log_file)
+
+
+def open_archive():
+    """
+    Open the compressed archive named by --archive for appending, or return None if none was given.
+    """
+    if not ARGUMENTS.archive:
+        return None
+
+    from ping_stat.storage.blocks import BlockWriter
+
+    return BlockWriter(ARGUMENTS.archive)
+
+
+def open_database():
+    """
+    Open the SQLite database named by --database for writing, or return None if none was given.
+    """
+    if not ARGUMENTS.database:
+        return None
+
+    from ping_stat.storage.sqlite import RAW, SQLiteSink
+
+    retention = None
+    if ARGUMENTS.raw_retention is not None:
+        retention = {RAW: ARGUMENTS.raw_retention * 86400}
+
+    return SQLiteSink(ARGUMENTS.database, retention=retention)
+
+
+def open_event_log():
+    """
+    Open the event log named by --event-log for appending, or return None if none was given.
+    """
+    if not ARGUMENTS.event_log:
+        return None
+
+    from ping_stat.storage.events import EventLog
+
+    return EventLog(ARGUMENTS.event_log)
+
+
+def bucket_report(source, start_ns):
+    """
+    Print a vectorized report of `source`, per target and --bucket wide time bucket.
+    """
+    from datetime import datetime
+    from ping_stat.models.rollups import HOUR, MINUTE
+    from ping_stat.storage.batch import batch_report
+
+    width = {'minute': MINUTE, 'hour': HOUR, 'day': 24 * HOUR}[ARGUMENTS.bucket]
+    batch = batch_report(source, target=ARGUMENTS.only, start=start_ns, width=width)
+
+    table = Table('Target', 'Start', 'Sent', 'Loss', 'Mean (ms)', 'Stdev (ms)', 'P50 (ms)', 'P99 (ms)', 'Outages')
+    for row in batch.rows():
+        wait_time = row['wait_time']
+        table.add_row(
+            row['target'],
+            datetime.fromtimestamp(row['start_ns'] / 1e9).strftime('%Y-%m-%d %H:%M'),
+            str(row['pings_sent']),
+            f'{row["loss"]:.1%}',
+            *(
+                f'{wait_time[key] * 1000:.2f}' if wait_time[key] is not None else '-'
+                for key in ('mean', 'stdev', 'p50', 'p99')
+            ),
+            str(row['outages'])
+        )
+
+    console.print(table)
+
+
+def report():
+    from ping_stat.models.rollups import HOUR, MINUTE
+    from ping_stat.storage.sqlite import RAW, SQLiteHistory
+
+    start_ns = None if ARGUMENTS.hours is None else time_ns() - int(ARGUMENTS.hours * 3600 * 1e9)
+
+    if ARGUMENTS.bucket:
+        source = ARGUMENTS.source or ARGUMENTS.database
+        if not source:
+            console.print('[red]The report subcommand needs --database or --source.[/]')
+            return
+
+        bucket_report(source, start_ns)
+        return
+
+    if not ARGUMENTS.database:
+        console.print('[red]The report subcommand needs --database.[/]')
+        return
+
+    with SQLiteHistory(ARGUMENTS.database) as history:
+        reports = history.report(
+            target=ARGUMENTS.only,
+            start_ns=start_ns,
+            resolution={'auto': None, 'raw': RAW, 'minute': MINUTE, 'hour': HOUR}[ARGUMENTS.resolution]
+        )
+
+    table = Table('Target', 'Sent', 'Lost', 'Loss', 'Min (ms)', 'Mean (ms)', 'P50 (ms)', 'P95 (ms)', 'P99 (ms)',
+                  'Max (ms)')
+    for target, summary in reports.items():
+        wait_time = summary['wait_time']
+        table.add_row(
+            target,
+            str(summary['pings_sent']),
+            str(summary['pings_failed']),
+            f'{summary["loss"]:.1%}',
+            *(
+                f'{wait_time[key] * 1000:.2f}' if wait_time[key] is not None else '-'
+                for key in ('min', 'mean', 'p50', 'p95', 'p99', 'max')
+            )
+        )
+
+    console.print(table)
+
+
+def fleet():
+    from ping_stat.utils.fleet import PingFleet
+
+    log = isl.device.add_child(f'{PROG_NAME}.fleet')
+    log.debug(f'Loading fleet from {ARGUMENTS.file}')
+
+    ping_fleet = PingFleet.from_file(
+        ARGUMENTS.file,
+        interval=ARGUMENTS.interval,
+        timeout=ARGUMENTS.timeout,
+        packet_size=ARGUMENTS.packet_size,
+        max_in_flight=ARGUMENTS.max_in_flight,
+        shards=ARGUMENTS.shards
+    )
+    log.debug(f'Loaded {len(ping_fleet.stats)} targets')
+
+    log_file = open_log_file()
+    if log_file is not None:
+        ping_fleet.add_callback(log_file.add)
+
+    database = open_database()
+    if database is not None:
+        ping_fleet.add_callback(database.add)
+
+    archive = open_archive()
+    if archive is not None:
+        ping_fleet.add_callback(archive.add)
+
+    event_log = open_event_log()
+    if event_log is not None:
+        ping_fleet.add_event_callback(event_log.write)
+
+    ping_fleet.start(duration=ARGUMENTS.duration)
+    next_report = monotonic() + ARGUMENTS.report_every
+
+    try:
+        while ping_fleet.thread.is_alive():
+            sleep(.3)
+            if monotonic() >= next_report:
+                print_fleet_report(ping_fleet, ARGUMENTS.show)
+                next_report += ARGUMENTS.report_every
+    except KeyboardInterrupt:
+        print("Stopping fleet monitoring...")
+        ping_fleet.stop()
+
+    if log_file is not None:
+        log_file.close()
+
+    if database is not None:
+        database.close()
+
+    if archive is not None:
+        archive.close()
+
+    if event_log is not None:
+        event_log.close()
+
+    print_fleet_report(ping_fleet, ARGUMENTS.show)
+
+
+def print_path_report(monitor):
+    """
+    Print a table of loss and latency for every hop on the monitored path.
+    """
+    console.print(f'[bold]{monitor.address} | {monitor.path_length} hops | {monitor.cycles} cycles[/]')
+
+    table = Table('Hop', 'Host', 'Loss', 'Sent', 'Last (ms)', 'Mean (ms)', 'Best (ms)', 'Worst (ms)', 'StDev (ms)')
+    for hop in monitor.report():
+        table.add_row(
+            str(hop['hop']),
+            hop['host'] or '???',
+            f'{hop["loss"]:.1%}',
+            str(hop['sent']),
+            *(
+                f'{hop[key] * 1000:.2f}' if hop[key] is not None else '-'
+                for key in ('last', 'mean', 'best', 'worst', 'stdev')
+            )
+        )
+
+    console.print(table)
+
+
+def path():
+    from ping_stat.utils.path import PathMonitor
+
+    log = isl.device.add_child(f'{PROG_NAME}.path')
+
+    monitor = PathMonitor(
+        ARGUMENTS.target,
+        interval=ARGUMENTS.interval,
+        timeout=ARGUMENTS.timeout,
+        max_hops=ARGUMENTS.max_hops
+    )
+    log.debug(f'{ARGUMENTS.target} is {monitor.discover()} hops away')
+
+    monitor.start(cycles=ARGUMENTS.cycles)
+    next_report = monotonic() + ARGUMENTS.report_every
+
+    try:
+        while monitor.running:
+            sleep(.3)
+            if monotonic() >= next_report:
+                print_path_report(monitor)
+                next_report += ARGUMENTS.report_every
+    except KeyboardInterrupt:
+        print("Stopping path monitoring...")
+        monitor.stop()
+
+    print_path_report(monitor)
+
+
+def ttl_test():
+    log = isl.device.add_child(f'{PROG_NAME}.ttl_test')
+    log.debug('Received ttl test command')
+
+    t_test = TTLTest(
+        address=ARGUMENTS.target,
+        timeout=ARGUMENTS.timeout,
+        starting_at=ARGUMENTS.starting_from,
+        end_at=ARGUMENTS.end_at,
+        parallel=not ARGUMENTS.serial
+    )
+    t_test.run()
+
+    for result in t_test.history:
+        console.print(f'TTL {result.ttl:>3}  {result.status_name:<12} {result.responder or "*":<16} '
+                      f'{result.elapsed:.3f}s')
+
+    console.print(f'Minimum TTL to reach {t_test.address}: {t_test.minimum_ttl or "not found"}')
+
 
 def main():
     global ping
+
+    if ARGUMENTS.subcommands and ARGUMENTS.subcommands.replace('-', '_').lower() == 'ttl_test':
+        return ttl_test()
+
+    if ARGUMENTS.subcommands == 'fleet':
+        return fleet()
+
+    if ARGUMENTS.subcommands == 'path':
+        return path()
+
+    if ARGUMENTS.subcommands == 'report':
+        return report()
+
     log = isl.device.add_child(f'{PROG_NAME}.main')
     log.debug('Starting ping test...')
 
-    ping = Ping(target=ARGUMENTS.target, auto_run=True, live_mode=True, continuous_ping=True, interval=ARGUMENTS.interval)
+    ping = Ping(
+        target=ARGUMENTS.target,
+        auto_run=False,
+        live_mode=True,
+        continuous_ping=True,
+        interval=ARGUMENTS.interval,
+        timeout=ARGUMENTS.timeout,
+        pipelined=ARGUMENTS.pipelined,
+        high_rate=ARGUMENTS.high_rate,
+        history_size=ARGUMENTS.history_size,
+        database=open_database()
+    )
+
+    log_file = open_log_file()
+    if log_file is not None:
+        ping.add_callback(log_file.add)
+
+    archive = open_archive()
+    if archive is not None:
+        ping.add_callback(archive.add)
+
+    checkpointer = None
+    if ARGUMENTS.resume:
+        from ping_stat.storage.checkpoint import Checkpointer
+
+        checkpointer = Checkpointer(ping, ARGUMENTS.state_dir)
+        replayed = checkpointer.resume()
+        log.debug(f'Resumed with {len(ping.history)} results ({replayed} replayed from the journal)')
+        ping.add_callback(checkpointer.add)
+
+    # Attached after any resume, so replayed results don't log their events a second time.
+    event_log = open_event_log()
+    if event_log is not None:
+        ping.detector.add_callback(event_log.write)
+
+    ping.start()
 
     try:
         while ping.monitoring:
@@ -27,13 +371,21 @@ def main():
     except KeyboardInterrupt:
         print("Stopping ping monitoring...")
         ping.stop_monitoring()
+    finally:
+        if log_file is not None:
+            log_file.close()
 
-if __name__ == '__main__':
-    if (
-            ARGUMENTS.subcommands
-            and ARGUMENTS.subcommands.replace('-', '_').lower() == 'ttl_test'
-    ):
-        print('Received ttl test command')
-        t_test = TTLTest()
+        if ping.database is not None:
+            ping.database.close()
+
+        if archive is not None:
+            archive.close()
+
+        if checkpointer is not None:
+            checkpointer.close()
 
+        if event_log is not None:
+            event_log.close()
+
+if __name__ == '__main__':
     main()
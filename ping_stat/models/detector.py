@@ -0,0 +1,358 @@
+"""
+Project: PingPing
+Author: Inspyre Softworks - https://inspyre.tech
+Created: 10/18/2026 @ 11:55 PM
+File:
+  Name: detector.py
+  Filepath: ping_stat/models
+
+Streaming detection of outages and latency shifts, reported as start and end events.
+
+    - An outage starts when `outage_length` probes in a row are lost, and ends at the next reply.
+    - A latency shift is found with a one-sided CUSUM test on how far each RTT sits above an EWMA baseline, in units
+      of the baseline's (EWMA) standard deviation. Each standardized deviation is clipped, so one spike cannot raise
+      an alarm on its own. While a shift lasts, the baseline is frozen, and a second CUSUM collects evidence that the
+      RTTs are back near it. If they settle at a new level instead, that level becomes the baseline after `settle`
+      samples.
+
+Each sample updates a few numbers, so the cost per sample is constant and a detector per target is cheap enough to
+watch thousands of targets live. Events go to any callbacks, such as an `ping_stat.storage.events.EventLog`, and the
+most recent ones are kept in `events`.
+
+Usage:
+    from ping_stat.models.detector import AnomalyDetector
+
+    detector = AnomalyDetector('inspyre.tech')
+    detector.add_callback(print)
+    ping.add_callback(detector.add)
+"""
+import math
+from collections import deque
+from typing import Callable, List, NamedTuple, Optional
+
+from ping_stat.models.samples import PingSample
+
+
+OUTAGE = 'outage'
+LATENCY = 'latency'
+
+START = 'start'
+END = 'end'
+
+DEFAULT_OUTAGE_LENGTH = 3
+"""The number of consecutive lost samples that counts as an outage."""
+
+DEFAULT_ALPHA = 0.05
+"""The EWMA smoothing factor of the latency baseline (about the last 20 samples)."""
+
+DEFAULT_THRESHOLD = 8.0
+"""The CUSUM decision threshold, in standard deviations."""
+
+DEFAULT_SLACK = 1.0
+"""The CUSUM allowance per sample, in standard deviations. Smaller deviations never add up to an alarm."""
+
+DEFAULT_CLIP = 3.0
+"""The largest standardized deviation a single sample can contribute."""
+
+DEFAULT_WARMUP = 20
+"""Replies needed to establish a baseline before latency shifts are looked for."""
+
+DEFAULT_MIN_STDEV = 0.001
+"""The smallest standard deviation (in seconds) deviations are measured in, so a very steady link isn't oversensitive."""
+
+DEFAULT_SETTLE = 300
+"""Samples after which a latency shift that has not ended is taken as the new baseline."""
+
+RECENT_EVENTS = 256
+"""The number of events kept in `AnomalyDetector.events`."""
+
+
+class Event(NamedTuple):
+    """
+    The start or end of an outage or a latency shift.
+
+    Attributes:
+        timestamp_ns (int):
+            When it happened: the send time of the first lost probe of an outage, of the probe that raised a latency
+            alarm, or of the probe that ended either.
+        target (str):
+            The target it happened to.
+        kind (str):
+            `OUTAGE` or `LATENCY`.
+        phase (str):
+            `START` or `END`.
+        value (float):
+            For an outage, the number of probes lost so far. For a latency shift, the baseline RTT (in seconds) at
+            the start, and the smoothed RTT during the shift at the end.
+        duration (float or None):
+            On end events, how long the outage or shift lasted, in seconds.
+    """
+    timestamp_ns: int
+    target: str
+    kind: str
+    phase: str
+    value: float
+    duration: Optional[float] = None
+
+    def as_dict(self) -> dict:
+        """
+        The event as a compact dict, without empty fields.
+        """
+        event = {'ts': self.timestamp_ns, 'target': self.target, 'event': self.kind, 'phase': self.phase,
+                 'value': self.value}
+
+        if self.duration is not None:
+            event['duration'] = self.duration
+
+        return event
+
+
+class AnomalyDetector:
+    """
+    Outage and latency-shift detection for one target's samples.
+    """
+
+    def __init__(
+            self,
+            target: Optional[str] = None,
+            outage_length: int = DEFAULT_OUTAGE_LENGTH,
+            alpha: float = DEFAULT_ALPHA,
+            threshold: float = DEFAULT_THRESHOLD,
+            slack: float = DEFAULT_SLACK,
+            warmup: int = DEFAULT_WARMUP,
+            min_stdev: float = DEFAULT_MIN_STDEV,
+            settle: int = DEFAULT_SETTLE
+    ):
+        """
+        Args:
+            target (str or None):
+                The target named in events. Defaults to the target of each sample.
+            outage_length (int):
+                The number of consecutive lost samples that starts an outage.
+            alpha (float):
+                The EWMA smoothing factor of the latency baseline, between 0 and 1.
+            threshold (float):
+                The CUSUM decision threshold, in standard deviations.
+            slack (float):
+                The CUSUM allowance per sample, in standard deviations.
+            warmup (int):
+                Replies needed before latency shifts are looked for.
+            min_stdev (float):
+                The smallest standard deviation (in seconds) deviations are measured in.
+            settle (int):
+                Samples after which an unresolved latency shift becomes the new baseline.
+
+        Raises:
+            ValueError:
+                If any setting is out of range.
+        """
+        if outage_length < 1:
+            raise ValueError('"outage_length" must be at least 1')
+
+        if not 0 < alpha < 1:
+            raise ValueError('"alpha" must be between 0 and 1')
+
+        if threshold <= 0 or slack < 0 or min_stdev <= 0:
+            raise ValueError('"threshold" and "min_stdev" must be positive, and "slack" must not be negative')
+
+        self.target = target
+        self.outage_length = outage_length
+        self.alpha = alpha
+        self.threshold = threshold
+        self.slack = slack
+        self.warmup = warmup
+        self.min_stdev = min_stdev
+        self.settle = settle
+
+        self.events = deque(maxlen=RECENT_EVENTS)
+        self.__callbacks = []
+
+        self.__lost_run = 0
+        self.__lost_since_ns = None
+
+        self.__replies = 0
+        self.__mean = None
+        self.__variance = 0.0
+        self.__cusum = 0.0
+
+        self.__shift_since_ns = None
+        self.__shift_level = None
+        self.__shift_samples = 0
+        self.__recovery = 0.0
+
+    @property
+    def in_outage(self) -> bool:
+        return self.__lost_run >= self.outage_length
+
+    @property
+    def in_latency_shift(self) -> bool:
+        return self.__shift_since_ns is not None
+
+    @property
+    def baseline(self) -> Optional[float]:
+        """
+        float or None:
+            The EWMA baseline RTT in seconds.
+        """
+        return self.__mean
+
+    @property
+    def baseline_stdev(self) -> float:
+        """
+        float:
+            The EWMA standard deviation of the RTT in seconds, at least `min_stdev`.
+        """
+        return max(math.sqrt(self.__variance), self.min_stdev)
+
+    def add_callback(self, callback: Callable[[Event], None]):
+        """
+        Call `callback` with every event.
+        """
+        self.__callbacks.append(callback)
+
+    def remove_callback(self, callback: Callable[[Event], None]):
+        self.__callbacks.remove(callback)
+
+    def add(self, sample: PingSample):
+        """
+        Update the detector with the next sample, emitting any events it causes.
+        """
+        if sample.rtt is None:
+            self.__on_loss(sample)
+            return
+
+        if self.__lost_run:
+            if self.in_outage:
+                self.__emit(sample, OUTAGE, END, self.__lost_run, self.__lost_since_ns)
+
+            self.__lost_run = 0
+
+        self.__on_reply(sample, sample.rtt)
+
+    def state(self) -> dict:
+        """
+        The baseline, the CUSUM statistics and any outage or latency shift in progress, as a JSON-serializable dict,
+        for `restore()`. Settings, callbacks and `events` are not included.
+        """
+        return {
+            'lost_run': self.__lost_run,
+            'lost_since_ns': self.__lost_since_ns,
+            'replies': self.__replies,
+            'mean': self.__mean,
+            'variance': self.__variance,
+            'cusum': self.__cusum,
+            'shift_since_ns': self.__shift_since_ns,
+            'shift_level': self.__shift_level,
+            'shift_samples': self.__shift_samples,
+            'recovery': self.__recovery,
+        }
+
+    def restore(self, state: dict):
+        """
+        Replace the detector's state with one saved by `state()`. No events are emitted.
+        """
+        self.__lost_run = state['lost_run']
+        self.__lost_since_ns = state['lost_since_ns']
+        self.__replies = state['replies']
+        self.__mean = state['mean']
+        self.__variance = state['variance']
+        self.__cusum = state['cusum']
+        self.__shift_since_ns = state['shift_since_ns']
+        self.__shift_level = state['shift_level']
+        self.__shift_samples = state['shift_samples']
+        self.__recovery = state['recovery']
+
+    def recent(self, count: int = 10) -> List[Event]:
+        """
+        The last `count` events, oldest first.
+        """
+        return list(self.events)[-count:]
+
+    def __on_loss(self, sample):
+        if not self.__lost_run:
+            self.__lost_since_ns = sample.timestamp_ns
+
+        self.__lost_run += 1
+
+        if self.__lost_run == self.outage_length:
+            self.__emit(sample, OUTAGE, START, self.__lost_run, timestamp_ns=self.__lost_since_ns)
+
+    def __on_reply(self, sample, rtt):
+        self.__replies += 1
+
+        if self.__mean is None:
+            self.__mean = rtt
+            return
+
+        stdev = self.baseline_stdev
+        deviation = max(-DEFAULT_CLIP, min(DEFAULT_CLIP, (rtt - self.__mean) / stdev))
+
+        if self.__shift_since_ns is not None:
+            self.__track_shift(sample, rtt, deviation)
+            return
+
+        if self.__replies > self.warmup:
+            self.__cusum = max(0.0, self.__cusum + deviation - self.slack)
+
+            if self.__cusum > self.threshold:
+                self.__shift_since_ns = sample.timestamp_ns
+                self.__shift_level = rtt
+                self.__shift_samples = 0
+                self.__recovery = 0.0
+                self.__cusum = 0.0
+                self.__emit(sample, LATENCY, START, self.__mean)
+                return
+
+        # Update the baseline with the clipped value, so spikes don't drag it around.
+        difference = deviation * stdev
+        increment = self.alpha * difference
+        self.__mean += increment
+        self.__variance = (1 - self.alpha) * (self.__variance + difference * increment)
+
+    def __track_shift(self, sample, rtt, deviation):
+        self.__shift_samples += 1
+        self.__shift_level += self.alpha * (rtt - self.__shift_level)
+
+        # Evidence that the RTTs are back within `slack` of the frozen baseline.
+        self.__recovery = max(0.0, self.__recovery + self.slack - deviation)
+
+        if self.__recovery > self.threshold:
+            self.__emit(sample, LATENCY, END, self.__shift_level, self.__shift_since_ns)
+            self.__shift_since_ns = None
+            return
+
+        if self.__shift_samples >= self.settle:
+            # The shift is here to stay: make it the baseline.
+            self.__emit(sample, LATENCY, END, self.__shift_level, self.__shift_since_ns)
+            self.__mean = self.__shift_level
+            self.__shift_since_ns = None
+
+    def __emit(self, sample, kind, phase, value, since_ns=None, timestamp_ns=None):
+        event = Event(
+            sample.timestamp_ns if timestamp_ns is None else timestamp_ns,
+            self.target or sample.target,
+            kind,
+            phase,
+            value,
+            None if since_ns is None else (sample.timestamp_ns - since_ns) / 1_000_000_000
+        )
+
+        self.events.append(event)
+
+        for callback in self.__callbacks:
+            callback(event)
+
+    def __repr__(self):
+        state = 'outage' if self.in_outage else 'latency shift' if self.in_latency_shift else 'normal'
+
+        return f'<AnomalyDetector: {self.target}, {state}, baseline={self.__mean}>'
+
+
+"""
+The MIT License (MIT)
+Copyright © 2023 Inspyre Softworks - https://inspyre.tech
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE."""
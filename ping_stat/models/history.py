@@ -0,0 +1,394 @@
+"""
+Project: PingPing
+Author: Inspyre Softworks - https://inspyre.tech
+Created: 10/18/2026 @ 4:25 PM
+File:
+  Name: history.py
+  Filepath: ping_stat/models
+
+A bounded, columnar ring buffer of probe results for one target.
+
+Each sample takes 19 bytes in four preallocated columns: an `array('q')` of send timestamps (nanoseconds since the
+epoch), an `array('d')` of round-trip times (NaN when there was no reply), a `bytearray` of status codes, and an
+`array('H')` of sequence numbers. Appending overwrites the oldest sample once the buffer is full, so a monitor left
+running for weeks keeps the same memory footprint it had after its first `capacity` probes.
+
+Reading never copies the buffer. Indexing and iterating build `PingSample` tuples on the fly, slicing returns a
+`HistoryView`, and `segments()` exposes the raw columns as memoryviews. Those support the buffer protocol, and
+`to_numpy()` wraps them as NumPy arrays (int64 ns timestamps, float64 RTTs, uint8 statuses, uint16 sequence
+numbers) without creating a Python object per sample.
+"""
+import math
+import threading
+from array import array
+from typing import Dict, Iterator, List, Optional, Sequence, Union
+
+from ping_stat.models.samples import PingSample, STATUS_OK
+
+try:
+    import numpy as _np
+except ImportError:
+    _np = None
+
+
+DEFAULT_CAPACITY = 86_400
+"""The default number of samples kept per target (one day at one probe per second, about 1.6 MB)."""
+
+COLUMNS = ('timestamps', 'rtts', 'statuses', 'sequences')
+
+DTYPES = {'timestamps': 'int64', 'rtts': 'float64', 'statuses': 'uint8', 'sequences': 'uint16'}
+"""The NumPy dtype of each column."""
+
+_NAN = float('nan')
+
+
+class SampleHistory:
+    """
+    A fixed-capacity ring buffer of `PingSample` records for one target.
+
+    Appends are O(1) and thread-safe. Indexes are relative to the oldest sample still held: `history[0]` is the
+    oldest and `history[-1]` the newest.
+
+    Attributes:
+        target (str or None):
+            The target the samples belong to. Used for the `target` field of the samples read back.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, target: Optional[str] = None):
+        if not isinstance(capacity, int) or isinstance(capacity, bool):
+            raise TypeError('"capacity" must be an integer')
+
+        if capacity <= 0:
+            raise ValueError('"capacity" must be positive')
+
+        self.target = target
+
+        self.__capacity = capacity
+        self.__timestamps = array('q', bytes(8 * capacity))
+        self.__rtts = array('d', bytes(8 * capacity))
+        self.__statuses = bytearray(capacity)
+        self.__sequences = array('H', bytes(2 * capacity))
+        self.__columns = dict(zip(COLUMNS, (self.__timestamps, self.__rtts, self.__statuses, self.__sequences)))
+
+        self.__appended = 0
+        self.__floor = 0
+        self.__lock = threading.Lock()
+
+    @property
+    def appended(self) -> int:
+        """
+        int:
+            The number of samples ever appended, including those since overwritten. It only grows, which makes it
+            a cheap way to notice new samples.
+        """
+        return self.__appended
+
+    @property
+    def capacity(self) -> int:
+        return self.__capacity
+
+    @property
+    def dropped(self) -> int:
+        """
+        int:
+            The number of samples that were overwritten because the buffer was full.
+        """
+        return max(0, self.__appended - self.__capacity - self.__floor)
+
+    @property
+    def latest(self) -> Optional[PingSample]:
+        """
+        PingSample or None:
+            The newest sample, or None if the buffer is empty.
+        """
+        with self.__lock:
+            if self.__appended == self.__floor:
+                return None
+
+            return self.__read(self.__appended - 1)
+
+    @property
+    def nbytes(self) -> int:
+        """
+        int:
+            The memory taken by the columns, in bytes. Fixed at construction.
+        """
+        return sum(
+            column.itemsize * len(column) if isinstance(column, array) else len(column)
+            for column in self.__columns.values()
+        )
+
+    def add(self, sample: PingSample):
+        """
+        Append a `PingSample`.
+        """
+        self.append(sample.timestamp_ns, sample.rtt, sample.status, sample.sequence)
+
+    def append(self, timestamp_ns: int, rtt: Optional[float], status: int = STATUS_OK, sequence: int = 0):
+        """
+        Append one sample, overwriting the oldest if the buffer is full.
+
+        Args:
+            timestamp_ns (int):
+                Wall-clock send time in nanoseconds since the epoch.
+            rtt (float or None):
+                The round-trip time in seconds, or None if there was no reply.
+            status (int):
+                One of the `STATUS_*` constants.
+            sequence (int):
+                The ICMP sequence number.
+        """
+        with self.__lock:
+            slot = self.__appended % self.__capacity
+
+            self.__timestamps[slot] = timestamp_ns
+            self.__rtts[slot] = _NAN if rtt is None else rtt
+            self.__statuses[slot] = status
+            self.__sequences[slot] = sequence & 0xFFFF
+
+            self.__appended += 1
+
+    def clear(self):
+        """
+        Forget every sample. The columns keep their memory, and `appended` keeps counting.
+        """
+        with self.__lock:
+            self.__floor = self.__appended
+
+    def restore(self, timestamps: array, rtts: array, statuses: bytearray, sequences: array, appended: int = None):
+        """
+        Replace the contents with saved columns, such as those read back from a checkpoint.
+
+        The columns must be the same length and in chronological order, with the same types as `segments()`
+        returns. If they hold more samples than `capacity`, only the newest are kept.
+
+        Args:
+            appended (int or None):
+                The `appended` count to resume from. Defaults to the number of samples given.
+        """
+        count = len(timestamps)
+
+        if not len(rtts) == len(statuses) == len(sequences) == count:
+            raise ValueError('All columns must be the same length')
+
+        appended = count if appended is None else appended
+        if appended < count:
+            raise ValueError('"appended" cannot be less than the number of samples')
+
+        kept = min(count, self.__capacity)
+        sources = [column[count - kept:] for column in (timestamps, rtts, statuses, sequences)]
+
+        with self.__lock:
+            start = (appended - kept) % self.__capacity
+            head = min(kept, self.__capacity - start)
+
+            for column, source in zip(self.__columns.values(), sources):
+                column[start:start + head] = source[:head]
+                column[:kept - head] = source[head:]
+
+            self.__appended = appended
+            self.__floor = appended - kept
+
+    def segments(self, column: str) -> List[memoryview]:
+        """
+        Zero-copy access to one column, oldest sample first.
+
+        While the buffer has not wrapped, this is a single memoryview; after that, it is the two halves of the ring
+        in chronological order.
+
+        Note:
+            The memoryviews look straight into the buffer, so later appends overwrite what they show. Copy them if
+            you need a stable snapshot.
+
+        Args:
+            column (str):
+                One of 'timestamps', 'rtts' (NaN for no reply), 'statuses' or 'sequences'.
+
+        Returns:
+            list:
+                One or two memoryviews.
+        """
+        return self.column_segments((column,))[column]
+
+    def column_segments(self, columns: Sequence[str] = COLUMNS) -> Dict[str, List[memoryview]]:
+        """
+        Zero-copy access to several columns at once, like `segments()`, all cut at the same bounds.
+
+        Use this rather than calling `segments()` per column whenever samples may be appended concurrently: each
+        call reads the bounds afresh, so columns read one after another can differ in length.
+
+        Args:
+            columns (sequence):
+                Column names from `COLUMNS`.
+
+        Returns:
+            dict:
+                One or two memoryviews per column, keyed by column name.
+        """
+        for column in columns:
+            if column not in COLUMNS:
+                raise ValueError(f'"column" must be one of {", ".join(COLUMNS)}')
+
+        first, end = self._bounds()
+        start = first % self.__capacity
+        stop = start + end - first
+
+        segments = {}
+
+        for column in columns:
+            view = memoryview(self.__columns[column])
+
+            if stop <= self.__capacity:
+                segments[column] = [view[start:stop]]
+            else:
+                segments[column] = [view[start:], view[:stop - self.__capacity]]
+
+        return segments
+
+    def to_numpy(self, copy: bool = False) -> Dict[str, 'numpy.ndarray']:
+        """
+        The columns as NumPy arrays, oldest sample first. The dtypes are listed in `DTYPES`, and lost samples have an
+        RTT of NaN.
+
+        Until the buffer wraps, each array is a view straight into it. After that, each column is joined from its
+        two segments with a single vectorized copy.
+
+        Args:
+            copy (bool):
+                Always copy, so later appends cannot change the arrays.
+
+        Returns:
+            dict:
+                One array per column, keyed by the names in `COLUMNS`.
+
+        Raises:
+            ImportError:
+                If NumPy is not installed.
+        """
+        if _np is None:
+            raise ImportError('NumPy is required for to_numpy(). Install it with "pip install ping_stat[numpy]".')
+
+        arrays = {}
+
+        for column, segments in self.column_segments().items():
+            parts = [_np.frombuffer(segment, dtype=DTYPES[column]) for segment in segments]
+
+            if len(parts) == 1:
+                arrays[column] = parts[0].copy() if copy else parts[0]
+            else:
+                arrays[column] = _np.concatenate(parts)
+
+        return arrays
+
+    def view(self, start: Optional[int] = None, stop: Optional[int] = None) -> 'HistoryView':
+        """
+        A view of the samples from `start` to `stop`, with the same meaning as `history[start:stop]`.
+        """
+        return self[start:stop]
+
+    def _sample_at(self, position: int) -> PingSample:
+        # `position` counts appends since the buffer was created, not slots.
+        with self.__lock:
+            if not max(self.__floor, self.__appended - self.__capacity) <= position < self.__appended:
+                raise IndexError('sample has been overwritten or was never written')
+
+            return self.__read(position)
+
+    def _bounds(self):
+        with self.__lock:
+            return max(self.__floor, self.__appended - self.__capacity), self.__appended
+
+    def __read(self, position):
+        # Caller holds the lock.
+        slot = position % self.__capacity
+        rtt = self.__rtts[slot]
+
+        return PingSample(
+            self.__timestamps[slot],
+            self.target,
+            self.__sequences[slot],
+            None if math.isnan(rtt) else rtt,
+            self.__statuses[slot]
+        )
+
+    def __len__(self):
+        first, end = self._bounds()
+        return end - first
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[PingSample, 'HistoryView']:
+        first, end = self._bounds()
+
+        if isinstance(index, slice):
+            start, stop, step = index.indices(end - first)
+            if step != 1:
+                raise ValueError('history slices do not support a step')
+
+            return HistoryView(self, first + start, first + max(start, stop))
+
+        if index < 0:
+            index += end - first
+
+        if not 0 <= index < end - first:
+            raise IndexError('history index out of range')
+
+        return self._sample_at(first + index)
+
+    def __iter__(self) -> Iterator[PingSample]:
+        return iter(self[:])
+
+    def __repr__(self):
+        return f'<SampleHistory: {len(self)}/{self.__capacity} samples, {self.dropped} dropped>'
+
+
+class HistoryView:
+    """
+    A fixed range of samples in a `SampleHistory`, without copying them.
+
+    The range is pinned to the samples that were in it when the view was made. If any of them are overwritten
+    afterwards, reading one raises IndexError and iteration skips it.
+    """
+    __slots__ = ('history', 'start', 'stop')
+
+    def __init__(self, history: SampleHistory, start: int, stop: int):
+        self.history = history
+        self.start = start
+        self.stop = stop
+
+    def __len__(self):
+        return self.stop - self.start
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[PingSample, 'HistoryView']:
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                raise ValueError('history slices do not support a step')
+
+            return HistoryView(self.history, self.start + start, self.start + max(start, stop))
+
+        if index < 0:
+            index += len(self)
+
+        if not 0 <= index < len(self):
+            raise IndexError('history index out of range')
+
+        return self.history._sample_at(self.start + index)
+
+    def __iter__(self) -> Iterator[PingSample]:
+        for position in range(self.start, self.stop):
+            try:
+                yield self.history._sample_at(position)
+            except IndexError:
+                continue
+
+    def __repr__(self):
+        return f'<HistoryView: {len(self)} samples>'
+
+
+"""
+The MIT License (MIT)
+Copyright © 2023 Inspyre Softworks - https://inspyre.tech
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE."""
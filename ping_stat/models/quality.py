@@ -0,0 +1,228 @@
+"""
+Project: PingPing
+Author: Inspyre Softworks - https://inspyre.tech
+Created: 10/18/2026 @ 10:50 PM
+File:
+  Name: quality.py
+  Filepath: ping_stat/models
+
+Link-quality analytics for a stream of probe results: interarrival jitter, loss bursts, and the gaps between them.
+
+    - Jitter is the RFC 3550 interarrival jitter estimate, J += (|D| - J) / 16, where D is the difference between the
+      transit times of consecutive replies. For echo probes, the round-trip time stands in for the transit time.
+    - A loss burst is a run of consecutive lost probes. A gap is a run of consecutive replies between two bursts.
+
+Each sample updates a handful of counters, so the cost per sample is constant and nothing is recomputed from the
+history. Burst and gap lengths are counted in power-of-two bins (1, 2, 3-4, 5-8, ...), so their distributions take
+fixed memory however long the run.
+
+Usage:
+    from ping_stat.models.quality import LinkQuality
+
+    quality = LinkQuality()
+    ping.add_callback(quality.add)
+    ...
+    print(quality.jitter, quality.longest_burst, quality.as_dict())
+"""
+from array import array
+from typing import Dict, Optional
+
+from ping_stat.models.samples import PingSample
+
+
+LENGTH_BINS = 32
+"""Bins in the burst and gap length distributions. Bin `i` counts lengths from 2^(i-1) + 1 to 2^i."""
+
+JITTER_GAIN = 1 / 16
+"""The RFC 3550 smoothing factor for the jitter estimate."""
+
+
+def length_bin(length: int) -> int:
+    """
+    The distribution bin a burst or gap of `length` samples is counted in.
+    """
+    return min((length - 1).bit_length(), LENGTH_BINS - 1)
+
+
+def length_label(i: int) -> str:
+    """
+    The range of lengths counted in bin `i`, such as '1', '2' or '5-8'.
+    """
+    if i < 2:
+        return str(i + 1)
+
+    if i == LENGTH_BINS - 1:
+        return f'{2 ** (i - 1) + 1}+'
+
+    return f'{2 ** (i - 1) + 1}-{2 ** i}'
+
+
+def _distribution(counts: array) -> Dict[str, int]:
+    return {length_label(i): value for i, value in enumerate(counts) if value}
+
+
+class LinkQuality:
+    """
+    Jitter and loss-burst statistics of every sample added so far.
+
+    Attributes:
+        jitter (float or None):
+            The RFC 3550 interarrival jitter in seconds. None until two replies have been seen.
+
+        max_jitter (float or None):
+            The highest the jitter estimate has been.
+
+        bursts (int):
+            The number of loss bursts, including one still in progress.
+
+        longest_burst (int):
+            The length of the longest loss burst, in samples.
+
+        current_burst (int):
+            The length of the loss burst in progress, or 0 if the last sample got a reply.
+
+        gaps (int):
+            The number of completed gaps between loss bursts.
+
+        current_gap (int):
+            The number of replies since the last loss.
+    """
+    STATE_FIELDS = (
+        'jitter', 'max_jitter', 'bursts', 'longest_burst', 'current_burst', 'gaps', 'current_gap', 'lost',
+        'last_rtt'
+    )
+
+    def __init__(self):
+        self.jitter = None
+        self.max_jitter = None
+        self.bursts = 0
+        self.longest_burst = 0
+        self.current_burst = 0
+        self.gaps = 0
+        self.current_gap = 0
+        self.lost = 0
+        self.last_rtt = None
+        self.__burst_lengths = array('I', bytes(4 * LENGTH_BINS))
+        self.__gap_lengths = array('I', bytes(4 * LENGTH_BINS))
+
+    @property
+    def mean_burst(self) -> Optional[float]:
+        """
+        float or None:
+            The mean length of a loss burst, in samples.
+        """
+        return self.lost / self.bursts if self.bursts else None
+
+    @property
+    def burst_lengths(self) -> Dict[str, int]:
+        """
+        dict:
+            The number of loss bursts of each length, keyed by length range ('1', '2', '3-4', ...). A burst still in
+            progress is not counted until it ends.
+        """
+        return _distribution(self.__burst_lengths)
+
+    @property
+    def gap_lengths(self) -> Dict[str, int]:
+        """
+        dict:
+            The number of gaps between loss bursts of each length, keyed by length range.
+        """
+        return _distribution(self.__gap_lengths)
+
+    def add(self, sample: PingSample):
+        """
+        Update the statistics with the next sample.
+        """
+        rtt = sample.rtt
+
+        if rtt is None:
+            self.lost += 1
+
+            if not self.current_burst:
+                self.bursts += 1
+
+                # Replies between two bursts make a gap. Replies before the first loss do not.
+                if self.current_gap and self.bursts > 1:
+                    self.gaps += 1
+                    self.__gap_lengths[length_bin(self.current_gap)] += 1
+
+                self.current_gap = 0
+
+            self.current_burst += 1
+
+            if self.current_burst > self.longest_burst:
+                self.longest_burst = self.current_burst
+
+            return
+
+        if self.current_burst:
+            self.__burst_lengths[length_bin(self.current_burst)] += 1
+            self.current_burst = 0
+
+        self.current_gap += 1
+
+        if self.last_rtt is not None:
+            difference = abs(rtt - self.last_rtt)
+            jitter = self.jitter or 0.0
+            jitter += (difference - jitter) * JITTER_GAIN
+            self.jitter = jitter
+
+            if self.max_jitter is None or jitter > self.max_jitter:
+                self.max_jitter = jitter
+
+        self.last_rtt = rtt
+
+    def state(self) -> dict:
+        """
+        The statistics as a JSON-serializable dict, for `restore()`.
+        """
+        state = {field: getattr(self, field) for field in self.STATE_FIELDS}
+        state['burst_lengths'] = list(self.__burst_lengths)
+        state['gap_lengths'] = list(self.__gap_lengths)
+
+        return state
+
+    def restore(self, state: dict):
+        """
+        Replace the statistics with ones saved by `state()`.
+        """
+        for field in self.STATE_FIELDS:
+            setattr(self, field, state[field])
+
+        self.__burst_lengths = array('I', state['burst_lengths'])
+        self.__gap_lengths = array('I', state['gap_lengths'])
+
+    def as_dict(self) -> dict:
+        """
+        The statistics as a dict, for reports.
+        """
+        return {
+            'jitter': self.jitter,
+            'max_jitter': self.max_jitter,
+            'loss_bursts': {
+                'count': self.bursts,
+                'longest': self.longest_burst,
+                'mean': self.mean_burst,
+                'current': self.current_burst,
+                'lengths': self.burst_lengths,
+            },
+            'loss_gaps': {
+                'count': self.gaps,
+                'current': self.current_gap,
+                'lengths': self.gap_lengths,
+            },
+        }
+
+    def __repr__(self):
+        return f'<LinkQuality: jitter={self.jitter}, {self.bursts} loss bursts, longest {self.longest_burst}>'
+
+
+"""
+The MIT License (MIT)
+Copyright © 2023 Inspyre Softworks - https://inspyre.tech
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE."""
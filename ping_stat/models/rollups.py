@@ -0,0 +1,443 @@
+"""
+Project: PingPing
+Author: Inspyre Softworks - https://inspyre.tech
+Created: 10/18/2026 @ 6:20 PM
+File:
+  Name: rollups.py
+  Filepath: ping_stat/models
+
+Per-minute and per-hour aggregates of probe results.
+
+Every sample is folded into one `Bucket` per tier as it arrives. A bucket holds the count, loss, min, max, sum and
+sum of squares of the round-trip times, and a 32-bin latency sketch (128 bytes; see `ping_stat.models.sketch`). Each
+tier is a fixed-size ring of buckets, so a week of minutes or a year of hours costs the same memory on the first day
+as on the last. A report over a range merges the buckets it covers, percentiles included, so its cost depends on the
+number of buckets rather than the number of samples.
+
+Usage:
+    from ping_stat.models.rollups import Rollups
+
+    rollups = Rollups()
+    ping.add_callback(rollups.add)
+    ...
+    print(rollups.report(start_ns=..., end_ns=...))
+"""
+import math
+import threading
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ping_stat.models.samples import PingSample
+from ping_stat.models.sketch import QuantileSketch
+
+
+MINUTE = 60
+HOUR = 3600
+
+DEFAULT_TIERS = ((MINUTE, 7 * 24 * 60), (HOUR, 400 * 24))
+"""(width in seconds, number of buckets kept) for each tier: a week of minutes and 400 days of hours."""
+
+HISTOGRAM_GAMMA = math.sqrt(2)
+HISTOGRAM_MIN_VALUE = 0.0005
+HISTOGRAM_BINS = 32
+"""
+The layout of each bucket's latency sketch: 32 bins with upper bounds from 0.5 ms to about 16 s, each √2 wider than
+the last, and a last bin for everything slower. Percentiles read from a bucket are within about 17% of the true
+value. This is coarser than a target's own `QuantileSketch`, but costs 128 bytes per bucket.
+"""
+
+
+class Bucket:
+    """
+    Aggregates of every sample whose send time falls in one time bucket.
+
+    Attributes:
+        start_ns (int):
+            The start of the bucket, in nanoseconds since the epoch.
+
+        count (int):
+            The number of samples.
+
+        lost (int):
+            The number of samples that got no reply.
+
+        min (float or None):
+            The fastest round-trip time in seconds.
+
+        max (float or None):
+            The slowest round-trip time in seconds.
+
+        total (float):
+            The sum of the round-trip times.
+
+        total_sq (float):
+            The sum of the squared round-trip times.
+
+        sketch (QuantileSketch):
+            The latency distribution, in the `HISTOGRAM_*` layout.
+    """
+    __slots__ = ('start_ns', 'count', 'lost', 'total', 'total_sq', 'sketch')
+
+    def __init__(self, start_ns: int = 0):
+        self.start_ns = start_ns
+        self.count = 0
+        self.lost = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.sketch = QuantileSketch(HISTOGRAM_GAMMA, HISTOGRAM_MIN_VALUE, HISTOGRAM_BINS)
+
+    @property
+    def min(self) -> Optional[float]:
+        """
+        float or None:
+            The fastest round-trip time in seconds.
+        """
+        return self.sketch.min
+
+    @min.setter
+    def min(self, new):
+        self.sketch.min = new
+
+    @property
+    def max(self) -> Optional[float]:
+        """
+        float or None:
+            The slowest round-trip time in seconds.
+        """
+        return self.sketch.max
+
+    @max.setter
+    def max(self, new):
+        self.sketch.max = new
+
+    @property
+    def histogram(self) -> array:
+        """
+        array:
+            Sample counts per latency bin, as an `array('I')` of `HISTOGRAM_BINS` counts.
+        """
+        return self.sketch.counts
+
+    @histogram.setter
+    def histogram(self, new):
+        if not isinstance(new, array) or new.typecode != 'I' or len(new) != HISTOGRAM_BINS:
+            raise TypeError(f'"histogram" must be an array(\'I\') of {HISTOGRAM_BINS} counts!')
+
+        self.sketch.counts = new
+
+    @property
+    def received(self) -> int:
+        return self.count - self.lost
+
+    @property
+    def loss(self) -> float:
+        """
+        float:
+            The fraction of samples that got no reply.
+        """
+        return self.lost / self.count if self.count else 0.0
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total / self.received if self.received else None
+
+    @property
+    def stdev(self) -> Optional[float]:
+        """
+        float or None:
+            The population standard deviation of the round-trip times.
+        """
+        if not self.received:
+            return None
+
+        mean = self.total / self.received
+
+        return math.sqrt(max(0.0, self.total_sq / self.received - mean * mean))
+
+    def add(self, rtt: Optional[float]):
+        """
+        Add one round-trip time in seconds, or None for a sample that got no reply.
+        """
+        self.count += 1
+
+        if rtt is None:
+            self.lost += 1
+            return
+
+        self.total += rtt
+        self.total_sq += rtt * rtt
+        self.sketch.add(rtt)
+
+    def merge(self, other: 'Bucket'):
+        """
+        Fold another bucket's aggregates into this one. `start_ns` becomes the earlier of the two.
+        """
+        if not other.count:
+            return
+
+        self.start_ns = min(self.start_ns, other.start_ns) if self.count else other.start_ns
+        self.count += other.count
+        self.lost += other.lost
+        self.total += other.total
+        self.total_sq += other.total_sq
+        self.sketch.merge(other.sketch)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Estimate a latency quantile (between 0 and 1) from the sketch, in seconds. None if nothing was received.
+        """
+        return self.sketch.quantile(q)
+
+    def as_dict(self) -> dict:
+        """
+        The aggregates in the same shape as `Ping.generate_report()`.
+        """
+        return {
+            'pings_sent': self.count,
+            'pings_returned': self.received,
+            'pings_failed': self.lost,
+            'loss': self.loss,
+            'wait_time': {
+                'min': self.min,
+                'max': self.max,
+                'mean': self.mean,
+                'average': self.total,
+                **self.sketch.percentiles(),
+            },
+        }
+
+    def __repr__(self):
+        return f'<Bucket: {self.start_ns}, {self.count} samples, {self.lost} lost>'
+
+
+class RollupTier:
+    """
+    A fixed-size ring of `Bucket` objects, each `width` seconds wide.
+
+    Samples are placed by send time, so samples that arrive out of order still land in the right bucket. Samples
+    older than the oldest bucket still held are dropped.
+
+    Attributes:
+        width (int):
+            The width of each bucket, in seconds.
+
+        capacity (int):
+            The number of buckets kept.
+    """
+
+    def __init__(self, width: int, capacity: int):
+        if width <= 0 or capacity <= 0:
+            raise ValueError('"width" and "capacity" must be positive')
+
+        self.width = width
+        self.capacity = capacity
+
+        self.__width_ns = width * 1_000_000_000
+        self.__slots = [None] * capacity
+        self.__newest = None
+
+    @property
+    def newest(self) -> Optional[int]:
+        """
+        int or None:
+            The index (start time // width) of the newest bucket, or None if the tier is empty.
+        """
+        return self.__newest
+
+    @property
+    def oldest_ns(self) -> Optional[int]:
+        """
+        int or None:
+            The earliest send time the tier can still hold, or None if the tier is empty.
+        """
+        if self.__newest is None:
+            return None
+
+        return (self.__newest - self.capacity + 1) * self.__width_ns
+
+    def add(self, timestamp_ns: int, rtt: Optional[float]):
+        index = timestamp_ns // self.__width_ns
+
+        if self.__newest is not None:
+            if index <= self.__newest - self.capacity:
+                return
+
+            if index > self.__newest:
+                self.__newest = index
+        else:
+            self.__newest = index
+
+        slot = index % self.capacity
+        bucket = self.__slots[slot]
+        start_ns = index * self.__width_ns
+
+        if bucket is None or bucket.start_ns != start_ns:
+            bucket = self.__slots[slot] = Bucket(start_ns)
+
+        bucket.add(rtt)
+
+    def restore(self, buckets: Iterable[Bucket]):
+        """
+        Put saved buckets back into the ring, such as those read back from a checkpoint.
+        """
+        for bucket in buckets:
+            index = bucket.start_ns // self.__width_ns
+
+            if self.__newest is None or index > self.__newest:
+                self.__newest = index
+
+            slot = index % self.capacity
+            held = self.__slots[slot]
+
+            if held is None or held.start_ns < bucket.start_ns:
+                self.__slots[slot] = bucket
+
+    def buckets(self, start_ns: Optional[int] = None, end_ns: Optional[int] = None) -> List[Bucket]:
+        """
+        Every bucket that overlaps the range, oldest first.
+
+        Args:
+            start_ns (int or None):
+                The start of the range (inclusive), in nanoseconds since the epoch.
+            end_ns (int or None):
+                The end of the range (exclusive).
+        """
+        if self.__newest is None:
+            return []
+
+        first = self.__newest - self.capacity + 1
+        last = self.__newest
+
+        if start_ns is not None:
+            first = max(first, start_ns // self.__width_ns)
+
+        if end_ns is not None:
+            last = min(last, (end_ns - 1) // self.__width_ns)
+
+        found = []
+
+        for index in range(first, last + 1):
+            bucket = self.__slots[index % self.capacity]
+            if bucket is not None and bucket.start_ns == index * self.__width_ns:
+                found.append(bucket)
+
+        return found
+
+    def __repr__(self):
+        return f'<RollupTier: {self.width}s x {self.capacity}>'
+
+
+class Rollups:
+    """
+    Tiered aggregates for one target.
+
+    Attributes:
+        target (str or None):
+            The target the samples belong to.
+    """
+
+    def __init__(self, target: Optional[str] = None, tiers: Iterable[Tuple[int, int]] = DEFAULT_TIERS):
+        self.target = target
+
+        self.__tiers = {width: RollupTier(width, capacity) for width, capacity in sorted(tiers)}
+        self.__lock = threading.Lock()
+
+        if not self.__tiers:
+            raise ValueError('"tiers" must not be empty')
+
+    @property
+    def tiers(self) -> Dict[int, RollupTier]:
+        """
+        dict:
+            The tiers, keyed by bucket width in seconds, finest first.
+        """
+        return dict(self.__tiers)
+
+    def add(self, sample: PingSample):
+        """
+        Fold a `PingSample` into every tier.
+        """
+        with self.__lock:
+            for tier in self.__tiers.values():
+                tier.add(sample.timestamp_ns, sample.rtt)
+
+    def buckets(
+            self,
+            width: Optional[int] = None,
+            start_ns: Optional[int] = None,
+            end_ns: Optional[int] = None
+    ) -> List[Bucket]:
+        """
+        The buckets of one tier that overlap a range.
+
+        Args:
+            width (int or None):
+                The tier to read. By default, the finest tier that still holds `start_ns`.
+        """
+        with self.__lock:
+            return self.__tier_for(width, start_ns).buckets(start_ns, end_ns)
+
+    def restore(self, tiers: Dict[int, List[Bucket]]):
+        """
+        Put saved buckets back, keyed by tier width. Tiers this object does not have are ignored.
+        """
+        with self.__lock:
+            for width, buckets in tiers.items():
+                if width in self.__tiers:
+                    self.__tiers[width].restore(buckets)
+
+    def summary(
+            self,
+            start_ns: Optional[int] = None,
+            end_ns: Optional[int] = None,
+            width: Optional[int] = None
+    ) -> Bucket:
+        """
+        Merge the buckets that overlap a range into one.
+
+        The range is widened to whole buckets of the tier used, so the result can include samples up to one bucket
+        width either side of it.
+        """
+        merged = Bucket()
+
+        for bucket in self.buckets(width, start_ns, end_ns):
+            merged.merge(bucket)
+
+        return merged
+
+    def report(self, start_ns: Optional[int] = None, end_ns: Optional[int] = None, width: Optional[int] = None) -> dict:
+        """
+        A report over a range, in the same shape as `Ping.generate_report()`. See `summary()`.
+        """
+        return self.summary(start_ns, end_ns, width).as_dict()
+
+    def __tier_for(self, width, start_ns):
+        if width is not None:
+            if width not in self.__tiers:
+                raise ValueError(f'No {width}s tier. Tiers: {", ".join(map(str, self.__tiers))}')
+
+            return self.__tiers[width]
+
+        tiers = list(self.__tiers.values())
+
+        if start_ns is None:
+            return tiers[-1]
+
+        for tier in tiers:
+            if tier.oldest_ns is None or tier.oldest_ns <= start_ns:
+                return tier
+
+        return tiers[-1]
+
+    def __repr__(self):
+        return f'<Rollups: {self.target}, tiers {", ".join(f"{width}s" for width in self.__tiers)}>'
+
+
+"""
+The MIT License (MIT)
+Copyright © 2023 Inspyre Softworks - https://inspyre.tech
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE."""
@@ -0,0 +1,161 @@
+"""
+Project: PingPing
+Author: Inspyre Softworks - https://inspyre.tech
+Created: 10/18/2026 @ 9:12 AM
+File:
+  Name: samples.py
+  Filepath: ping_stat/models
+"""
+import threading
+from collections import deque
+from typing import Any, Callable, Hashable, NamedTuple, Optional
+
+
+STATUS_OK = 0
+STATUS_TIMEOUT = 1
+STATUS_ERROR = 2
+STATUS_TTL_EXCEEDED = 3
+STATUS_UNREACHABLE = 4
+
+STATUS_NAMES = {
+    STATUS_OK: 'OK',
+    STATUS_TIMEOUT: 'TIMEOUT',
+    STATUS_ERROR: 'ERROR',
+    STATUS_TTL_EXCEEDED: 'TTL_EXCEEDED',
+    STATUS_UNREACHABLE: 'UNREACHABLE',
+}
+
+
+class PingSample(NamedTuple):
+    """
+    A single probe result.
+
+    Attributes:
+        timestamp_ns (int):
+            Wall-clock time (nanoseconds since the epoch) at which the probe was sent.
+
+        target (str):
+            The address or hostname that was probed.
+
+        sequence (int):
+            The ICMP sequence number used for the probe.
+
+        rtt (float or None):
+            The round-trip time in seconds, or None if no echo reply was received.
+
+        status (int):
+            One of the `STATUS_*` constants in this module.
+    """
+    timestamp_ns: int
+    target: str
+    sequence: int
+    rtt: Optional[float]
+    status: int = STATUS_OK
+
+    @property
+    def ok(self) -> bool:
+        return self.status == STATUS_OK
+
+    @property
+    def status_name(self) -> str:
+        return STATUS_NAMES.get(self.status, str(self.status))
+
+
+class TTLResult(NamedTuple):
+    """
+    The outcome of one probe in a TTL test.
+
+    Attributes:
+        ttl (int):
+            The IP time-to-live the probe was sent with.
+
+        status (int):
+            One of the `STATUS_*` constants in this module. `STATUS_OK` means the destination itself answered, and
+            `STATUS_TTL_EXCEEDED` means a router on the way did.
+
+        rtt (float or None):
+            The round-trip time in seconds to whoever answered, or None if nobody did.
+
+        responder (str or None):
+            The address that answered the probe.
+
+        elapsed (float):
+            Seconds from the start of the test until this probe finished.
+    """
+    ttl: int
+    status: int
+    rtt: Optional[float]
+    responder: Optional[str]
+    elapsed: float
+
+    @property
+    def reached(self) -> bool:
+        return self.status == STATUS_OK
+
+    @property
+    def status_name(self) -> str:
+        return STATUS_NAMES.get(self.status, str(self.status))
+
+
+class ReorderBuffer:
+    """
+    Hand results on in the order their probes were sent, whatever order they finish in.
+
+    Whenever the interval is shorter than the timeout, a probe that times out finishes after later probes that got
+    a reply. Statistics that depend on order (loss bursts, jitter, sliding windows, outage detection) need the
+    results in send order, so they go through one of these first.
+
+    Call `sent(key)` as each probe goes out, and `done(key, result)` when it finishes. `release` is called with each
+    result once every probe sent before it has finished too. A result reported before its probe is marked as sent
+    (a fast reply can beat the sender) is held until then. Every probe has a deadline, so no result is held longer
+    than about one timeout. Thread-safe; `release` is called with the buffer's lock held, so results are never
+    released concurrently.
+    """
+
+    def __init__(self, release: Callable[[Any], None]):
+        self.__release = release
+        self.__order = deque()
+        self.__finished = {}
+        self.__lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        """
+        int:
+            The number of probes sent whose results have not been released yet.
+        """
+        return len(self.__order)
+
+    def sent(self, key: Hashable):
+        """
+        Mark the probe `key` as sent, after every probe marked before it.
+        """
+        with self.__lock:
+            self.__order.append(key)
+            self.__flush()
+
+    def done(self, key: Hashable, result: Any):
+        """
+        Record the result of the probe `key`, and release every result that is now in order.
+        """
+        with self.__lock:
+            self.__finished[key] = result
+            self.__flush()
+
+    def __flush(self):
+        # Caller holds the lock.
+        while self.__order and self.__order[0] in self.__finished:
+            self.__release(self.__finished.pop(self.__order.popleft()))
+
+    def __repr__(self):
+        return f'<ReorderBuffer: {len(self.__order)} pending, {len(self.__finished)} finished out of order>'
+
+
+"""
+The MIT License (MIT)
+Copyright © 2023 Inspyre Softworks - https://inspyre.tech
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE."""
@@ -0,0 +1,299 @@
+"""
+Project: PingPing
+Author: Inspyre Softworks - https://inspyre.tech
+Created: 10/18/2026 @ 9:40 PM
+File:
+  Name: sketch.py
+  Filepath: ping_stat/models
+
+A mergeable, fixed-memory sketch of a latency distribution, for percentiles without keeping or sorting the samples.
+
+Round-trip times are counted in logarithmically spaced bins: bin `i` holds the values in
+(`min_value` × γ^(i-1), `min_value` × γ^i]. The first bin also takes everything at or below `min_value`, and the
+last everything above the top bound. A percentile read from the bins is within a relative error of
+(γ - 1) / (γ + 1) of the true value (about 1% for the default γ of 1.02), clamped to the observed min and max.
+
+Adding a sample costs a logarithm and an increment. Memory is one 32-bit count per bin, whatever the number of
+samples: the default layout covers 10 µs to 60 s in 790 bins (about 3 KB). Two sketches with the same layout merge by
+adding their counts, so percentiles can be taken over any mix of targets or time buckets.
+
+Usage:
+    from ping_stat.models.sketch import QuantileSketch
+
+    sketch = QuantileSketch()
+    for rtt in rtts:
+        sketch.add(rtt)
+
+    print(sketch.quantile(0.99), sketch.percentiles())
+"""
+import math
+from array import array
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+DEFAULT_GAMMA = 1.02
+"""Ratio between the bounds of neighbouring bins. 1.02 gives a relative error of under 1%."""
+
+DEFAULT_MIN_VALUE = 0.00001
+"""The top of the lowest bin, in seconds (10 µs)."""
+
+DEFAULT_MAX_VALUE = 60.0
+"""Round-trip times above this (in seconds) all land in the last bin."""
+
+DEFAULT_BINS = math.ceil(math.log(DEFAULT_MAX_VALUE / DEFAULT_MIN_VALUE, DEFAULT_GAMMA)) + 2
+
+PERCENTILES = (50, 90, 95, 99, 99.9)
+"""The percentiles reported by `QuantileSketch.percentiles()`."""
+
+
+def percentile_key(percentile: float) -> str:
+    """
+    The report key for a percentile: 'p50', 'p99.9' and so on.
+    """
+    return f'p{percentile:g}'
+
+
+class QuantileSketch:
+    """
+    Counts of round-trip times in log-spaced bins.
+
+    Attributes:
+        gamma (float):
+            The ratio between the bounds of neighbouring bins.
+
+        min_value (float):
+            The upper bound of the first bin, in seconds.
+
+        counts (array):
+            The number of values in each bin, as an `array('I')`.
+
+        min (float or None):
+            The smallest value added.
+
+        max (float or None):
+            The largest value added.
+    """
+    __slots__ = ('gamma', 'min_value', 'counts', 'min', 'max', '__log_min', '__scale')
+
+    def __init__(self, gamma: float = DEFAULT_GAMMA, min_value: float = DEFAULT_MIN_VALUE, bins: int = DEFAULT_BINS):
+        """
+        Args:
+            gamma (float):
+                The ratio between the bounds of neighbouring bins. Must be greater than 1.
+            min_value (float):
+                The upper bound of the first bin, in seconds. Must be positive.
+            bins (int):
+                The number of bins. Values above `min_value` × γ^(bins - 2) all land in the last one.
+        """
+        if gamma <= 1:
+            raise ValueError('"gamma" must be greater than 1')
+
+        if min_value <= 0:
+            raise ValueError('"min_value" must be positive')
+
+        if bins < 2:
+            raise ValueError('"bins" must be at least 2')
+
+        self.gamma = gamma
+        self.min_value = min_value
+        self.counts = array('I', bytes(4 * bins))
+        self.min = None
+        self.max = None
+        self.__log_min = math.log(min_value)
+        self.__scale = 1 / math.log(gamma)
+
+    @property
+    def layout(self) -> Tuple[float, float, int]:
+        """
+        tuple:
+            (gamma, min_value, bins). Only sketches with the same layout can be merged.
+        """
+        return self.gamma, self.min_value, len(self.counts)
+
+    @property
+    def relative_accuracy(self) -> float:
+        """
+        float:
+            The largest relative error of a quantile estimate, for values inside the bin range.
+        """
+        return (self.gamma - 1) / (self.gamma + 1)
+
+    @property
+    def count(self) -> int:
+        """
+        int:
+            The number of values added.
+        """
+        return sum(self.counts)
+
+    def bin(self, value: float) -> int:
+        """
+        The index of the bin `value` lands in.
+        """
+        if value <= self.min_value:
+            return 0
+
+        return min(math.ceil((math.log(value) - self.__log_min) * self.__scale), len(self.counts) - 1)
+
+    def add(self, value: float):
+        """
+        Add a round-trip time in seconds.
+        """
+        self.counts[self.bin(value)] += 1
+
+        if self.min is None or value < self.min:
+            self.min = value
+
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def extend(self, values: Iterable[float]):
+        """
+        Add several round-trip times.
+        """
+        for value in values:
+            self.add(value)
+
+    def merge(self, other: 'QuantileSketch'):
+        """
+        Fold another sketch's counts into this one.
+
+        Raises:
+            ValueError:
+                If the sketches do not have the same layout.
+        """
+        if other.layout != self.layout:
+            raise ValueError(f'Cannot merge a sketch with layout {other.layout} into one with layout {self.layout}')
+
+        if other.min is None:
+            return
+
+        counts = self.counts
+        for i, value in enumerate(other.counts):
+            if value:
+                counts[i] += value
+
+        if self.min is None or other.min < self.min:
+            self.min = other.min
+
+        if self.max is None or other.max > self.max:
+            self.max = other.max
+
+    def copy(self) -> 'QuantileSketch':
+        sketch = QuantileSketch(*self.layout)
+        sketch.merge(self)
+
+        return sketch
+
+    def quantiles(self, qs: Sequence[float]) -> List[Optional[float]]:
+        """
+        Estimate several quantiles in one pass over the bins.
+
+        Args:
+            qs (sequence of float):
+                The quantiles, each between 0 and 1.
+
+        Returns:
+            list:
+                The estimates in seconds, in the order of `qs`. All None if the sketch is empty.
+        """
+        for q in qs:
+            if not 0 <= q <= 1:
+                raise ValueError('Quantiles must be between 0 and 1')
+
+        total = self.count
+        if not total:
+            return [None] * len(qs)
+
+        order = sorted(range(len(qs)), key=qs.__getitem__)
+        results = [None] * len(qs)
+        position = 0
+        seen = 0
+
+        for i, value in enumerate(self.counts):
+            if not value:
+                continue
+
+            seen += value
+
+            # The value at (0-based) rank q × (n - 1) is in the first bin whose running count passes it.
+            while position < len(order) and qs[order[position]] * (total - 1) < seen:
+                results[order[position]] = self.__estimate(i)
+                position += 1
+
+            if position == len(order):
+                break
+
+        return results
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Estimate a quantile (between 0 and 1), in seconds. None if the sketch is empty.
+        """
+        return self.quantiles((q,))[0]
+
+    def percentiles(self, percentiles: Sequence[float] = PERCENTILES) -> Dict[str, Optional[float]]:
+        """
+        Estimate percentiles (between 0 and 100).
+
+        Returns:
+            dict:
+                The estimates in seconds, keyed 'p50', 'p99.9' and so on.
+        """
+        values = self.quantiles([percentile / 100 for percentile in percentiles])
+
+        return {percentile_key(percentile): value for percentile, value in zip(percentiles, values)}
+
+    def state(self) -> dict:
+        """
+        The sketch as a JSON-serializable dict, for `restore()`. Only the bins in use are included.
+        """
+        return {
+            'layout': list(self.layout),
+            'bins': [[i, value] for i, value in enumerate(self.counts) if value],
+            'min': self.min,
+            'max': self.max,
+        }
+
+    def restore(self, state: dict):
+        """
+        Replace the counts with ones saved by `state()`.
+
+        Raises:
+            ValueError:
+                If the state was saved from a sketch with a different layout.
+        """
+        if tuple(state['layout']) != self.layout:
+            raise ValueError(f'Cannot restore a sketch with layout {tuple(state["layout"])} into one with layout '
+                             f'{self.layout}')
+
+        self.counts = array('I', bytes(4 * len(self.counts)))
+        for i, value in state['bins']:
+            self.counts[i] = value
+
+        self.min = state['min']
+        self.max = state['max']
+
+    def __estimate(self, i):
+        if i == 0:
+            estimate = self.min_value
+        elif i == len(self.counts) - 1:
+            return self.max
+        else:
+            # The point of the bin with the same relative error to either bound.
+            estimate = 2 * self.min_value * self.gamma ** i / (self.gamma + 1)
+
+        return min(max(estimate, self.min), self.max)
+
+    def __repr__(self):
+        return f'<QuantileSketch: {self.count} values, {len(self.counts)} bins, γ={self.gamma:g}>'
+
+
+"""
+The MIT License (MIT)
+Copyright © 2023 Inspyre Softworks - https://inspyre.tech
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE."""
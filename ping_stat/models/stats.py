@@ -0,0 +1,219 @@
+"""
+Project: PingPing
+Author: Inspyre Softworks - https://inspyre.tech
+Created: 10/18/2026 @ 9:05 PM
+File:
+  Name: stats.py
+  Filepath: ping_stat/models
+
+Running statistics of probe results, updated in constant time as each sample arrives.
+
+The mean and variance of the round-trip times are kept with Welford's method, which stays accurate over millions of
+samples where a running sum of squares would not. Percentiles come from a `QuantileSketch`. Reading any statistic is
+constant time too (percentiles cost one pass over the sketch's bins), so a live monitor can ask for the mean on every
+tick without walking the history.
+
+Usage:
+    from ping_stat.models.stats import RunningStats
+
+    stats = RunningStats()
+    ping.add_callback(stats.add)
+    ...
+    print(stats.mean, stats.stdev, stats.loss)
+"""
+import math
+from typing import Optional
+
+from ping_stat.models.samples import PingSample
+from ping_stat.models.sketch import QuantileSketch
+
+
+class RunningStats:
+    """
+    Statistics of every sample added so far.
+
+    Attributes:
+        sent (int):
+            The number of samples.
+
+        lost (int):
+            The number of samples that got no reply.
+
+        mean (float or None):
+            The mean round-trip time in seconds.
+
+        m2 (float):
+            The sum of squared differences from the mean (Welford's M2).
+
+        min (float or None):
+            The fastest round-trip time in seconds.
+
+        max (float or None):
+            The slowest round-trip time in seconds.
+
+        sketch (QuantileSketch):
+            The distribution of the round-trip times, for percentiles.
+
+        last (PingSample or None):
+            The most recent sample.
+    """
+    __slots__ = ('sent', 'lost', 'mean', 'm2', 'min', 'max', 'sketch', 'last')
+
+    STATE_FIELDS = ('sent', 'lost', 'mean', 'm2', 'min', 'max')
+
+    def __init__(self):
+        self.sent = 0
+        self.lost = 0
+        self.mean = None
+        self.m2 = 0.0
+        self.min = None
+        self.max = None
+        self.sketch = QuantileSketch()
+        self.last = None
+
+    @property
+    def received(self) -> int:
+        return self.sent - self.lost
+
+    @property
+    def loss(self) -> float:
+        """
+        float:
+            The fraction of samples that got no reply.
+        """
+        return self.lost / self.sent if self.sent else 0.0
+
+    @property
+    def total(self) -> float:
+        """
+        float:
+            The sum of the round-trip times in seconds.
+        """
+        return self.mean * self.received if self.received else 0.0
+
+    @property
+    def variance(self) -> Optional[float]:
+        """
+        float or None:
+            The population variance of the round-trip times.
+        """
+        return self.m2 / self.received if self.received else None
+
+    @property
+    def stdev(self) -> Optional[float]:
+        """
+        float or None:
+            The population standard deviation of the round-trip times.
+        """
+        variance = self.variance
+
+        return math.sqrt(variance) if variance is not None else None
+
+    def add(self, sample: PingSample):
+        """
+        Add a sample. A sample with no round-trip time counts as lost.
+        """
+        self.sent += 1
+        self.last = sample
+
+        rtt = sample.rtt
+        if rtt is None:
+            self.lost += 1
+            return
+
+        self.sketch.add(rtt)
+
+        received = self.sent - self.lost
+
+        if received == 1:
+            self.mean = rtt
+            self.min = self.max = rtt
+            return
+
+        delta = rtt - self.mean
+        self.mean += delta / received
+        self.m2 += delta * (rtt - self.mean)
+
+        if rtt < self.min:
+            self.min = rtt
+
+        if rtt > self.max:
+            self.max = rtt
+
+    def merge(self, other: 'RunningStats'):
+        """
+        Fold another set of statistics into this one, as if its samples had been added here.
+        """
+        if not other.sent:
+            return
+
+        received, other_received = self.received, other.received
+        combined = received + other_received
+
+        if other_received:
+            if received:
+                delta = other.mean - self.mean
+                self.mean += delta * other_received / combined
+                self.m2 += other.m2 + delta * delta * received * other_received / combined
+                self.min = min(self.min, other.min)
+                self.max = max(self.max, other.max)
+            else:
+                self.mean, self.m2, self.min, self.max = other.mean, other.m2, other.min, other.max
+
+        self.sketch.merge(other.sketch)
+        self.sent += other.sent
+        self.lost += other.lost
+
+        if other.last is not None and (self.last is None or other.last.timestamp_ns > self.last.timestamp_ns):
+            self.last = other.last
+
+    def state(self) -> dict:
+        """
+        The statistics as a JSON-serializable dict, for `restore()`.
+        """
+        state = {field: getattr(self, field) for field in self.STATE_FIELDS}
+        state['sketch'] = self.sketch.state()
+
+        return state
+
+    def restore(self, state: dict):
+        """
+        Replace the statistics with ones saved by `state()`.
+        """
+        for field in self.STATE_FIELDS:
+            setattr(self, field, state[field])
+
+        if 'sketch' in state:
+            self.sketch.restore(state['sketch'])
+
+    def as_dict(self) -> dict:
+        """
+        The statistics in the same shape as `Ping.generate_report()`, plus the standard deviation.
+        """
+        return {
+            'pings_sent': self.sent,
+            'pings_returned': self.received,
+            'pings_failed': self.lost,
+            'loss': self.loss,
+            'wait_time': {
+                'min': self.min,
+                'max': self.max,
+                'mean': self.mean,
+                'average': self.total,
+                'stdev': self.stdev,
+                **self.sketch.percentiles(),
+            },
+        }
+
+    def __repr__(self):
+        return f'<RunningStats: {self.sent} sent, {self.lost} lost, mean={self.mean}>'
+
+
+"""
+The MIT License (MIT)
+Copyright © 2023 Inspyre Softworks - https://inspyre.tech
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE."""
@@ -0,0 +1,295 @@
+"""
+Project: PingPing
+Author: Inspyre Softworks - https://inspyre.tech
+Created: 10/18/2026 @ 10:15 PM
+File:
+  Name: windows.py
+  Filepath: ping_stat/models
+
+Statistics over a sliding window of recent probe results: the last N samples, or the samples sent in the last T
+seconds.
+
+Each window keeps the samples it covers in a deque, along with running sums of the count, loss, round-trip times and
+their squares. A sample's contribution is subtracted from the sums when it leaves the window. The min and max are kept
+in monotonic deques: each holds only the samples that could still become the min (or max) once older ones leave, so
+every sample is pushed and popped at most once. Adding a sample is therefore amortized O(1), and reading any
+statistic is O(1).
+
+Usage:
+    from ping_stat.models.windows import SlidingWindow
+
+    last_minute = SlidingWindow(duration=60)
+    last_hundred = SlidingWindow(size=100)
+
+    for sample in samples:
+        last_minute.add(sample)
+        last_hundred.add(sample)
+
+    print(last_minute.mean, last_minute.loss, last_hundred.max)
+"""
+import math
+from collections import deque
+from typing import Optional, Sequence
+
+from ping_stat.models.samples import PingSample
+
+
+class SlidingWindow:
+    """
+    Statistics of the most recent `size` samples, or of the samples sent in the last `duration` seconds.
+
+    A time window is measured back from the send time of the newest sample it has seen (or the time passed to
+    `expire()`), not from the clock.
+    """
+
+    def __init__(self, size: Optional[int] = None, duration: Optional[float] = None):
+        """
+        Args:
+            size (int or None):
+                The number of samples the window covers.
+            duration (float or None):
+                The number of seconds the window covers.
+
+        Raises:
+            ValueError:
+                Unless exactly one of `size` and `duration` is given, and it is positive.
+        """
+        if (size is None) == (duration is None):
+            raise ValueError('Give exactly one of "size" and "duration"')
+
+        if size is not None and (not isinstance(size, int) or size <= 0):
+            raise ValueError('"size" must be a positive integer')
+
+        if duration is not None and duration <= 0:
+            raise ValueError('"duration" must be positive')
+
+        self.__size = size
+        self.__duration_ns = None if duration is None else int(duration * 1_000_000_000)
+
+        # (timestamp_ns, rtt) of every sample in the window, oldest first.
+        self.__samples = deque()
+
+        # (position, rtt) candidates for the min and max. The min deque's RTTs increase from front to back and the
+        # max deque's decrease, so the front of each is the current min or max.
+        self.__minimums = deque()
+        self.__maximums = deque()
+
+        # Positions count every sample ever added; those below `__evicted` have left the window.
+        self.__added = 0
+        self.__evicted = 0
+
+        self.__lost = 0
+        self.__total = 0.0
+        self.__total_sq = 0.0
+
+    @property
+    def size(self) -> Optional[int]:
+        """
+        int or None:
+            The number of samples a count window covers.
+        """
+        return self.__size
+
+    @property
+    def duration(self) -> Optional[float]:
+        """
+        float or None:
+            The number of seconds a time window covers.
+        """
+        return None if self.__duration_ns is None else self.__duration_ns / 1_000_000_000
+
+    @property
+    def name(self) -> str:
+        """
+        str:
+            A short description of the window, such as '100 samples' or '60s'.
+        """
+        return f'{self.__size} samples' if self.__size is not None else f'{self.duration:g}s'
+
+    @property
+    def count(self) -> int:
+        """
+        int:
+            The number of samples in the window.
+        """
+        return len(self.__samples)
+
+    @property
+    def lost(self) -> int:
+        return self.__lost
+
+    @property
+    def received(self) -> int:
+        return len(self.__samples) - self.__lost
+
+    @property
+    def loss(self) -> float:
+        """
+        float:
+            The fraction of the samples in the window that got no reply.
+        """
+        return self.__lost / len(self.__samples) if self.__samples else 0.0
+
+    @property
+    def total(self) -> float:
+        return self.__total if self.received else 0.0
+
+    @property
+    def mean(self) -> Optional[float]:
+        received = self.received
+
+        return self.__total / received if received else None
+
+    @property
+    def stdev(self) -> Optional[float]:
+        """
+        float or None:
+            The population standard deviation of the round-trip times in the window.
+        """
+        received = self.received
+        if not received:
+            return None
+
+        mean = self.__total / received
+
+        return math.sqrt(max(0.0, self.__total_sq / received - mean * mean))
+
+    @property
+    def min(self) -> Optional[float]:
+        return self.__minimums[0][1] if self.__minimums else None
+
+    @property
+    def max(self) -> Optional[float]:
+        return self.__maximums[0][1] if self.__maximums else None
+
+    def add(self, sample: PingSample):
+        """
+        Add a sample, and drop the ones that have left the window.
+        """
+        rtt = sample.rtt
+        position = self.__added
+        self.__added += 1
+
+        self.__samples.append((sample.timestamp_ns, rtt))
+
+        if rtt is None:
+            self.__lost += 1
+        else:
+            self.__total += rtt
+            self.__total_sq += rtt * rtt
+
+            while self.__minimums and self.__minimums[-1][1] >= rtt:
+                self.__minimums.pop()
+            self.__minimums.append((position, rtt))
+
+            while self.__maximums and self.__maximums[-1][1] <= rtt:
+                self.__maximums.pop()
+            self.__maximums.append((position, rtt))
+
+        if self.__size is not None:
+            while len(self.__samples) > self.__size:
+                self.__evict()
+        else:
+            self.expire(sample.timestamp_ns)
+
+    def expire(self, now_ns: int):
+        """
+        Drop the samples sent more than `duration` seconds before `now_ns`. Does nothing for a count window.
+
+        Call this to age a time window when no samples are arriving.
+        """
+        if self.__duration_ns is None:
+            return
+
+        cutoff = now_ns - self.__duration_ns
+
+        while self.__samples and self.__samples[0][0] <= cutoff:
+            self.__evict()
+
+    def clear(self):
+        """
+        Drop every sample.
+        """
+        while self.__samples:
+            self.__evict()
+
+        self.__total = self.__total_sq = 0.0
+
+    def refill(self, history: Sequence[PingSample]):
+        """
+        Replace the window's samples with the ones it covers at the end of `history` (such as a `SampleHistory`,
+        oldest first), as if they had just been added. Only the covered tail is read, not the whole history.
+        """
+        self.clear()
+
+        if not len(history):
+            return
+
+        if self.__size is not None:
+            start = max(0, len(history) - self.__size)
+        else:
+            cutoff = history[-1].timestamp_ns - self.__duration_ns
+            start = len(history)
+
+            while start and history[start - 1].timestamp_ns > cutoff:
+                start -= 1
+
+        for sample in history[start:]:
+            self.add(sample)
+
+    def as_dict(self) -> dict:
+        """
+        The window's statistics in the same shape as `Ping.generate_report()`, plus the standard deviation.
+        """
+        return {
+            'window': self.name,
+            'pings_sent': self.count,
+            'pings_returned': self.received,
+            'pings_failed': self.lost,
+            'loss': self.loss,
+            'wait_time': {
+                'min': self.min,
+                'max': self.max,
+                'mean': self.mean,
+                'average': self.total,
+                'stdev': self.stdev,
+            },
+        }
+
+    def __evict(self):
+        _, rtt = self.__samples.popleft()
+        position = self.__evicted
+        self.__evicted += 1
+
+        if rtt is None:
+            self.__lost -= 1
+            return
+
+        self.__total -= rtt
+        self.__total_sq -= rtt * rtt
+
+        if self.__minimums and self.__minimums[0][0] == position:
+            self.__minimums.popleft()
+
+        if self.__maximums and self.__maximums[0][0] == position:
+            self.__maximums.popleft()
+
+        if not self.received:
+            # Start the sums afresh so rounding errors don't build up over a long run.
+            self.__total = self.__total_sq = 0.0
+
+    def __len__(self):
+        return len(self.__samples)
+
+    def __repr__(self):
+        return f'<SlidingWindow: {self.name}, {self.count} samples, mean={self.mean}, loss={self.loss:.1%}>'
+
+
+"""
+The MIT License (MIT)
+Copyright © 2023 Inspyre Softworks - https://inspyre.tech
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE."""
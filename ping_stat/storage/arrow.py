@@ -0,0 +1,233 @@
+"""
+Project: PingPing
+Author: Inspyre Softworks - https://inspyre.tech
+Created: 10/18/2026 @ 8:10 PM
+File:
+  Name: arrow.py
+  Filepath: ping_stat/storage
+
+Export probe results to Apache Arrow and Parquet, for analysis in pandas, Polars, DuckDB and the like.
+
+Every export has the same five columns:
+
+    - timestamp: the send time, as a UTC timestamp with nanosecond precision (int64 underneath)
+    - target: the target, dictionary-encoded
+    - sequence: the ICMP sequence number (uint16)
+    - rtt: the round-trip time in seconds (float64, NaN if there was no reply)
+    - status: one of the `STATUS_*` constants (uint8)
+
+A `SampleHistory` is exported without copying: each Arrow array wraps a segment of the ring buffer. Any other
+source of `PingSample` objects (a `BlockReader`, a `BinaryLogReader`, `SQLiteHistory.samples()`) is packed into
+columns `batch_size` samples at a time. A Parquet file is written one record batch at a time, so memory use does not
+depend on the size of the source.
+
+This module needs `pyarrow` (`pip install ping_stat[arrow]`).
+
+Usage:
+    from ping_stat.storage.arrow import write_parquet
+
+    write_parquet(ping.history, 'history.parquet')
+
+    with BlockReader('archive.psblk') as archive:
+        write_parquet(archive.samples(start_ns=...), 'last-week.parquet')
+"""
+from array import array
+from pathlib import Path
+from typing import Iterable, Iterator, Union
+
+from ping_stat.models.history import HistoryView, SampleHistory
+from ping_stat.models.samples import PingSample
+
+try:
+    import pyarrow as _pa
+    import pyarrow.parquet as _pq
+except ImportError:
+    _pa = _pq = None
+
+
+DEFAULT_BATCH_SIZE = 65_536
+"""Samples per record batch (and Parquet row group) when packing `PingSample` objects."""
+
+_NAN = float('nan')
+
+
+def _require_pyarrow():
+    if _pa is None:
+        raise ImportError('pyarrow is required to export to Arrow or Parquet. Install it with '
+                          '"pip install ping_stat[arrow]".')
+
+
+def schema() -> 'pyarrow.Schema':
+    """
+    The Arrow schema of every export.
+    """
+    _require_pyarrow()
+
+    return _pa.schema([
+        ('timestamp', _pa.timestamp('ns', tz='UTC')),
+        ('target', _pa.dictionary(_pa.int32(), _pa.string())),
+        ('sequence', _pa.uint16()),
+        ('rtt', _pa.float64()),
+        ('status', _pa.uint8()),
+    ])
+
+
+def _wrap(arrow_type, length, buffer):
+    # Wrap a buffer as an Arrow array with no nulls, without copying it.
+    return _pa.Array.from_buffers(arrow_type, length, [None, _pa.py_buffer(buffer)])
+
+
+def _batch(arrow_schema, timestamps, targets, target_names, sequences, rtts, statuses):
+    length = len(timestamps)
+
+    return _pa.RecordBatch.from_arrays(
+        [
+            _wrap(arrow_schema.field('timestamp').type, length, timestamps),
+            _pa.DictionaryArray.from_arrays(
+                _wrap(_pa.int32(), length, targets),
+                _pa.array(target_names, type=_pa.string())
+            ),
+            _wrap(_pa.uint16(), length, sequences),
+            _wrap(_pa.float64(), length, rtts),
+            _wrap(_pa.uint8(), length, statuses),
+        ],
+        schema=arrow_schema
+    )
+
+
+def _history_batches(history: SampleHistory, arrow_schema) -> Iterator['pyarrow.RecordBatch']:
+    # One batch per ring segment, each wrapping the segment's memory. The columns are cut at the same bounds, so
+    # an append from another thread cannot misalign them.
+    segments = history.column_segments(('timestamps', 'sequences', 'rtts', 'statuses'))
+    columns = list(segments.values())
+    target_names = [history.target or '']
+
+    for timestamps, sequences, rtts, statuses in zip(*columns):
+        if not len(timestamps):
+            continue
+
+        yield _batch(
+            arrow_schema,
+            timestamps,
+            array('i', bytes(4 * len(timestamps))),
+            target_names,
+            sequences,
+            rtts,
+            statuses
+        )
+
+
+def _sample_batches(samples: Iterable[PingSample], arrow_schema, batch_size) -> Iterator['pyarrow.RecordBatch']:
+    target_ids = {}
+
+    def empty():
+        return array('q'), array('i'), array('H'), array('d'), bytearray()
+
+    timestamps, targets, sequences, rtts, statuses = empty()
+
+    for sample in samples:
+        target_id = target_ids.get(sample.target)
+        if target_id is None:
+            target_id = target_ids[sample.target] = len(target_ids)
+
+        timestamps.append(sample.timestamp_ns)
+        targets.append(target_id)
+        sequences.append(sample.sequence & 0xFFFF)
+        rtts.append(_NAN if sample.rtt is None else sample.rtt)
+        statuses.append(sample.status)
+
+        if len(timestamps) >= batch_size:
+            yield _batch(arrow_schema, timestamps, targets, list(target_ids), sequences, rtts, statuses)
+            timestamps, targets, sequences, rtts, statuses = empty()
+
+    if timestamps:
+        yield _batch(arrow_schema, timestamps, targets, list(target_ids), sequences, rtts, statuses)
+
+
+def record_batches(
+        source: Union[SampleHistory, HistoryView, Iterable[PingSample]],
+        batch_size: int = DEFAULT_BATCH_SIZE
+) -> Iterator['pyarrow.RecordBatch']:
+    """
+    Stream a source of samples as Arrow record batches.
+
+    Args:
+        source:
+            A `SampleHistory` (exported without copying; see the note below), or any iterable of `PingSample`.
+        batch_size (int):
+            The most samples per batch, for sources that are not a `SampleHistory`.
+
+    Note:
+        Batches from a `SampleHistory` look straight into its buffer, so appends made while they are in use can
+        change them. Stop the monitor first if that matters.
+
+    Raises:
+        ImportError:
+            If pyarrow is not installed.
+    """
+    _require_pyarrow()
+
+    if batch_size <= 0:
+        raise ValueError('"batch_size" must be positive')
+
+    arrow_schema = schema()
+
+    if isinstance(source, SampleHistory):
+        return _history_batches(source, arrow_schema)
+
+    return _sample_batches(source, arrow_schema, batch_size)
+
+
+def to_arrow(
+        source: Union[SampleHistory, HistoryView, Iterable[PingSample]],
+        batch_size: int = DEFAULT_BATCH_SIZE
+) -> 'pyarrow.Table':
+    """
+    Collect a source of samples into an Arrow table. See `record_batches()`.
+    """
+    _require_pyarrow()
+
+    return _pa.Table.from_batches(list(record_batches(source, batch_size)), schema=schema())
+
+
+def write_parquet(
+        source: Union[SampleHistory, HistoryView, Iterable[PingSample]],
+        path: Union[str, Path],
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        compression: str = 'zstd'
+) -> int:
+    """
+    Write a source of samples to a Parquet file, one record batch at a time.
+
+    Args:
+        source:
+            See `record_batches()`.
+        path (str or Path):
+            The file to write. It is replaced if it exists.
+        compression (str):
+            The Parquet compression codec.
+
+    Returns:
+        int:
+            The number of samples written.
+    """
+    _require_pyarrow()
+
+    written = 0
+
+    with _pq.ParquetWriter(str(path), schema(), compression=compression) as writer:
+        for batch in record_batches(source, batch_size):
+            writer.write_batch(batch)
+            written += batch.num_rows
+
+    return written
+
+
+"""
+The MIT License (MIT)
+Copyright © 2023 Inspyre Softworks - https://inspyre.tech
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE."""
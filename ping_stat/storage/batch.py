@@ -0,0 +1,450 @@
+"""
+Project: PingPing
+Author: Inspyre Softworks - https://inspyre.tech
+Created: 10/18/2026 @ 11:20 PM
+File:
+  Name: batch.py
+  Filepath: ping_stat/storage
+
+Vectorized reports over long histories and many targets, grouped by target and by time bucket.
+
+`batch_report()` loads the timestamps, RTTs and target ids of a source as NumPy arrays and computes every statistic
+with whole-array operations. The samples are sorted by target and time once. Group boundaries are then found with
+one comparison, and each statistic takes a single `reduceat` (or `bincount`) over the groups:
+
+    - sent, lost and loss
+    - min, max, mean and population standard deviation of the round-trip times
+    - percentiles, interpolated from one further sort by group and RTT (to the nanosecond)
+    - outages: runs of at least `outage_length` consecutive lost samples, counted in the bucket where they start,
+      and the longest run of losses
+
+No Python code runs per sample once the columns are loaded. Binary logs and histories are loaded without unpacking.
+Other sources (block archives, SQLite databases, iterables of `PingSample`) are packed into columns first. A 30-day
+report over 500 targets probed once a minute (about 22 million samples) takes a few seconds.
+
+This module needs NumPy (`pip install ping_stat[numpy]`).
+
+Usage:
+    from ping_stat.storage.batch import batch_report
+    from ping_stat.models.rollups import HOUR
+
+    report = batch_report('capture.pslog', width=HOUR)
+    for row in report.rows():
+        print(row['target'], row['start_ns'], row['loss'], row['wait_time']['p99'], row['outages'])
+"""
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from ping_stat.models.detector import DEFAULT_OUTAGE_LENGTH
+from ping_stat.models.history import HistoryView, SampleHistory
+from ping_stat.models.samples import PingSample
+from ping_stat.models.sketch import PERCENTILES, percentile_key
+from ping_stat.storage.binlog import BinaryLogReader
+from ping_stat.storage.blocks import BlockReader
+from ping_stat.storage.reader import Timestamp, iter_samples, open_reader, to_ns
+from ping_stat.storage.sqlite import SQLiteHistory
+
+try:
+    import numpy as _np
+except ImportError:
+    _np = None
+
+
+def _require_numpy():
+    if _np is None:
+        raise ImportError('NumPy is required for batch reports. Install it with "pip install ping_stat[numpy]".')
+
+
+def _pack(samples: Iterable[PingSample]) -> Tuple[Dict[str, 'numpy.ndarray'], List[str]]:
+    # Pack samples into typed arrays, then wrap those as NumPy arrays without copying.
+    ids = {}
+    timestamps, rtts, target_ids = array('q'), array('d'), array('I')
+    nan = float('nan')
+
+    for sample in samples:
+        target_id = ids.get(sample.target)
+        if target_id is None:
+            target_id = ids[sample.target] = len(ids)
+
+        timestamps.append(sample.timestamp_ns)
+        rtts.append(nan if sample.rtt is None else sample.rtt)
+        target_ids.append(target_id)
+
+    columns = {
+        'timestamps': _np.frombuffer(timestamps, dtype=_np.int64) if timestamps else _np.empty(0, _np.int64),
+        'rtts': _np.frombuffer(rtts, dtype=_np.float64) if rtts else _np.empty(0, _np.float64),
+        'target_ids': _np.frombuffer(target_ids, dtype=_np.uint32) if target_ids else _np.empty(0, _np.uint32),
+    }
+
+    return columns, list(ids)
+
+
+def _filter(columns, targets, target, start_ns, end_ns):
+    mask = None
+
+    def narrow(condition):
+        nonlocal mask
+        mask = condition if mask is None else mask & condition
+
+    if target is not None:
+        if target not in targets:
+            narrow(_np.zeros(len(columns['timestamps']), dtype=bool))
+        else:
+            narrow(columns['target_ids'] == targets.index(target))
+
+    if start_ns is not None:
+        narrow(columns['timestamps'] >= start_ns)
+
+    if end_ns is not None:
+        narrow(columns['timestamps'] < end_ns)
+
+    if mask is None:
+        return columns
+
+    return {name: column[mask] for name, column in columns.items()}
+
+
+def load_columns(
+        source,
+        target: Optional[str] = None,
+        start: Timestamp = None,
+        end: Timestamp = None
+) -> Tuple[Dict[str, 'numpy.ndarray'], List[str]]:
+    """
+    Load the samples of a source as columns.
+
+    Args:
+        source:
+            Anything `ping_stat.storage.iter_samples()` accepts. A binary log (by path or as a `BinaryLogReader`)
+            and a `SampleHistory` (or anything with one as `history`) are read without unpacking.
+        target, start, end:
+            Only load the samples of this target, sent in this range. See `iter_samples()`.
+
+    Returns:
+        tuple:
+            The columns ('timestamps' as int64 ns, 'rtts' as float64 with NaN for lost samples, and 'target_ids'),
+            and the target names the ids index into.
+
+    Raises:
+        ImportError:
+            If NumPy is not installed.
+    """
+    _require_numpy()
+
+    start_ns, end_ns = to_ns(start), to_ns(end)
+
+    if isinstance(source, (str, Path)):
+        reader = open_reader(source)
+
+        if not isinstance(reader, BinaryLogReader):
+            try:
+                return _pack(reader.samples(target, start_ns, end_ns))
+            finally:
+                reader.close()
+
+        try:
+            columns, targets = load_columns(reader, target, start_ns, end_ns)
+            # Copy out of the memory map so it can be closed.
+            return {name: _np.array(column) for name, column in columns.items()}, targets
+        finally:
+            reader.close()
+
+    if isinstance(source, BinaryLogReader):
+        records = source.to_numpy()
+        columns = {name: records[name] for name in ('timestamps', 'rtts', 'target_ids')}
+
+        return _filter(columns, source.targets, target, start_ns, end_ns), source.targets
+
+    history = source if isinstance(source, SampleHistory) else getattr(source, 'history', None)
+
+    if isinstance(history, SampleHistory):
+        arrays = history.to_numpy()
+        targets = [history.target or '']
+        columns = {
+            'timestamps': arrays['timestamps'],
+            'rtts': arrays['rtts'],
+            'target_ids': _np.zeros(len(arrays['timestamps']), dtype=_np.uint32),
+        }
+
+        return _filter(columns, targets, target, start_ns, end_ns), targets
+
+    if isinstance(source, (BlockReader, SQLiteHistory, HistoryView)):
+        return _pack(iter_samples(source, target, start_ns, end_ns))
+
+    # Anything else is taken to be an iterable of samples.
+    columns, targets = _pack(source)
+
+    return _filter(columns, targets, target, start_ns, end_ns), targets
+
+
+def _sort_within_groups(rtts, lost_mask, group_of, groups):
+    # Sort the RTTs by group, then by value, with each group's lost samples (NaN) last.
+    #
+    # A two-key sort of tens of millions of values takes many seconds. Instead, when it fits in 64 bits, pack the
+    # group and the RTT in whole nanoseconds into one integer key and sort that, which is exact to the nanosecond.
+    rtt_ns = _np.rint(_np.where(lost_mask, 0.0, rtts) * 1_000_000_000).astype(_np.int64)
+    lost_ns = int(rtt_ns.max()) + 1 if len(rtt_ns) else 1
+    stride = lost_ns + 1
+
+    if groups * stride >= 2 ** 63:
+        return rtts[_np.lexsort((rtts, group_of))]
+
+    rtt_ns[lost_mask] = lost_ns
+    packed = _np.sort(group_of * stride + rtt_ns) % stride
+    values = packed / 1_000_000_000
+    values[packed == lost_ns] = _np.nan
+
+    return values
+
+
+class BatchReport:
+    """
+    Statistics per target and time bucket, as columns.
+
+    Attributes:
+        width (int or None):
+            The width of the time buckets in seconds, or None for one group per target.
+
+        percentiles (tuple):
+            The percentiles computed.
+
+        columns (dict):
+            One NumPy array per statistic, with one entry per group, ordered by target and then bucket start:
+            'target_ids', 'start_ns' (the bucket start, or the first sample's send time without buckets),
+            'first_ns', 'last_ns', 'sent', 'lost', 'loss', 'min', 'max', 'mean', 'total', 'stdev', one per
+            percentile ('p50', 'p99.9', ...), 'outages' and 'longest_outage'. RTT statistics are NaN for groups with
+            no replies.
+
+        targets (list):
+            The target names `target_ids` index into.
+    """
+
+    def __init__(self, columns: Dict[str, 'numpy.ndarray'], targets: List[str], width: Optional[int],
+                 percentiles: Sequence[float]):
+        self.columns = columns
+        self.targets = targets
+        self.width = width
+        self.percentiles = tuple(percentiles)
+
+    def rows(self) -> Iterator[dict]:
+        """
+        Yield one report dictionary per group, in the same shape as `Ping.generate_report()`, plus the 'target',
+        'start_ns', 'first_ns', 'last_ns', 'outages' and 'longest_outage'.
+        """
+        columns = self.columns
+        keys = [percentile_key(percentile) for percentile in self.percentiles]
+
+        def value(column, i):
+            number = float(columns[column][i])
+            return None if number != number else number
+
+        for i in range(len(self)):
+            sent, lost = int(columns['sent'][i]), int(columns['lost'][i])
+
+            yield {
+                'target': self.targets[columns['target_ids'][i]],
+                'start_ns': int(columns['start_ns'][i]),
+                'first_ns': int(columns['first_ns'][i]),
+                'last_ns': int(columns['last_ns'][i]),
+                'pings_sent': sent,
+                'pings_returned': sent - lost,
+                'pings_failed': lost,
+                'loss': float(columns['loss'][i]),
+                'outages': int(columns['outages'][i]),
+                'longest_outage': int(columns['longest_outage'][i]),
+                'wait_time': {
+                    'min': value('min', i),
+                    'max': value('max', i),
+                    'mean': value('mean', i),
+                    'average': float(columns['total'][i]),
+                    'stdev': value('stdev', i),
+                    **{key: value(key, i) for key in keys},
+                },
+            }
+
+    def to_dict(self) -> Dict[str, list]:
+        """
+        The report dictionaries from `rows()`, in lists keyed by target.
+        """
+        by_target = {}
+
+        for row in self.rows():
+            by_target.setdefault(row['target'], []).append(row)
+
+        return by_target
+
+    def __len__(self):
+        return len(self.columns['sent'])
+
+    def __repr__(self):
+        return f'<BatchReport: {len(self)} groups, {len(self.targets)} targets, width={self.width}>'
+
+
+def summarize(
+        columns: Dict[str, 'numpy.ndarray'],
+        targets: List[str],
+        width: Optional[int] = None,
+        percentiles: Sequence[float] = PERCENTILES,
+        outage_length: int = DEFAULT_OUTAGE_LENGTH
+) -> BatchReport:
+    """
+    Compute a `BatchReport` from columns loaded by `load_columns()`. See `batch_report()`.
+    """
+    _require_numpy()
+
+    if outage_length < 1:
+        raise ValueError('"outage_length" must be at least 1')
+
+    timestamps = _np.asarray(columns['timestamps'], dtype=_np.int64)
+    rtts = _np.asarray(columns['rtts'], dtype=_np.float64)
+    target_ids = _np.asarray(columns['target_ids'], dtype=_np.int64)
+    count = len(timestamps)
+    keys = [percentile_key(percentile) for percentile in percentiles]
+
+    if not count:
+        empty = {
+            name: _np.zeros(0)
+            for name in ('target_ids', 'start_ns', 'first_ns', 'last_ns', 'sent', 'lost', 'loss', 'min', 'max',
+                         'mean', 'total', 'stdev', *keys, 'outages', 'longest_outage')
+        }
+
+        return BatchReport(empty, list(targets), width, percentiles)
+
+    # Sort by target, then by time. Sources are usually in time order already, and then a stable sort on the target
+    # id alone is enough (and much cheaper than a two-key sort). NumPy radix-sorts 16-bit keys.
+    if _np.all(timestamps[1:] >= timestamps[:-1]):
+        sort_keys = target_ids.astype(_np.uint16) if len(targets) <= 0xFFFF else target_ids
+        order = _np.argsort(sort_keys, kind='stable')
+    else:
+        order = _np.lexsort((timestamps, target_ids))
+
+    timestamps, rtts, target_ids = timestamps[order], rtts[order], target_ids[order]
+
+    if width:
+        width_ns = int(width * 1_000_000_000)
+        bucket_starts = timestamps - timestamps % width_ns
+    else:
+        bucket_starts = None
+
+    # A group starts wherever the target or the bucket changes.
+    boundaries = _np.ones(count, dtype=bool)
+    same_target = target_ids[1:] == target_ids[:-1]
+    boundaries[1:] = ~same_target
+    if bucket_starts is not None:
+        boundaries[1:] |= bucket_starts[1:] != bucket_starts[:-1]
+
+    starts = _np.flatnonzero(boundaries)
+    groups = len(starts)
+    group_of = _np.cumsum(boundaries) - 1
+    sent = _np.diff(_np.append(starts, count))
+
+    lost_mask = _np.isnan(rtts)
+    lost = _np.add.reduceat(lost_mask.astype(_np.int64), starts)
+    received = sent - lost
+
+    replies = _np.where(lost_mask, 0.0, rtts)
+    result = {
+        'target_ids': target_ids[starts],
+        'start_ns': bucket_starts[starts] if bucket_starts is not None else timestamps[starts],
+        'first_ns': timestamps[starts],
+        'last_ns': timestamps[starts + sent - 1],
+        'sent': sent,
+        'lost': lost,
+        'loss': lost / _np.maximum(sent, 1),
+    }
+
+    with _np.errstate(invalid='ignore', divide='ignore'):
+        total = _np.add.reduceat(replies, starts)
+        mean = total / received
+        mean[received == 0] = _np.nan
+
+        # Two passes for the variance: sum the squared deviations from each group's mean.
+        deviations = _np.where(lost_mask, 0.0, rtts - mean[group_of])
+        variance = _np.add.reduceat(deviations * deviations, starts) / received
+
+        result['min'] = _np.fmin.reduceat(rtts, starts)
+        result['max'] = _np.fmax.reduceat(rtts, starts)
+        result['mean'] = mean
+        result['total'] = total
+        result['stdev'] = _np.sqrt(variance)
+
+    sorted_rtts = _sort_within_groups(rtts, lost_mask, group_of, groups)
+    has_replies = received > 0
+    last = _np.maximum(received - 1, 0)
+
+    for percentile, key in zip(percentiles, keys):
+        position = percentile / 100 * last
+        lower = _np.floor(position).astype(_np.int64)
+        upper = _np.minimum(lower + 1, last)
+        below = sorted_rtts[starts + lower]
+        above = sorted_rtts[starts + upper]
+        values = below + (above - below) * (position - lower)
+        result[key] = _np.where(has_replies, values, _np.nan)
+
+    # Runs of losses, per target in time order.
+    continues = _np.zeros(count, dtype=bool)
+    continues[1:] = lost_mask[:-1] & same_target
+    run_starts = _np.flatnonzero(lost_mask & ~continues)
+
+    carries_on = _np.zeros(count, dtype=bool)
+    carries_on[:-1] = lost_mask[1:] & same_target
+    run_ends = _np.flatnonzero(lost_mask & ~carries_on)
+
+    run_lengths = run_ends - run_starts + 1
+    run_groups = group_of[run_starts]
+
+    result['outages'] = _np.bincount(run_groups[run_lengths >= outage_length], minlength=groups)
+    longest = _np.zeros(groups, dtype=_np.int64)
+    _np.maximum.at(longest, run_groups, run_lengths)
+    result['longest_outage'] = longest
+
+    return BatchReport(result, list(targets), width, percentiles)
+
+
+def batch_report(
+        source,
+        target: Optional[str] = None,
+        start: Timestamp = None,
+        end: Timestamp = None,
+        width: Optional[int] = None,
+        percentiles: Sequence[float] = PERCENTILES,
+        outage_length: int = DEFAULT_OUTAGE_LENGTH
+) -> BatchReport:
+    """
+    Report on every target (or just `target`) in a source, in time buckets.
+
+    Args:
+        source:
+            See `load_columns()`.
+        target, start, end:
+            Only report on the samples of this target, sent in this range. See `iter_samples()`.
+        width (int or None):
+            The width of the time buckets in seconds (such as `MINUTE` or `HOUR`), aligned to the epoch. None for one
+            group per target.
+        percentiles (sequence of float):
+            The percentiles to compute, between 0 and 100.
+        outage_length (int):
+            The number of consecutive lost samples that counts as an outage.
+
+    Returns:
+        BatchReport:
+            The statistics per target and bucket.
+
+    Raises:
+        ImportError:
+            If NumPy is not installed.
+    """
+    columns, targets = load_columns(source, target, start, end)
+
+    return summarize(columns, targets, width, percentiles, outage_length)
+
+
+"""
+The MIT License (MIT)
+Copyright © 2023 Inspyre Softworks - https://inspyre.tech
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE."""
@@ -0,0 +1,623 @@
+"""
+Project: PingPing
+Author: Inspyre Softworks - https://inspyre.tech
+Created: 10/18/2026 @ 5:05 PM
+File:
+  Name: binlog.py
+  Filepath: ping_stat/storage
+
+An append-only binary log of probe results, for captures that run for weeks.
+
+A log file has three parts, all at fixed offsets:
+
+    - Header (64 bytes): magic, format version, the sizes of the parts below, the number of targets, the creation
+      time and the offset of the first record.
+    - Target dictionary: `max_targets` slots of `TARGET_SLOT.size` bytes. Each slot holds one UTF-8 target name, and
+      a target's id is the index of its slot.
+    - Records: `RECORD.size` bytes each, appended in arrival order. A record holds the send timestamp (ns since the
+      epoch), the RTT (NaN if there was no reply), the target id, the ICMP sequence number and the status.
+
+The offset of any record can be computed from its index, so there is nothing to parse on open.
+`BinaryLogReader` maps the file with `mmap`. A report over millions of samples then only pages in the records it
+reads. `BinaryLogWriter` batches appends in memory and writes each batch with a single `write()`.
+
+If the writer is interrupted mid-batch, the trailing partial record is ignored by readers and cut off by the next
+writer that opens the file.
+
+Usage:
+    from ping_stat.storage.binlog import BinaryLogReader, BinaryLogWriter
+
+    with BinaryLogWriter('capture.pslog') as log:
+        fleet.add_callback(log.add)
+        fleet.run(duration=3600)
+
+    with BinaryLogReader('capture.pslog') as log:
+        for sample in log:
+            ...
+"""
+import math
+import mmap
+import os
+import struct
+import threading
+from pathlib import Path
+from time import monotonic, time_ns
+from typing import Dict, Iterator, List, Optional, Union
+
+from ping_stat.models.samples import PingSample, STATUS_OK
+
+try:
+    import numpy as _np
+except ImportError:
+    _np = None
+
+
+MAGIC = b'PSTATLOG'
+VERSION = 1
+
+HEADER = struct.Struct('<8sHHHHIIqq')
+"""magic, version, header size, record size, slot size, max targets, target count, created (ns), data offset."""
+
+HEADER_SIZE = 64
+
+TARGET_SLOT = struct.Struct('<B63s')
+"""Name length, then the UTF-8 name padded with zeros."""
+
+RECORD = struct.Struct('<qdIHBx')
+"""timestamp (ns), RTT (NaN if lost), target id, sequence, status, padding to 24 bytes."""
+
+RECORD_FIELDS = (('timestamps', '<i8'), ('rtts', '<f8'), ('target_ids', '<u4'), ('sequences', '<u2'),
+                 ('statuses', 'u1'), ('_pad', 'V1'))
+"""`RECORD` as a NumPy structured dtype."""
+
+TARGET_COUNT_OFFSET = struct.calcsize('<8sHHHHI')
+
+DEFAULT_MAX_TARGETS = 4096
+
+READ_CHUNK = 4096
+"""Records unpacked per chunk when iterating."""
+
+SEEK_SLACK_NS = 60_000_000_000
+"""
+How far (in ns) a record's send time may be out of order. Records are appended as results arrive, so a probe that
+waits out its timeout is written after later probes that were answered quickly.
+"""
+
+_NAN = float('nan')
+
+
+class BinaryLogError(ValueError):
+    """Raised when a file is not a PingStat binary log, or was written with an incompatible layout."""
+
+
+class LogHeader:
+    """
+    The fixed header of a binary log.
+
+    Attributes:
+        version (int):
+            The format version.
+
+        record_size (int):
+            Bytes per record.
+
+        slot_size (int):
+            Bytes per target dictionary slot.
+
+        max_targets (int):
+            The number of slots in the target dictionary.
+
+        target_count (int):
+            The number of slots in use.
+
+        created_ns (int):
+            When the file was created, in ns since the epoch.
+
+        data_offset (int):
+            The offset of the first record.
+    """
+    __slots__ = ('version', 'record_size', 'slot_size', 'max_targets', 'target_count', 'created_ns', 'data_offset')
+
+    def __init__(self, version, record_size, slot_size, max_targets, target_count, created_ns, data_offset):
+        self.version = version
+        self.record_size = record_size
+        self.slot_size = slot_size
+        self.max_targets = max_targets
+        self.target_count = target_count
+        self.created_ns = created_ns
+        self.data_offset = data_offset
+
+    @classmethod
+    def new(cls, max_targets: int = DEFAULT_MAX_TARGETS) -> 'LogHeader':
+        return cls(
+            VERSION,
+            RECORD.size,
+            TARGET_SLOT.size,
+            max_targets,
+            0,
+            time_ns(),
+            HEADER_SIZE + max_targets * TARGET_SLOT.size
+        )
+
+    @classmethod
+    def unpack(cls, buffer) -> 'LogHeader':
+        """
+        Read and validate a header from the start of `buffer`.
+
+        Raises:
+            BinaryLogError:
+                If the buffer does not start with a compatible header.
+        """
+        if len(buffer) < HEADER_SIZE:
+            raise BinaryLogError('File is too short to be a PingStat binary log')
+
+        magic, version, header_size, record_size, slot_size, max_targets, target_count, created_ns, data_offset = \
+            HEADER.unpack_from(buffer)
+
+        if magic != MAGIC:
+            raise BinaryLogError('Not a PingStat binary log')
+
+        if version != VERSION or header_size != HEADER_SIZE:
+            raise BinaryLogError(f'Unsupported binary log version {version}')
+
+        if record_size != RECORD.size or slot_size != TARGET_SLOT.size:
+            raise BinaryLogError('Binary log was written with a different record layout')
+
+        return cls(version, record_size, slot_size, max_targets, target_count, created_ns, data_offset)
+
+    def pack(self) -> bytes:
+        return HEADER.pack(
+            MAGIC,
+            self.version,
+            HEADER_SIZE,
+            self.record_size,
+            self.slot_size,
+            self.max_targets,
+            self.target_count,
+            self.created_ns,
+            self.data_offset
+        ).ljust(HEADER_SIZE, b'\x00')
+
+
+def _read_targets(buffer, header: LogHeader) -> List[str]:
+    targets = []
+
+    for index in range(header.target_count):
+        length, name = TARGET_SLOT.unpack_from(buffer, HEADER_SIZE + index * TARGET_SLOT.size)
+        targets.append(name[:length].decode('utf-8'))
+
+    return targets
+
+
+class BinaryLogWriter:
+    """
+    Append probe results to a binary log, in batches.
+
+    Records are packed into an in-memory batch and written when the batch holds `batch_size` records, when
+    `flush_interval` seconds have passed since the last write (checked on each append), or on `flush()`/`close()`.
+    Appends are thread-safe.
+
+    Attributes:
+        path (Path):
+            The log file.
+
+        batch_size (int):
+            Records per write.
+
+        flush_interval (float):
+            The longest time (in seconds) a record waits in the batch, as long as appends keep coming.
+
+        fsync (bool):
+            Whether every flush also calls `os.fsync()`, so a power loss costs at most one batch.
+    """
+    from ping_stat.logging import add_child
+
+    __cls_log = add_child('PingPing.BinaryLogWriter')
+
+    def __init__(
+            self,
+            path: Union[str, Path],
+            max_targets: int = DEFAULT_MAX_TARGETS,
+            batch_size: int = 1024,
+            flush_interval: float = 1.0,
+            fsync: bool = False
+    ):
+        """
+        Open `path` for appending, creating it (with room for `max_targets` targets) if it does not exist.
+
+        Raises:
+            BinaryLogError:
+                If `path` exists but is not a compatible binary log.
+        """
+        if batch_size <= 0:
+            raise ValueError('"batch_size" must be positive')
+
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+
+        self.__lock = threading.Lock()
+        self.__batch = bytearray()
+        self.__pending = 0
+        self.__last_flush = monotonic()
+        self.__written = 0
+
+        if self.path.exists() and self.path.stat().st_size:
+            self.__file = open(self.path, 'r+b')
+
+            try:
+                self.__header = LogHeader.unpack(self.__file.read(HEADER_SIZE))
+            except BinaryLogError:
+                self.__file.close()
+                raise
+
+            self.__file.seek(0)
+            self.__ids = {
+                name: index
+                for index, name in enumerate(_read_targets(self.__file.read(self.__header.data_offset), self.__header))
+            }
+
+            # Cut off a partial record left by an interrupted write, so new records stay aligned.
+            size = self.__file.seek(0, os.SEEK_END)
+            records, extra = divmod(size - self.__header.data_offset, RECORD.size)
+            if extra:
+                self.__cls_log.warning(f'Dropping {extra} bytes of a partial record at the end of {self.path}')
+                self.__file.truncate(size - extra)
+
+            self.__written = records
+        else:
+            self.__file = open(self.path, 'w+b')
+            self.__header = LogHeader.new(max_targets)
+            self.__ids = {}
+
+            self.__file.write(self.__header.pack())
+            self.__file.write(bytes(self.__header.data_offset - HEADER_SIZE))
+            self.__file.flush()
+
+        self.__file.seek(0, os.SEEK_END)
+
+    @property
+    def closed(self) -> bool:
+        return self.__file.closed
+
+    @property
+    def records(self) -> int:
+        """
+        int:
+            The number of records in the file, including those still waiting in the batch.
+        """
+        return self.__written + self.__pending
+
+    @property
+    def targets(self) -> Dict[str, int]:
+        """
+        dict:
+            Target ids, keyed by target name.
+        """
+        return dict(self.__ids)
+
+    def add(self, sample: PingSample):
+        """
+        Append a `PingSample`. Suitable as a `PingFleet` or `Ping` callback.
+        """
+        self.append(sample.target, sample.timestamp_ns, sample.rtt, sample.status, sample.sequence)
+
+    def append(
+            self,
+            target: str,
+            timestamp_ns: int,
+            rtt: Optional[float],
+            status: int = STATUS_OK,
+            sequence: int = 0
+    ):
+        """
+        Append one record.
+
+        Raises:
+            BinaryLogError:
+                If `target` is new and the target dictionary is full.
+        """
+        with self.__lock:
+            target_id = self.__ids.get(target)
+            if target_id is None:
+                target_id = self.__register(target)
+
+            self.__batch += RECORD.pack(timestamp_ns, _NAN if rtt is None else rtt, target_id, sequence & 0xFFFF,
+                                        status)
+            self.__pending += 1
+
+            if self.__pending >= self.batch_size or monotonic() - self.__last_flush >= self.flush_interval:
+                self.__flush()
+
+    def flush(self):
+        """
+        Write the current batch to the file.
+        """
+        with self.__lock:
+            self.__flush()
+
+    def close(self):
+        """
+        Flush and close the file.
+        """
+        with self.__lock:
+            if self.__file.closed:
+                return
+
+            self.__flush()
+            self.__file.close()
+
+    def __register(self, target):
+        # Caller holds the lock.
+        encoded = target.encode('utf-8')
+        if len(encoded) > TARGET_SLOT.size - 1:
+            raise BinaryLogError(f'Target name is longer than {TARGET_SLOT.size - 1} bytes: {target}')
+
+        if self.__header.target_count >= self.__header.max_targets:
+            raise BinaryLogError(f'The target dictionary of {self.path} is full ({self.__header.max_targets})')
+
+        target_id = self.__header.target_count
+
+        # The slot is written before any record that refers to it, then the count that makes it visible.
+        self.__file.seek(HEADER_SIZE + target_id * TARGET_SLOT.size)
+        self.__file.write(TARGET_SLOT.pack(len(encoded), encoded))
+
+        self.__header.target_count += 1
+        self.__file.seek(TARGET_COUNT_OFFSET)
+        self.__file.write(struct.pack('<I', self.__header.target_count))
+        self.__file.flush()
+        self.__file.seek(0, os.SEEK_END)
+
+        self.__ids[target] = target_id
+
+        return target_id
+
+    def __flush(self):
+        # Caller holds the lock.
+        self.__last_flush = monotonic()
+
+        if not self.__batch:
+            return
+
+        self.__file.write(self.__batch)
+        self.__file.flush()
+
+        if self.fsync:
+            os.fsync(self.__file.fileno())
+
+        self.__written += self.__pending
+        self.__batch = bytearray()
+        self.__pending = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __repr__(self):
+        return f'<BinaryLogWriter: {self.path}, {self.records} records, {len(self.__ids)} targets>'
+
+
+class BinaryLogReader:
+    """
+    Read a binary log through a read-only memory map.
+
+    Records are indexed in file order. Indexing and iteration unpack records on demand, so only the pages that
+    are touched are read from disk.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        """
+        Raises:
+            BinaryLogError:
+                If `path` is not a compatible binary log.
+        """
+        self.path = Path(path)
+
+        self.__file = open(self.path, 'rb')
+        self.__map = None
+        self.__header = None
+        self.__targets = []
+        self.__count = 0
+
+        try:
+            self.refresh()
+        except Exception:
+            self.__file.close()
+            raise
+
+    @property
+    def created_ns(self) -> int:
+        return self.__header.created_ns
+
+    @property
+    def header(self) -> LogHeader:
+        return self.__header
+
+    @property
+    def targets(self) -> List[str]:
+        """
+        list:
+            Target names, indexed by target id.
+        """
+        return list(self.__targets)
+
+    def refresh(self):
+        """
+        Re-map the file to pick up records and targets appended since it was opened.
+        """
+        size = os.fstat(self.__file.fileno()).st_size
+
+        if self.__map is not None:
+            self.__map.close()
+
+        self.__map = mmap.mmap(self.__file.fileno(), size, access=mmap.ACCESS_READ)
+        self.__header = LogHeader.unpack(self.__map)
+        self.__targets = _read_targets(self.__map, self.__header)
+        self.__count = max(0, (size - self.__header.data_offset) // RECORD.size)
+
+    def target_id(self, target: str) -> Optional[int]:
+        """
+        The id of `target`, or None if it is not in the log.
+        """
+        try:
+            return self.__targets.index(target)
+        except ValueError:
+            return None
+
+    def record(self, index: int) -> tuple:
+        """
+        The raw record at `index`: (timestamp_ns, rtt, target_id, sequence, status), with NaN for a lost RTT.
+        """
+        if index < 0:
+            index += self.__count
+
+        if not 0 <= index < self.__count:
+            raise IndexError('record index out of range')
+
+        return RECORD.unpack_from(self.__map, self.__header.data_offset + index * RECORD.size)
+
+    def records(self, start: int = 0, stop: Optional[int] = None) -> Iterator[tuple]:
+        """
+        Iterate over raw records from `start` to `stop` (see `record()`).
+        """
+        stop = self.__count if stop is None else min(stop, self.__count)
+        offset = self.__header.data_offset
+
+        # Unpack a bounded chunk at a time: slicing the map copies, and only the chunk's pages get touched.
+        for chunk_start in range(max(0, start), stop, READ_CHUNK):
+            chunk_stop = min(stop, chunk_start + READ_CHUNK)
+            yield from RECORD.iter_unpack(
+                self.__map[offset + chunk_start * RECORD.size:offset + chunk_stop * RECORD.size]
+            )
+
+    def seek(self, timestamp_ns: int) -> int:
+        """
+        Binary search for the first record sent at or after `timestamp_ns`.
+
+        Records are in arrival order, which is send order give or take `SEEK_SLACK_NS`, so the result can be off by
+        that much. `samples()` allows for this.
+
+        Returns:
+            int:
+                A record index, or `len(self)` if every record was sent earlier.
+        """
+        low, high = 0, self.__count
+        offset = self.__header.data_offset
+
+        while low < high:
+            middle = (low + high) // 2
+
+            if RECORD.unpack_from(self.__map, offset + middle * RECORD.size)[0] < timestamp_ns:
+                low = middle + 1
+            else:
+                high = middle
+
+        return low
+
+    def samples(
+            self,
+            target: Optional[str] = None,
+            start_ns: Optional[int] = None,
+            end_ns: Optional[int] = None
+    ) -> Iterator[PingSample]:
+        """
+        Iterate over the samples for `target` (or every target) sent from `start_ns` (inclusive) to `end_ns`
+        (exclusive), in file order.
+
+        The scan starts at a binary search for `start_ns` and stops once records are well past `end_ns`, so only that
+        part of the file is read.
+        """
+        target_id = None
+        if target is not None:
+            target_id = self.target_id(target)
+            if target_id is None:
+                return
+
+        start = 0 if start_ns is None else self.seek(start_ns - SEEK_SLACK_NS)
+        stop_ns = None if end_ns is None else end_ns + SEEK_SLACK_NS
+        targets = self.__targets
+
+        for timestamp_ns, rtt, record_target, sequence, status in self.records(start):
+            if stop_ns is not None and timestamp_ns >= stop_ns:
+                break
+
+            if target_id is not None and record_target != target_id:
+                continue
+
+            if start_ns is not None and timestamp_ns < start_ns:
+                continue
+
+            if end_ns is not None and timestamp_ns >= end_ns:
+                continue
+
+            yield PingSample(timestamp_ns, targets[record_target], sequence, None if math.isnan(rtt) else rtt, status)
+
+    def to_numpy(self) -> Dict[str, 'numpy.ndarray']:
+        """
+        Every record as NumPy arrays that look straight into the memory map, without copying or unpacking.
+
+        The arrays are strided views: timestamps as int64 ns, RTTs as float64 (NaN if lost), target ids as uint32
+        (index into `targets`), sequence numbers as uint16 and statuses as uint8.
+
+        Note:
+            The arrays keep the map alive. Drop them before `close()` or `refresh()`, which otherwise raise
+            BufferError.
+
+        Raises:
+            ImportError:
+                If NumPy is not installed.
+        """
+        if _np is None:
+            raise ImportError('NumPy is required for to_numpy(). Install it with "pip install ping_stat[numpy]".')
+
+        records = _np.frombuffer(
+            self.__map,
+            dtype=_np.dtype(list(RECORD_FIELDS)),
+            count=self.__count,
+            offset=self.__header.data_offset
+        )
+
+        return {name: records[name] for name, _ in RECORD_FIELDS if not name.startswith('_')}
+
+    def close(self):
+        if self.__map is not None:
+            self.__map.close()
+            self.__map = None
+
+        self.__file.close()
+
+    def __getitem__(self, index: int) -> PingSample:
+        timestamp_ns, rtt, target_id, sequence, status = self.record(index)
+
+        return PingSample(timestamp_ns, self.__targets[target_id], sequence, None if math.isnan(rtt) else rtt, status)
+
+    def __iter__(self) -> Iterator[PingSample]:
+        targets = self.__targets
+
+        for timestamp_ns, rtt, target_id, sequence, status in self.records():
+            yield PingSample(timestamp_ns, targets[target_id], sequence, None if math.isnan(rtt) else rtt, status)
+
+    def __len__(self):
+        return self.__count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __repr__(self):
+        return f'<BinaryLogReader: {self.path}, {self.__count} records, {len(self.__targets)} targets>'
+
+
+"""
+The MIT License (MIT)
+Copyright © 2023 Inspyre Softworks - https://inspyre.tech
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE."""
@@ -0,0 +1,709 @@
+"""
+Project: PingPing
+Author: Inspyre Softworks - https://inspyre.tech
+Created: 10/18/2026 @ 6:55 PM
+File:
+  Name: blocks.py
+  Filepath: ping_stat/storage
+
+Compressed, block-based storage of probe results, for keeping months or years of samples on a small disk.
+
+Samples from a monitor are very regular: the send times are one interval apart and the round-trip times change
+little between probes. Each block holds up to `block_size` samples for one target and encodes them in the style of
+Facebook's Gorilla:
+
+    - Send times are stored at microsecond precision as the difference between consecutive deltas
+      (delta-of-delta). On a steady interval that is a single 0 bit, and scheduling jitter usually fits in 9 bits.
+    - Round-trip times are XORed with the previous one, and only the bits that differ are stored.
+    - Sequence numbers cost 1 bit when they go up by one.
+    - Loss is a bitmap with one bit per sample, and lost samples store no round-trip time. Statuses other than
+      "OK" for a reply and "timeout" for a loss are kept in a short exception list.
+
+A block starts with a fixed header holding the target, the sample count, the loss count, the time range and a CRC of
+the rest. This means a block can be decoded without reading any other block, and a range scan reads only the
+headers of the blocks it skips. `BlockReader` builds its index of blocks from those headers when it opens a file.
+
+If a write is interrupted, the torn block at the end fails its length or CRC check. Readers stop before it, and
+the next `BlockWriter` cuts it off.
+
+Usage:
+    from ping_stat.storage.blocks import BlockReader, BlockWriter
+
+    with BlockWriter('archive.psblk') as archive:
+        ping.add_callback(archive.add)
+        ...
+
+    with BlockReader('archive.psblk') as archive:
+        for sample in archive.samples('inspyre.tech', start_ns=..., end_ns=...):
+            ...
+"""
+import mmap
+import os
+import struct
+import threading
+import zlib
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Union
+
+from ping_stat.models.samples import PingSample, STATUS_OK, STATUS_TIMEOUT
+
+
+MAGIC = b'PSBK'
+VERSION = 1
+
+BLOCK_HEADER = struct.Struct('<4sBBHIIqqqII')
+"""
+magic, version, target name length, reserved, sample count, lost count, first send time (ns), earliest send time
+(ns), latest send time (ns), body size, CRC32 of the body. The target name and then the body follow.
+"""
+
+EXCEPTION = struct.Struct('<IB')
+"""The index of a sample, and its status."""
+
+TIME_UNIT_NS = 1_000
+"""The precision send times are stored at: one microsecond."""
+
+DEFAULT_BLOCK_SIZE = 3600
+"""Samples per block: an hour of one-second probes."""
+
+DOD_CLASSES = ((0b10, 2, 7), (0b110, 3, 12), (0b1110, 4, 20))
+"""(prefix, prefix length, value bits) for delta-of-delta values. Anything larger gets prefix 0b1111 and 64 bits."""
+
+_DOUBLE = struct.Struct('<d')
+_UINT64 = struct.Struct('<Q')
+
+
+class BlockError(ValueError):
+    """Raised when data is not a valid PingStat block."""
+
+
+class BlockInfo(NamedTuple):
+    """
+    Where a block is in a file and what it holds, read from its header.
+    """
+    target: str
+    count: int
+    lost: int
+    first_ns: int
+    min_ns: int
+    max_ns: int
+    offset: int
+    size: int
+
+    def overlaps(self, start_ns: Optional[int] = None, end_ns: Optional[int] = None) -> bool:
+        """
+        Whether any sample in the block could fall between `start_ns` (inclusive) and `end_ns` (exclusive).
+        """
+        return (start_ns is None or self.max_ns >= start_ns) and (end_ns is None or self.min_ns < end_ns)
+
+
+class _BitWriter:
+    __slots__ = ('buffer', 'accumulator', 'bits')
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.accumulator = 0
+        self.bits = 0
+
+    def write(self, value, width):
+        self.accumulator = (self.accumulator << width) | (value & ((1 << width) - 1))
+        self.bits += width
+
+        while self.bits >= 8:
+            self.bits -= 8
+            self.buffer.append((self.accumulator >> self.bits) & 0xFF)
+
+        self.accumulator &= (1 << self.bits) - 1
+
+    def getvalue(self) -> bytes:
+        if self.bits:
+            return bytes(self.buffer) + bytes(((self.accumulator << (8 - self.bits)) & 0xFF,))
+
+        return bytes(self.buffer)
+
+
+class _BitReader:
+    __slots__ = ('data', 'position', 'accumulator', 'bits')
+
+    def __init__(self, data):
+        self.data = data
+        self.position = 0
+        self.accumulator = 0
+        self.bits = 0
+
+    def read(self, width):
+        while self.bits < width:
+            if self.position >= len(self.data):
+                raise BlockError('Block body ended early')
+
+            self.accumulator = (self.accumulator << 8) | self.data[self.position]
+            self.position += 1
+            self.bits += 8
+
+        self.bits -= width
+        value = self.accumulator >> self.bits
+        self.accumulator &= (1 << self.bits) - 1
+
+        return value
+
+
+def _write_dod(writer, value):
+    for prefix, prefix_bits, value_bits in DOD_CLASSES:
+        limit = 1 << (value_bits - 1)
+        if -limit <= value < limit:
+            writer.write(prefix, prefix_bits)
+            writer.write(value, value_bits)
+            return
+
+    writer.write(0b1111, 4)
+    writer.write(value, 64)
+
+
+def _read_dod(reader):
+    if not reader.read(1):
+        return 0
+
+    # Each further 1 bit moves up a class, and a 0 bit ends the prefix.
+    for _, _, value_bits in DOD_CLASSES:
+        if not reader.read(1):
+            break
+    else:
+        value_bits = 64
+
+    value = reader.read(value_bits)
+
+    return value - (1 << value_bits) if value >= 1 << (value_bits - 1) else value
+
+
+def encode_block(samples: List[PingSample], target: Optional[str] = None) -> bytes:
+    """
+    Encode samples for one target as a single block.
+
+    Args:
+        samples (list):
+            The samples, usually oldest first. Out-of-order send times are allowed but cost more bits.
+        target (str or None):
+            The target to record in the header. By default, the target of the first sample.
+
+    Returns:
+        bytes:
+            The block, header included.
+
+    Raises:
+        BlockError:
+            If there are no samples, or they belong to more than one target.
+    """
+    if not samples:
+        raise BlockError('A block needs at least one sample')
+
+    target = samples[0].target if target is None else target
+    encoded_target = target.encode('utf-8')
+
+    if len(encoded_target) > 255:
+        raise BlockError(f'Target name is longer than 255 bytes: {target}')
+
+    count = len(samples)
+    bitmap = bytearray((count + 7) // 8)
+    exceptions = bytearray()
+    writer = _BitWriter()
+
+    first_ns = samples[0].timestamp_ns
+    previous_time = 0
+    previous_delta = 0
+    previous_sequence = None
+    previous_bits = 0
+    previous_leading = previous_trailing = None
+    lost = 0
+
+    for index, sample in enumerate(samples):
+        if sample.target != target:
+            raise BlockError(f'Sample for {sample.target} in a block for {target}')
+
+        received = sample.rtt is not None
+
+        if not received:
+            bitmap[index >> 3] |= 1 << (index & 7)
+            lost += 1
+
+        if sample.status != (STATUS_OK if received else STATUS_TIMEOUT):
+            exceptions += EXCEPTION.pack(index, sample.status)
+
+        # Send time: delta-of-delta in microseconds since the first sample.
+        time = (sample.timestamp_ns - first_ns) // TIME_UNIT_NS
+        delta = time - previous_time
+        _write_dod(writer, delta - previous_delta)
+        previous_time, previous_delta = time, delta
+
+        # Sequence: 0 for "previous + 1", else 1 and the number.
+        sequence = sample.sequence & 0xFFFF
+        if previous_sequence is not None and sequence == (previous_sequence + 1) & 0xFFFF:
+            writer.write(0, 1)
+        else:
+            writer.write(1, 1)
+            writer.write(sequence, 16)
+        previous_sequence = sequence
+
+        if not received:
+            continue
+
+        # Round-trip time: XOR with the previous one.
+        bits = _UINT64.unpack(_DOUBLE.pack(sample.rtt))[0]
+        xor = bits ^ previous_bits
+        previous_bits = bits
+
+        if not xor:
+            writer.write(0, 1)
+            continue
+
+        leading = min(64 - xor.bit_length(), 31)
+        trailing = (xor & -xor).bit_length() - 1
+
+        if previous_leading is not None and leading >= previous_leading and trailing >= previous_trailing:
+            writer.write(0b10, 2)
+            writer.write(xor >> previous_trailing, 64 - previous_leading - previous_trailing)
+        else:
+            meaningful = 64 - leading - trailing
+            writer.write(0b11, 2)
+            writer.write(leading, 5)
+            writer.write(meaningful - 1, 6)
+            writer.write(xor >> trailing, meaningful)
+            previous_leading, previous_trailing = leading, trailing
+
+    body = struct.pack('<I', len(exceptions) // EXCEPTION.size) + bytes(bitmap) + bytes(exceptions) + \
+        writer.getvalue()
+    timestamps = [sample.timestamp_ns for sample in samples]
+
+    header = BLOCK_HEADER.pack(
+        MAGIC,
+        VERSION,
+        len(encoded_target),
+        0,
+        count,
+        lost,
+        first_ns,
+        min(timestamps),
+        max(timestamps),
+        len(body),
+        zlib.crc32(body)
+    )
+
+    return header + encoded_target + body
+
+
+def read_block_info(buffer, offset: int = 0) -> BlockInfo:
+    """
+    Read and check the header of the block at `offset`, without decoding the samples.
+
+    Raises:
+        BlockError:
+            If there is no complete, valid block at `offset`.
+    """
+    if len(buffer) - offset < BLOCK_HEADER.size:
+        raise BlockError('Not enough data for a block header')
+
+    magic, version, name_length, _, count, lost, first_ns, min_ns, max_ns, body_size, crc = \
+        BLOCK_HEADER.unpack_from(buffer, offset)
+
+    if magic != MAGIC:
+        raise BlockError('Not a PingStat block')
+
+    if version != VERSION:
+        raise BlockError(f'Unsupported block version {version}')
+
+    size = BLOCK_HEADER.size + name_length + body_size
+    if len(buffer) - offset < size:
+        raise BlockError('Block is truncated')
+
+    body_start = offset + BLOCK_HEADER.size + name_length
+    if zlib.crc32(buffer[body_start:offset + size]) != crc:
+        raise BlockError('Block failed its CRC check')
+
+    target = bytes(buffer[offset + BLOCK_HEADER.size:body_start]).decode('utf-8')
+
+    return BlockInfo(target, count, lost, first_ns, min_ns, max_ns, offset, size)
+
+
+def decode_block(buffer, offset: int = 0) -> List[PingSample]:
+    """
+    Decode the block at `offset` in `buffer`.
+
+    Returns:
+        list:
+            The samples, in the order they were encoded. Send times are rounded down to the microsecond, except the
+            first, which is exact.
+
+    Raises:
+        BlockError:
+            If there is no complete, valid block at `offset`.
+    """
+    info = read_block_info(buffer, offset)
+    name_length = BLOCK_HEADER.unpack_from(buffer, offset)[2]
+    body = memoryview(buffer)[offset + BLOCK_HEADER.size + name_length:offset + info.size]
+
+    exception_count = struct.unpack_from('<I', body)[0]
+    bitmap_start = 4
+    exceptions_start = bitmap_start + (info.count + 7) // 8
+    stream_start = exceptions_start + exception_count * EXCEPTION.size
+
+    bitmap = body[bitmap_start:exceptions_start]
+    statuses = dict(EXCEPTION.iter_unpack(body[exceptions_start:stream_start]))
+    reader = _BitReader(body[stream_start:])
+
+    samples = []
+    time = 0
+    delta = 0
+    sequence = 0
+    bits = 0
+    leading = trailing = 0
+
+    for index in range(info.count):
+        delta += _read_dod(reader)
+        time += delta
+
+        if reader.read(1):
+            sequence = reader.read(16)
+        else:
+            sequence = (sequence + 1) & 0xFFFF
+
+        if bitmap[index >> 3] & (1 << (index & 7)):
+            rtt = None
+            status = STATUS_TIMEOUT
+        else:
+            if reader.read(1):
+                if reader.read(1):
+                    leading = reader.read(5)
+                    meaningful = reader.read(6) + 1
+                    trailing = 64 - leading - meaningful
+
+                bits ^= reader.read(64 - leading - trailing) << trailing
+
+            rtt = _DOUBLE.unpack(_UINT64.pack(bits))[0]
+            status = STATUS_OK
+
+        timestamp_ns = info.first_ns if index == 0 else info.first_ns + time * TIME_UNIT_NS
+
+        samples.append(PingSample(timestamp_ns, info.target, sequence, rtt, statuses.get(index, status)))
+
+    return samples
+
+
+class BlockWriter:
+    """
+    Buffer samples per target and append them to a file as compressed blocks.
+
+    A target's block is written when it holds `block_size` samples, and every partial block is written on `flush()`
+    and `close()`. Appends are thread-safe.
+
+    Attributes:
+        path (Path):
+            The archive file.
+
+        block_size (int):
+            Samples per block.
+
+        fsync (bool):
+            Whether every block write also calls `os.fsync()`.
+    """
+    from ping_stat.logging import add_child
+
+    __cls_log = add_child('PingPing.BlockWriter')
+
+    def __init__(self, path: Union[str, Path], block_size: int = DEFAULT_BLOCK_SIZE, fsync: bool = False):
+        """
+        Open `path` for appending, creating it if it does not exist.
+
+        Raises:
+            BlockError:
+                If `path` exists but does not start with a valid block.
+        """
+        if not 0 < block_size <= 0xFFFFFFFF:
+            raise ValueError('"block_size" must be positive')
+
+        self.path = Path(path)
+        self.block_size = block_size
+        self.fsync = fsync
+
+        self.__lock = threading.Lock()
+        self.__pending = {}
+        self.__blocks = 0
+
+        self.__file = open(self.path, 'a+b')
+
+        try:
+            end = self.__recover()
+        except BlockError:
+            self.__file.close()
+            raise
+
+        self.__file.seek(end)
+
+    @property
+    def blocks(self) -> int:
+        """
+        int:
+            The number of blocks in the file.
+        """
+        return self.__blocks
+
+    @property
+    def closed(self) -> bool:
+        return self.__file.closed
+
+    @property
+    def pending(self) -> int:
+        """
+        int:
+            The number of samples waiting for their block to fill.
+        """
+        return sum(len(samples) for samples in self.__pending.values())
+
+    def add(self, sample: PingSample):
+        """
+        Queue a `PingSample`, writing its target's block once it is full. Suitable as a `Ping` or `PingFleet`
+        callback.
+        """
+        with self.__lock:
+            samples = self.__pending.setdefault(sample.target, [])
+            samples.append(sample)
+
+            if len(samples) >= self.block_size:
+                self.__write(sample.target)
+
+    def extend(self, samples: Iterable[PingSample]):
+        """
+        Queue many samples, such as a `Ping.history`.
+        """
+        for sample in samples:
+            self.add(sample)
+
+    def flush(self):
+        """
+        Write every partial block.
+        """
+        with self.__lock:
+            for target in list(self.__pending):
+                self.__write(target)
+
+    def close(self):
+        """
+        Write every partial block and close the file.
+        """
+        with self.__lock:
+            if self.__file.closed:
+                return
+
+            for target in list(self.__pending):
+                self.__write(target)
+
+            self.__file.close()
+
+    def __recover(self):
+        # Find the end of the last valid block, and cut off anything after it.
+        size = self.__file.seek(0, os.SEEK_END)
+        if not size:
+            return 0
+
+        with mmap.mmap(self.__file.fileno(), size, access=mmap.ACCESS_READ) as view:
+            offset = 0
+
+            while offset < size:
+                try:
+                    info = read_block_info(view, offset)
+                except BlockError:
+                    if not offset:
+                        raise
+
+                    break
+
+                offset += info.size
+                self.__blocks += 1
+
+        if offset < size:
+            self.__cls_log.warning(f'Dropping {size - offset} bytes of a torn block at the end of {self.path}')
+            self.__file.truncate(offset)
+
+        return offset
+
+    def __write(self, target):
+        # Caller holds the lock.
+        samples = self.__pending.pop(target, None)
+        if not samples:
+            return
+
+        self.__file.write(encode_block(samples, target))
+        self.__file.flush()
+
+        if self.fsync:
+            os.fsync(self.__file.fileno())
+
+        self.__blocks += 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __repr__(self):
+        return f'<BlockWriter: {self.path}, {self.__blocks} blocks, {self.pending} samples pending>'
+
+
+class BlockReader:
+    """
+    Read a block archive through a read-only memory map.
+
+    The block index is built from the block headers when the file is opened (and on `refresh()`), so range scans
+    decode only the blocks that overlap the range.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        """
+        Raises:
+            BlockError:
+                If `path` does not start with a valid block.
+        """
+        self.path = Path(path)
+
+        self.__file = open(self.path, 'rb')
+        self.__map = None
+        self.__index = []
+
+        try:
+            self.refresh()
+        except Exception:
+            self.__file.close()
+            raise
+
+    @property
+    def index(self) -> List[BlockInfo]:
+        """
+        list:
+            A `BlockInfo` for every block, in file order.
+        """
+        return list(self.__index)
+
+    @property
+    def targets(self) -> List[str]:
+        """
+        list:
+            Every target with at least one block, in order of first appearance.
+        """
+        return list(dict.fromkeys(info.target for info in self.__index))
+
+    def refresh(self):
+        """
+        Re-map the file and index blocks appended since it was opened.
+        """
+        size = os.fstat(self.__file.fileno()).st_size
+
+        if self.__map is not None:
+            self.__map.close()
+            self.__map = None
+
+        if not size:
+            return
+
+        self.__map = mmap.mmap(self.__file.fileno(), size, access=mmap.ACCESS_READ)
+        offset = self.__index[-1].offset + self.__index[-1].size if self.__index else 0
+
+        while offset < size:
+            try:
+                info = read_block_info(self.__map, offset)
+            except BlockError:
+                if not offset:
+                    raise
+
+                # A torn block from an interrupted write.
+                break
+
+            self.__index.append(info)
+            offset += info.size
+
+    def blocks(
+            self,
+            target: Optional[str] = None,
+            start_ns: Optional[int] = None,
+            end_ns: Optional[int] = None
+    ) -> List[BlockInfo]:
+        """
+        The blocks that could hold samples for `target` (or any target) in a range, in file order.
+        """
+        return [
+            info for info in self.__index
+            if (target is None or info.target == target) and info.overlaps(start_ns, end_ns)
+        ]
+
+    def read(self, info: BlockInfo) -> List[PingSample]:
+        """
+        Decode one block.
+        """
+        return decode_block(self.__map, info.offset)
+
+    def samples(
+            self,
+            target: Optional[str] = None,
+            start_ns: Optional[int] = None,
+            end_ns: Optional[int] = None
+    ) -> Iterator[PingSample]:
+        """
+        Iterate over the samples for `target` (or every target) from `start_ns` (inclusive) to `end_ns` (exclusive),
+        a block at a time. Samples come in file order: by block, then in the order they were recorded.
+        """
+        for info in self.blocks(target, start_ns, end_ns):
+            for sample in self.read(info):
+                if start_ns is not None and sample.timestamp_ns < start_ns:
+                    continue
+
+                if end_ns is not None and sample.timestamp_ns >= end_ns:
+                    continue
+
+                yield sample
+
+    def summary(self, target: Optional[str] = None) -> Dict[str, dict]:
+        """
+        Sample and loss counts per target, read from the block headers alone.
+        """
+        summary = {}
+
+        for info in self.blocks(target):
+            entry = summary.setdefault(info.target, {'blocks': 0, 'samples': 0, 'lost': 0, 'first_ns': info.min_ns,
+                                                     'last_ns': info.max_ns})
+            entry['blocks'] += 1
+            entry['samples'] += info.count
+            entry['lost'] += info.lost
+            entry['first_ns'] = min(entry['first_ns'], info.min_ns)
+            entry['last_ns'] = max(entry['last_ns'], info.max_ns)
+
+        return summary
+
+    def close(self):
+        if self.__map is not None:
+            self.__map.close()
+            self.__map = None
+
+        self.__file.close()
+
+    def __iter__(self) -> Iterator[PingSample]:
+        return self.samples()
+
+    def __len__(self):
+        return sum(info.count for info in self.__index)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __repr__(self):
+        return f'<BlockReader: {self.path}, {len(self.__index)} blocks, {len(self)} samples>'
+
+
+"""
+The MIT License (MIT)
+Copyright © 2023 Inspyre Softworks - https://inspyre.tech
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE."""
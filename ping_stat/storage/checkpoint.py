@@ -0,0 +1,394 @@
+"""
+Project: PingPing
+Author: Inspyre Softworks - https://inspyre.tech
+Created: 10/18/2026 @ 7:35 PM
+File:
+  Name: checkpoint.py
+  Filepath: ping_stat/storage
+
+Crash-safe state for a `Ping`, so a monitor can pick up where it left off after a restart.
+
+Two files are kept per target in a state directory:
+
+    - A journal (`<target>.journal`): a binary log (see `ping_stat.storage.binlog`) that every recorded sample is
+      appended to. It is the write-ahead log.
+    - A checkpoint (`<target>.ckpt`): a snapshot of the derived state, written every `interval` seconds. This is the
+      `history` window as raw column bytes, the rollup buckets, the running statistics, the jitter and loss-burst
+      statistics, the outage and latency-shift detector's baseline and the live monitor's running average. It also
+      records how far into the journal the snapshot reaches.
+
+After each checkpoint the journal is started afresh, so it never holds more than about one interval of samples. On
+resume, the checkpoint is loaded with a few bulk copies, and only the journal tail is replayed. Restart cost
+therefore does not grow with the length of the run.
+
+A checkpoint is written to a temporary file and renamed into place, so a crash leaves either the old checkpoint or
+the new one, never a mix.
+
+Usage:
+    from ping_stat.storage.checkpoint import Checkpointer
+
+    checkpointer = Checkpointer(ping, '~/.ping-stat')
+    checkpointer.resume()
+    ping.add_callback(checkpointer.add)
+    ping.start()
+    ...
+    checkpointer.close()
+"""
+import json
+import math
+import os
+import re
+import struct
+import threading
+from array import array
+from pathlib import Path
+from time import monotonic, time_ns
+from typing import Union
+
+from ping_stat.models.rollups import Bucket, HISTOGRAM_BINS
+from ping_stat.models.samples import PingSample
+from ping_stat.storage.binlog import BinaryLogReader, BinaryLogWriter
+
+
+MAGIC = b'PSTATCKP'
+VERSION = 1
+
+PREAMBLE = struct.Struct('<8sHI')
+"""magic, version, length of the JSON metadata that follows. The binary sections follow the metadata."""
+
+BUCKET = struct.Struct(f'<qIIdddd{4 * HISTOGRAM_BINS}s')
+"""start (ns), count, lost, min, max (NaN if unset), total, total of squares, histogram."""
+
+HISTORY_COLUMNS = (('timestamps', 'q'), ('rtts', 'd'), ('statuses', 'B'), ('sequences', 'H'))
+
+DEFAULT_INTERVAL = 60.0
+"""Seconds between checkpoints."""
+
+_NAN = float('nan')
+
+
+class CheckpointError(ValueError):
+    """Raised when a checkpoint file is not valid."""
+
+
+def _state_name(target: str) -> str:
+    # Keep file names portable: anything but letters, digits, dots and dashes becomes an underscore.
+    return re.sub(r'[^A-Za-z0-9.-]', '_', target)
+
+
+def _pack_bucket(bucket: Bucket) -> bytes:
+    return BUCKET.pack(
+        bucket.start_ns,
+        bucket.count,
+        bucket.lost,
+        _NAN if bucket.min is None else bucket.min,
+        _NAN if bucket.max is None else bucket.max,
+        bucket.total,
+        bucket.total_sq,
+        bucket.histogram.tobytes()
+    )
+
+
+def _unpack_bucket(fields) -> Bucket:
+    start_ns, count, lost, minimum, maximum, total, total_sq, histogram = fields
+
+    bucket = Bucket(start_ns)
+    bucket.count, bucket.lost, bucket.total, bucket.total_sq = count, lost, total, total_sq
+    bucket.min = None if math.isnan(minimum) else minimum
+    bucket.max = None if math.isnan(maximum) else maximum
+    bucket.histogram = array('I', histogram)
+
+    return bucket
+
+
+class Checkpointer:
+    """
+    Journal a `Ping`'s samples and checkpoint its derived state, so `resume()` can restore both after a restart.
+
+    `add()` is meant to be the Ping's callback. It appends each sample to the journal and writes a checkpoint once
+    `interval` seconds have passed since the last. Because it runs right after `Ping.record()` updates `history`, the
+    snapshot and the journal position always agree.
+
+    Attributes:
+        ping (Ping):
+            The Ping whose state is kept.
+
+        directory (Path):
+            Where the journal and checkpoint files live.
+
+        interval (float):
+            Seconds between checkpoints.
+
+        fsync (bool):
+            Whether journal writes and checkpoints are synced to disk, so they survive a power loss or reboot.
+    """
+    from ping_stat.logging import add_child
+
+    __cls_log = add_child('PingPing.Checkpointer')
+
+    def __init__(
+            self,
+            ping,
+            directory: Union[str, Path],
+            interval: float = DEFAULT_INTERVAL,
+            fsync: bool = True
+    ):
+        if interval <= 0:
+            raise ValueError('"interval" must be positive')
+
+        self.ping = ping
+        self.directory = Path(directory).expanduser()
+        self.interval = interval
+        self.fsync = fsync
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        name = _state_name(ping.target)
+        self.journal_path = self.directory / f'{name}.journal'
+        self.checkpoint_path = self.directory / f'{name}.ckpt'
+
+        self.__lock = threading.Lock()
+        self.__journal = None
+        self.__next_checkpoint = monotonic() + interval
+        self.__checkpoints = 0
+
+    @property
+    def checkpoints(self) -> int:
+        """
+        int:
+            The number of checkpoints written since this object was created.
+        """
+        return self.__checkpoints
+
+    def resume(self) -> int:
+        """
+        Restore the Ping's state from the last checkpoint and the journal written after it.
+
+        Call this before the Ping starts. Replayed samples are not handed to the Ping's callbacks.
+
+        Returns:
+            int:
+                The number of samples replayed from the journal.
+
+        Raises:
+            CheckpointError:
+                If the checkpoint exists but cannot be read.
+        """
+        journal_created_ns = None
+        journal_records = 0
+
+        if self.checkpoint_path.exists():
+            meta = self.__load()
+            journal_created_ns = meta['journal']['created_ns']
+            journal_records = meta['journal']['records']
+
+        replayed = 0
+
+        if self.journal_path.exists() and self.journal_path.stat().st_size:
+            with BinaryLogReader(self.journal_path) as journal:
+                # A journal started after the checkpoint was taken is replayed from the beginning.
+                start = journal_records if journal.created_ns == journal_created_ns else 0
+                target_id = journal.target_id(self.ping.target)
+
+                for timestamp_ns, rtt, record_target, sequence, status in journal.records(start):
+                    if record_target != target_id:
+                        continue
+
+                    self.ping.record(
+                        PingSample(timestamp_ns, self.ping.target, sequence, None if math.isnan(rtt) else rtt, status),
+                        notify=False
+                    )
+                    replayed += 1
+
+        monitor = getattr(self.ping, 'ping_monitor', None)
+        if monitor is not None:
+            # Don't print the restored history as if it were new.
+            monitor.hist_len = self.ping.history.appended
+
+        self.__cls_log.debug(f'Resumed {self.ping.target}: {len(self.ping.history)} samples, {replayed} replayed')
+
+        return replayed
+
+    def add(self, sample: PingSample):
+        """
+        Journal a sample, and write a checkpoint if one is due.
+        """
+        with self.__lock:
+            if self.__journal is None:
+                self.__journal = self.__open_journal()
+
+            self.__journal.add(sample)
+
+            if monotonic() >= self.__next_checkpoint:
+                self.__checkpoint()
+
+    def checkpoint(self):
+        """
+        Write a checkpoint now, and start a fresh journal.
+        """
+        with self.__lock:
+            self.__checkpoint()
+
+    def close(self):
+        """
+        Write a final checkpoint and close the journal.
+        """
+        with self.__lock:
+            self.__checkpoint()
+
+            if self.__journal is not None:
+                self.__journal.close()
+                self.__journal = None
+
+    def __open_journal(self):
+        # The journal flushes often: it is what a crash falls back on.
+        return BinaryLogWriter(self.journal_path, max_targets=1, batch_size=16, flush_interval=1.0, fsync=self.fsync)
+
+    def __checkpoint(self):
+        # Caller holds the lock.
+        self.__next_checkpoint = monotonic() + self.interval
+
+        if self.__journal is not None:
+            self.__journal.flush()
+
+        journal_created_ns = None
+        journal_records = 0
+
+        if self.journal_path.exists() and self.journal_path.stat().st_size:
+            with BinaryLogReader(self.journal_path) as journal:
+                journal_created_ns = journal.created_ns
+                journal_records = len(journal)
+
+        sections = []
+        history = self.ping.history
+
+        segments = history.column_segments([column for column, _ in HISTORY_COLUMNS])
+
+        for column, _ in HISTORY_COLUMNS:
+            sections.append(b''.join(segment.tobytes() for segment in segments[column]))
+
+        rollup_tiers = []
+        for width, tier in self.ping.rollups.tiers.items():
+            buckets = tier.buckets()
+            rollup_tiers.append([width, len(buckets)])
+            sections.append(b''.join(_pack_bucket(bucket) for bucket in buckets))
+
+        monitor = getattr(self.ping, 'ping_monitor', None)
+
+        meta = {
+            'target': self.ping.target,
+            'created_ns': time_ns(),
+            'journal': {'created_ns': journal_created_ns, 'records': journal_records},
+            'history': {'appended': history.appended, 'count': len(sections[0]) // 8},
+            'rollups': rollup_tiers,
+            'stats': self.ping.stats.state(),
+            'quality': self.ping.quality.state(),
+            'detector': self.ping.detector.state(),
+            'monitor': {'last_avg': monitor.last_avg if monitor is not None else None},
+            'sections': [len(section) for section in sections],
+        }
+
+        encoded = json.dumps(meta).encode('utf-8')
+        temporary = self.checkpoint_path.with_suffix('.ckpt.tmp')
+
+        with open(temporary, 'wb') as file:
+            file.write(PREAMBLE.pack(MAGIC, VERSION, len(encoded)))
+            file.write(encoded)
+
+            for section in sections:
+                file.write(section)
+
+            file.flush()
+            if self.fsync:
+                os.fsync(file.fileno())
+
+        os.replace(temporary, self.checkpoint_path)
+        self.__checkpoints += 1
+
+        # Everything journalled so far is in the checkpoint now.
+        if self.__journal is not None:
+            self.__journal.close()
+            self.journal_path.unlink()
+            self.__journal = self.__open_journal()
+
+    def __load(self) -> dict:
+        data = self.checkpoint_path.read_bytes()
+
+        if len(data) < PREAMBLE.size:
+            raise CheckpointError(f'{self.checkpoint_path} is too short to be a checkpoint')
+
+        magic, version, meta_length = PREAMBLE.unpack_from(data)
+
+        if magic != MAGIC:
+            raise CheckpointError(f'{self.checkpoint_path} is not a PingStat checkpoint')
+
+        if version != VERSION:
+            raise CheckpointError(f'Unsupported checkpoint version {version}')
+
+        try:
+            meta = json.loads(data[PREAMBLE.size:PREAMBLE.size + meta_length])
+        except ValueError as e:
+            raise CheckpointError(f'Could not read the checkpoint metadata: {e}') from e
+
+        offset = PREAMBLE.size + meta_length
+        sections = []
+
+        for length in meta['sections']:
+            sections.append(memoryview(data)[offset:offset + length])
+            offset += length
+
+        if offset > len(data):
+            raise CheckpointError(f'{self.checkpoint_path} is truncated')
+
+        columns = []
+        for (_, typecode), section in zip(HISTORY_COLUMNS, sections):
+            column = bytearray(section) if typecode == 'B' else array(typecode)
+            if typecode != 'B':
+                column.frombytes(section)
+            columns.append(column)
+
+        self.ping.history.restore(*columns, appended=meta['history']['appended'])
+
+        # Sliding windows are not saved: they cover the end of `history`, so they are rebuilt from it.
+        for window in self.ping.windows.values():
+            window.refill(self.ping.history)
+
+        self.ping.rollups.restore({
+            width: [_unpack_bucket(fields) for fields in BUCKET.iter_unpack(section)]
+            for (width, _), section in zip(meta['rollups'], sections[len(HISTORY_COLUMNS):])
+        })
+
+        # Checkpoints written before running statistics, link quality and the detector were kept don't have them.
+        if 'stats' in meta:
+            self.ping.stats.restore(meta['stats'])
+
+        if 'quality' in meta:
+            self.ping.quality.restore(meta['quality'])
+
+        if 'detector' in meta:
+            self.ping.detector.restore(meta['detector'])
+
+        monitor = getattr(self.ping, 'ping_monitor', None)
+        if monitor is not None and meta['monitor']['last_avg'] is not None:
+            monitor.last_avg = meta['monitor']['last_avg']
+
+        return meta
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __repr__(self):
+        return f'<Checkpointer: {self.ping.target} in {self.directory}, {self.__checkpoints} checkpoints>'
+
+
+"""
+The MIT License (MIT)
+Copyright © 2023 Inspyre Softworks - https://inspyre.tech
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE."""
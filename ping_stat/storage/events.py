@@ -0,0 +1,120 @@
+"""
+Project: PingPing
+Author: Inspyre Softworks - https://inspyre.tech
+Created: 10/18/2026 @ 11:55 PM
+File:
+  Name: events.py
+  Filepath: ping_stat/storage
+
+An append-only log of outage and latency-shift events, one compact JSON object per line:
+
+    {"ts":1697673600123456789,"target":"inspyre.tech","event":"outage","phase":"start","value":3}
+    {"ts":1697673612123456789,"target":"inspyre.tech","event":"outage","phase":"end","value":12,"duration":12.0}
+
+Events are rare next to samples, so each one is written and flushed as it happens. A crash costs at most a partial
+last line, which `read_events` skips.
+
+Usage:
+    from ping_stat.storage.events import EventLog, read_events
+
+    with EventLog('events.jsonl') as event_log:
+        ping.detector.add_callback(event_log.write)
+        ...
+
+    for event in read_events('events.jsonl'):
+        print(event.target, event.kind, event.phase)
+"""
+import json
+import threading
+from pathlib import Path
+from typing import Iterator, Union
+
+from ping_stat.models.detector import Event
+
+
+class EventLog:
+    """
+    Append events to a JSON-lines file. Writes are thread-safe.
+
+    Attributes:
+        path (Path):
+            The log file.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        """
+        Open `path` for appending, creating it if it does not exist.
+        """
+        self.path = Path(path).expanduser()
+        self.__lock = threading.Lock()
+        self.__file = open(self.path, 'a', encoding='utf-8')
+        self.__written = 0
+
+    @property
+    def closed(self) -> bool:
+        return self.__file.closed
+
+    @property
+    def written(self) -> int:
+        """
+        int:
+            The number of events written since the log was opened.
+        """
+        return self.__written
+
+    def write(self, event: Event):
+        """
+        Append an event and flush it to the file. Does nothing once the log is closed.
+        """
+        line = json.dumps(event.as_dict(), separators=(',', ':')) + '\n'
+
+        with self.__lock:
+            if self.__file.closed:
+                return
+
+            self.__file.write(line)
+            self.__file.flush()
+            self.__written += 1
+
+    def close(self):
+        with self.__lock:
+            self.__file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __repr__(self):
+        return f'<EventLog: {self.path}, {self.__written} events written>'
+
+
+def read_events(path: Union[str, Path]) -> Iterator[Event]:
+    """
+    Yield the events in a log written by `EventLog`, oldest first. Lines that are not complete events are skipped.
+    """
+    with open(Path(path).expanduser(), encoding='utf-8') as file:
+        for line in file:
+            try:
+                event = json.loads(line)
+                yield Event(
+                    event['ts'],
+                    event['target'],
+                    event['event'],
+                    event['phase'],
+                    event['value'],
+                    event.get('duration')
+                )
+            except (ValueError, KeyError, TypeError):
+                continue
+
+
+"""
+The MIT License (MIT)
+Copyright © 2023 Inspyre Softworks - https://inspyre.tech
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE."""
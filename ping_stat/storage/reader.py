@@ -0,0 +1,178 @@
+"""
+Project: PingPing
+Author: Inspyre Softworks - https://inspyre.tech
+Created: 10/18/2026 @ 8:45 PM
+File:
+  Name: reader.py
+  Filepath: ping_stat/storage
+
+Lazy, range-limited reading of stored probe results, whatever format they were stored in.
+
+`iter_samples()` takes a binary log, a block archive, a SQLite database (by path or as an open reader), or an
+in-memory history, and yields the samples for one target (or all of them) in a time range. Each format seeks
+straight to the start of the range: a binary search in a binary log, the block index in an archive, and the
+(target, ts) index in SQLite. Samples are then decoded as they are consumed, so memory use stays bounded however large
+the source is. `iter_batches()` yields the same samples in fixed-size lists.
+
+Anything that takes an iterable of samples can consume these: `gather_times()`, `Ping.generate_report(samples=...)`,
+and `ping_stat.storage.arrow.write_parquet()`.
+
+Usage:
+    from ping_stat.storage import iter_samples
+
+    for sample in iter_samples('capture.pslog', target='inspyre.tech', start=datetime(2026, 10, 1)):
+        ...
+
+    report = ping.generate_report(samples=iter_samples('archive.psblk', target=ping.target))
+"""
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+from typing import Iterator, List, Optional, Union
+
+from ping_stat.models.history import HistoryView, SampleHistory
+from ping_stat.models.samples import PingSample
+from ping_stat.storage import binlog, blocks
+from ping_stat.storage.binlog import BinaryLogReader
+from ping_stat.storage.blocks import BlockReader
+from ping_stat.storage.sqlite import SQLiteHistory
+
+
+DEFAULT_BATCH_SIZE = 4096
+
+SQLITE_MAGIC = b'SQLite format 3\x00'
+
+Timestamp = Union[int, datetime, None]
+"""A point in time: nanoseconds since the epoch, a timezone-aware (or local) datetime, or None for unbounded."""
+
+
+def to_ns(value: Timestamp) -> Optional[int]:
+    """
+    Convert a `Timestamp` to nanoseconds since the epoch.
+    """
+    if value is None:
+        return None
+
+    if isinstance(value, datetime):
+        return int(value.timestamp() * 1_000_000) * 1_000
+
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+
+    raise TypeError('Timestamps must be nanoseconds since the epoch (int) or datetime objects')
+
+
+def open_reader(path: Union[str, Path]):
+    """
+    Open a stored capture with the reader that matches its format.
+
+    Returns:
+        BinaryLogReader, BlockReader or SQLiteHistory:
+            The reader. Close it when done.
+
+    Raises:
+        ValueError:
+            If the file is not in a format PingStat writes.
+    """
+    with open(path, 'rb') as file:
+        magic = file.read(len(SQLITE_MAGIC))
+
+    if magic.startswith(binlog.MAGIC):
+        return BinaryLogReader(path)
+
+    if magic.startswith(blocks.MAGIC):
+        return BlockReader(path)
+
+    if magic.startswith(SQLITE_MAGIC):
+        return SQLiteHistory(path)
+
+    raise ValueError(f'{path} is not a PingStat binary log, block archive or SQLite database')
+
+
+def iter_samples(
+        source,
+        target: Optional[str] = None,
+        start: Timestamp = None,
+        end: Timestamp = None
+) -> Iterator[PingSample]:
+    """
+    Lazily yield the samples for `target` (or every target) sent from `start` (inclusive) to `end` (exclusive).
+
+    Args:
+        source:
+            A path to a binary log, block archive or SQLite database; an open `BinaryLogReader`, `BlockReader` or
+            `SQLiteHistory`; a `SampleHistory` or `HistoryView`; or anything with a `history` (such as a `Ping`).
+            A reader opened from a path is closed when the iteration ends.
+        target (str or None):
+            Only yield samples for this target.
+        start, end:
+            The time range. See `Timestamp`.
+
+    Yields:
+        PingSample:
+            The samples, in the order the source stores them.
+    """
+    start_ns, end_ns = to_ns(start), to_ns(end)
+
+    if isinstance(source, (str, Path)):
+        reader = open_reader(source)
+
+        try:
+            yield from reader.samples(target, start_ns, end_ns)
+        finally:
+            reader.close()
+
+        return
+
+    if isinstance(source, (BinaryLogReader, BlockReader, SQLiteHistory)):
+        yield from source.samples(target, start_ns, end_ns)
+        return
+
+    history = source if isinstance(source, (SampleHistory, HistoryView)) else getattr(source, 'history', None)
+    if history is None:
+        raise TypeError(f'Cannot read samples from {type(source).__name__}')
+
+    for sample in history:
+        if target is not None and sample.target != target:
+            continue
+
+        if start_ns is not None and sample.timestamp_ns < start_ns:
+            continue
+
+        if end_ns is not None and sample.timestamp_ns >= end_ns:
+            continue
+
+        yield sample
+
+
+def iter_batches(
+        source,
+        target: Optional[str] = None,
+        start: Timestamp = None,
+        end: Timestamp = None,
+        size: int = DEFAULT_BATCH_SIZE
+) -> Iterator[List[PingSample]]:
+    """
+    Like `iter_samples()`, but yield lists of up to `size` samples.
+    """
+    if size <= 0:
+        raise ValueError('"size" must be positive')
+
+    samples = iter_samples(source, target, start, end)
+
+    while True:
+        batch = list(islice(samples, size))
+        if not batch:
+            return
+
+        yield batch
+
+
+"""
+The MIT License (MIT)
+Copyright © 2023 Inspyre Softworks - https://inspyre.tech
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE."""
@@ -0,0 +1,613 @@
+"""
+Project: PingPing
+Author: Inspyre Softworks - https://inspyre.tech
+Created: 10/18/2026 @ 5:50 PM
+File:
+  Name: sqlite.py
+  Filepath: ping_stat/storage
+
+A SQLite store for probe results, for reports over long periods.
+
+`SQLiteSink` takes samples from any thread and hands them to one background writer thread. The writer commits them
+in batches, one transaction per `batch_size` samples or per `flush_interval` seconds, whichever comes first. The
+database runs in WAL mode, so reports can read while the writer writes.
+
+Each batch is also folded into per-minute and per-hour rollups (see `ping_stat.models.rollups`), in the same
+transaction. A retention policy can then delete raw samples, and old rollups, after a set time.
+
+`SQLiteHistory` runs the reports. Ranges and aggregates are computed in SQL against an index on
+(target_id, ts), so a report over a month of one-second samples reads only the matching rows and returns one row
+per target. Reports over long ranges read the rollups instead, so their cost depends on the number of buckets.
+
+Schema:
+    targets(id INTEGER PRIMARY KEY, name TEXT UNIQUE)
+    samples(ts INTEGER, target_id INTEGER, sequence INTEGER, rtt REAL, status INTEGER)
+    rollups(target_id INTEGER, width INTEGER, start_ns INTEGER, count INTEGER, lost INTEGER, min REAL, max REAL,
+            total REAL, total_sq REAL, histogram BLOB)
+
+    `ts` is the send time in nanoseconds since the epoch, and `rtt` is in seconds (NULL if there was no reply).
+    `width` is the rollup bucket width in seconds.
+
+Usage:
+    from ping_stat.storage.sqlite import SQLiteHistory, SQLiteSink
+
+    sink = SQLiteSink('pings.db')
+    ping.add_callback(sink.add)
+    ...
+    sink.close()
+
+    print(SQLiteHistory('pings.db').report(start_ns=..., end_ns=...))
+"""
+import queue
+import sqlite3
+import threading
+from array import array
+from pathlib import Path
+from time import monotonic, time_ns
+from typing import Dict, Iterator, List, Optional, Union
+
+from pypattyrn.behavioral.null import Null
+
+from ping_stat.models.rollups import Bucket, HOUR, MINUTE
+from ping_stat.models.samples import PingSample
+from ping_stat.models.sketch import QuantileSketch
+
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS targets (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE)',
+    'CREATE TABLE IF NOT EXISTS samples ('
+    'ts INTEGER NOT NULL, target_id INTEGER NOT NULL REFERENCES targets(id), sequence INTEGER NOT NULL, '
+    'rtt REAL, status INTEGER NOT NULL)',
+    'CREATE INDEX IF NOT EXISTS samples_target_ts ON samples (target_id, ts)',
+    'CREATE TABLE IF NOT EXISTS rollups ('
+    'target_id INTEGER NOT NULL REFERENCES targets(id), width INTEGER NOT NULL, start_ns INTEGER NOT NULL, '
+    'count INTEGER NOT NULL, lost INTEGER NOT NULL, min REAL, max REAL, total REAL NOT NULL, total_sq REAL NOT NULL, '
+    'histogram BLOB NOT NULL, PRIMARY KEY (target_id, width, start_ns)) WITHOUT ROWID',
+)
+
+RAW = 0
+"""The `resolution` of a report read from raw samples, and the `retention` key for raw samples."""
+
+ROLLUP_WIDTHS = (MINUTE, HOUR)
+
+AUTO_RESOLUTION = ((6 * HOUR, RAW), (14 * 24 * HOUR, MINUTE))
+"""
+(longest range in seconds, resolution) pairs used to pick a report's resolution. Longer or unbounded ranges read
+the hourly rollups.
+"""
+
+PRUNE_INTERVAL = 60
+"""Seconds between two runs of the retention policy."""
+
+_STOP = object()
+
+_ROLLUP_COLUMNS = 'start_ns, count, lost, min, max, total, total_sq, histogram'
+
+
+def _bucket_from_row(row) -> Bucket:
+    bucket = Bucket(row[0])
+    bucket.count, bucket.lost, bucket.min, bucket.max, bucket.total, bucket.total_sq = row[1:7]
+    bucket.histogram = array('I', row[7])
+
+    return bucket
+
+
+def _row_from_bucket(bucket: Bucket) -> tuple:
+    return (
+        bucket.start_ns, bucket.count, bucket.lost, bucket.min, bucket.max, bucket.total, bucket.total_sq,
+        bucket.histogram.tobytes()
+    )
+
+
+def connect(path: Union[str, Path], read_only: bool = False) -> sqlite3.Connection:
+    """
+    Open a connection to a PingStat database, creating the schema if needed.
+
+    Args:
+        path (str or Path):
+            The database file.
+        read_only (bool):
+            Open the file read-only. It must already exist.
+
+    Returns:
+        sqlite3.Connection:
+            The connection.
+    """
+    if read_only:
+        connection = sqlite3.connect(f'{Path(path).resolve().as_uri()}?mode=ro', uri=True)
+    else:
+        connection = sqlite3.connect(path)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+
+        with connection:
+            for statement in SCHEMA:
+                connection.execute(statement)
+
+    return connection
+
+
+class SQLiteSink:
+    """
+    Write samples to a SQLite database from a background thread, in batches.
+
+    Attributes:
+        path (Path):
+            The database file.
+
+        batch_size (int):
+            The most samples committed in one transaction.
+
+        flush_interval (float):
+            The longest time (in seconds) a sample waits before it is committed.
+
+        retention (dict):
+            How long (in seconds) to keep data before deleting it, keyed by `RAW` for raw samples or by rollup width
+            (`MINUTE`, `HOUR`). Anything not listed is kept forever.
+    """
+    from ping_stat.logging import add_child
+
+    __cls_log = add_child('PingPing.SQLiteSink')
+
+    def __init__(
+            self,
+            path: Union[str, Path],
+            batch_size: int = 500,
+            flush_interval: float = 0.25,
+            retention: Optional[Dict[int, float]] = None,
+            log_device=Null()
+    ):
+        if batch_size <= 0:
+            raise ValueError('"batch_size" must be positive')
+
+        if flush_interval <= 0:
+            raise ValueError('"flush_interval" must be positive')
+
+        retention = dict(retention or {})
+        for key, seconds in retention.items():
+            if key != RAW and key not in ROLLUP_WIDTHS:
+                raise ValueError(f'"retention" keys must be RAW or one of {ROLLUP_WIDTHS}, not {key!r}')
+
+            if seconds is not None and seconds <= 0:
+                raise ValueError('"retention" periods must be positive')
+
+        self.log_device = log_device
+
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retention = retention
+
+        # Create the schema up front so errors surface here and readers can open the file straight away.
+        connect(self.path).close()
+
+        self.__queue = queue.Queue()
+        self.__written = 0
+        self.__closed = False
+        self.__thread = threading.Thread(target=self.__run, name='SQLiteSink', daemon=True)
+        self.__thread.start()
+
+    @property
+    def closed(self) -> bool:
+        return self.__closed
+
+    @property
+    def written(self) -> int:
+        """
+        int:
+            The number of samples committed so far.
+        """
+        return self.__written
+
+    def add(self, sample: PingSample):
+        """
+        Queue a sample for writing. Never blocks; suitable as a `Ping` or `PingFleet` callback.
+        """
+        self.__queue.put(sample)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every sample queued so far is committed.
+
+        Returns:
+            bool:
+                False if `timeout` ran out first.
+        """
+        done = threading.Event()
+        self.__queue.put(done)
+
+        return done.wait(timeout)
+
+    def close(self):
+        """
+        Commit what is queued and stop the writer thread.
+        """
+        if self.__closed:
+            return
+
+        self.__closed = True
+        self.__queue.put(_STOP)
+        self.__thread.join()
+
+    def history(self) -> 'SQLiteHistory':
+        """
+        Open a `SQLiteHistory` on the same database, for reports.
+        """
+        return SQLiteHistory(self.path)
+
+    def __run(self):
+        connection = connect(self.path)
+        target_ids = dict(connection.execute('SELECT name, id FROM targets'))
+
+        batch = []
+        waiters = []
+        deadline = None
+        next_prune = monotonic()
+
+        try:
+            while True:
+                if self.retention and monotonic() >= next_prune:
+                    self.__prune(connection)
+                    next_prune = monotonic() + PRUNE_INTERVAL
+
+                timeout = None if deadline is None else max(0.0, deadline - monotonic())
+                if self.retention:
+                    timeout = PRUNE_INTERVAL if timeout is None else min(timeout, PRUNE_INTERVAL)
+
+                try:
+                    item = self.__queue.get(timeout=timeout)
+                except queue.Empty:
+                    item = None
+
+                if isinstance(item, PingSample):
+                    batch.append(item)
+                    if deadline is None:
+                        deadline = monotonic() + self.flush_interval
+
+                    if len(batch) < self.batch_size and monotonic() < deadline:
+                        continue
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+
+                self.__write(connection, target_ids, batch)
+                batch = []
+                deadline = None
+
+                for waiter in waiters:
+                    waiter.set()
+                waiters = []
+
+                if item is _STOP:
+                    break
+        finally:
+            connection.close()
+
+    def __write(self, connection, target_ids, batch):
+        if not batch:
+            return
+
+        try:
+            with connection:
+                for sample in batch:
+                    if sample.target not in target_ids:
+                        connection.execute('INSERT OR IGNORE INTO targets (name) VALUES (?)', (sample.target,))
+                        target_ids[sample.target] = connection.execute(
+                            'SELECT id FROM targets WHERE name = ?', (sample.target,)
+                        ).fetchone()[0]
+
+                connection.executemany(
+                    'INSERT INTO samples (ts, target_id, sequence, rtt, status) VALUES (?, ?, ?, ?, ?)',
+                    [
+                        (sample.timestamp_ns, target_ids[sample.target], sample.sequence, sample.rtt, sample.status)
+                        for sample in batch
+                    ]
+                )
+
+                self.__roll_up(connection, target_ids, batch)
+        except sqlite3.Error as e:
+            # Target ids from a rolled-back transaction are no longer valid.
+            target_ids.clear()
+            target_ids.update(connection.execute('SELECT name, id FROM targets'))
+            self.__cls_log.error(f'Could not write {len(batch)} samples to {self.path}: {e}')
+            return
+
+        self.__written += len(batch)
+
+    @staticmethod
+    def __roll_up(connection, target_ids, batch):
+        # Caller holds the transaction. Fold the batch into fresh buckets, then merge them with the stored ones.
+        buckets = {}
+
+        for sample in batch:
+            for width in ROLLUP_WIDTHS:
+                width_ns = width * 1_000_000_000
+                key = (target_ids[sample.target], width, sample.timestamp_ns - sample.timestamp_ns % width_ns)
+
+                bucket = buckets.get(key)
+                if bucket is None:
+                    bucket = buckets[key] = Bucket(key[2])
+
+                bucket.add(sample.rtt)
+
+        rows = []
+
+        for (target_id, width, start_ns), bucket in buckets.items():
+            stored = connection.execute(
+                f'SELECT {_ROLLUP_COLUMNS} FROM rollups WHERE target_id = ? AND width = ? AND start_ns = ?',
+                (target_id, width, start_ns)
+            ).fetchone()
+
+            if stored is not None:
+                bucket.merge(_bucket_from_row(stored))
+
+            rows.append((target_id, width) + _row_from_bucket(bucket))
+
+        connection.executemany(
+            f'INSERT OR REPLACE INTO rollups (target_id, width, {_ROLLUP_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            rows
+        )
+
+    def __prune(self, connection):
+        now_ns = time_ns()
+
+        try:
+            with connection:
+                for key, seconds in self.retention.items():
+                    if seconds is None:
+                        continue
+
+                    cutoff_ns = now_ns - int(seconds * 1_000_000_000)
+
+                    # One delete per target, so each can use the (target_id, ...) index.
+                    deleted = 0
+
+                    for target_id, in connection.execute('SELECT id FROM targets').fetchall():
+                        if key == RAW:
+                            deleted += connection.execute(
+                                'DELETE FROM samples WHERE target_id = ? AND ts < ?', (target_id, cutoff_ns)
+                            ).rowcount
+                        else:
+                            deleted += connection.execute(
+                                'DELETE FROM rollups WHERE target_id = ? AND width = ? AND start_ns < ?',
+                                (target_id, key, cutoff_ns)
+                            ).rowcount
+
+                    if deleted:
+                        self.__cls_log.debug(f'Retention removed {deleted} {"raw" if key == RAW else key} rows')
+        except sqlite3.Error as e:
+            self.__cls_log.error(f'Could not apply the retention policy to {self.path}: {e}')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __repr__(self):
+        return f'<SQLiteSink: {self.path}, {self.__written} samples written>'
+
+
+class SQLiteHistory:
+    """
+    Query samples and reports from a PingStat SQLite database.
+
+    Every time range is given as nanoseconds since the epoch. `start_ns` is inclusive, `end_ns` is exclusive, and
+    None means unbounded.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.__connection = connect(self.path, read_only=True)
+
+    def close(self):
+        self.__connection.close()
+
+    def targets(self) -> List[str]:
+        """
+        list:
+            Every target in the database, by name.
+        """
+        return [name for name, in self.__connection.execute('SELECT name FROM targets ORDER BY name')]
+
+    def count(self, target: Optional[str] = None, start_ns: Optional[int] = None, end_ns: Optional[int] = None) -> int:
+        where, params = self.__where(target, start_ns, end_ns)
+
+        return self.__connection.execute(
+            f'SELECT COUNT(*) FROM samples JOIN targets ON targets.id = samples.target_id {where}', params
+        ).fetchone()[0]
+
+    def samples(
+            self,
+            target: Optional[str] = None,
+            start_ns: Optional[int] = None,
+            end_ns: Optional[int] = None
+    ) -> Iterator[PingSample]:
+        """
+        Iterate over the samples in a range, oldest first, without loading them all at once.
+        """
+        where, params = self.__where(target, start_ns, end_ns)
+        cursor = self.__connection.execute(
+            'SELECT ts, name, sequence, rtt, status FROM samples JOIN targets ON targets.id = samples.target_id '
+            f'{where} ORDER BY ts',
+            params
+        )
+
+        for row in cursor:
+            yield PingSample(*row)
+
+    def buckets(
+            self,
+            target: str,
+            width: int = MINUTE,
+            start_ns: Optional[int] = None,
+            end_ns: Optional[int] = None
+    ) -> Iterator[Bucket]:
+        """
+        Iterate over one target's rollup buckets that overlap a range, oldest first.
+
+        Args:
+            width (int):
+                The rollup tier to read: `MINUTE` or `HOUR`.
+        """
+        where, params = self.__where(target, self.__floor(start_ns, width), end_ns, 'start_ns')
+        cursor = self.__connection.execute(
+            f'SELECT {_ROLLUP_COLUMNS} FROM rollups JOIN targets ON targets.id = rollups.target_id '
+            f'{where} AND width = ? ORDER BY start_ns',
+            params + [width]
+        )
+
+        for row in cursor:
+            yield _bucket_from_row(row)
+
+    def report(
+            self,
+            target: Optional[str] = None,
+            start_ns: Optional[int] = None,
+            end_ns: Optional[int] = None,
+            resolution: Optional[int] = None
+    ) -> Dict[str, dict]:
+        """
+        Aggregate every target (or just `target`) over a range.
+
+        Counts, min, max and totals are aggregated in SQL. Percentiles are read from the rollup sketches, or from a
+        sketch of the raw RTTs for a raw report.
+
+        Args:
+            resolution (int or None):
+                `RAW` to aggregate the raw samples, or a rollup width (`MINUTE`, `HOUR`) to aggregate the rollups,
+                widening the range to whole buckets. By default, short ranges read raw samples and longer ones read
+                rollups; see `AUTO_RESOLUTION`.
+
+        Returns:
+            dict:
+                Report dictionaries, keyed by target name, in the same shape as `Ping.generate_report()`, plus the
+                `resolution` used and the send times of the first and last samples (or bucket starts) included.
+        """
+        if resolution is None:
+            resolution = self.__pick_resolution(start_ns, end_ns)
+
+        sketches = {}
+
+        if resolution == RAW:
+            where, params = self.__where(target, start_ns, end_ns)
+            cursor = self.__connection.execute(
+                'SELECT name, COUNT(*), COUNT(rtt), MIN(rtt), MAX(rtt), TOTAL(rtt), MIN(ts), MAX(ts) '
+                f'FROM samples JOIN targets ON targets.id = samples.target_id {where} '
+                'GROUP BY samples.target_id ORDER BY name',
+                params
+            )
+            rows = cursor.fetchall()
+
+            # Raw reads are limited to short ranges (see AUTO_RESOLUTION), so feeding each RTT to a sketch is cheap.
+            for name, rtt in self.__connection.execute(
+                    f'SELECT name, rtt FROM samples JOIN targets ON targets.id = samples.target_id {where} '
+                    'AND rtt IS NOT NULL',
+                    params
+            ):
+                sketch = sketches.get(name)
+                if sketch is None:
+                    sketch = sketches[name] = QuantileSketch()
+
+                sketch.add(rtt)
+        elif resolution in ROLLUP_WIDTHS:
+            where, params = self.__where(target, self.__floor(start_ns, resolution), end_ns, 'start_ns')
+            cursor = self.__connection.execute(
+                'SELECT name, SUM(count), SUM(count - lost), MIN(min), MAX(max), TOTAL(total), MIN(start_ns), '
+                f'MAX(start_ns) FROM rollups JOIN targets ON targets.id = rollups.target_id {where} AND width = ? '
+                'GROUP BY rollups.target_id ORDER BY name',
+                params + [resolution]
+            )
+            rows = cursor.fetchall()
+
+            for name, *row in self.__connection.execute(
+                    f'SELECT name, {_ROLLUP_COLUMNS} FROM rollups JOIN targets ON targets.id = rollups.target_id '
+                    f'{where} AND width = ?',
+                    params + [resolution]
+            ):
+                bucket = _bucket_from_row(row)
+                sketch = sketches.get(name)
+
+                if sketch is None:
+                    sketches[name] = bucket.sketch
+                else:
+                    sketch.merge(bucket.sketch)
+        else:
+            raise ValueError(f'"resolution" must be RAW or one of {ROLLUP_WIDTHS}')
+
+        return {
+            name: {
+                'pings_sent': sent,
+                'pings_returned': returned,
+                'pings_failed': sent - returned,
+                'loss': (sent - returned) / sent if sent else 0.0,
+                'resolution': resolution,
+                'first_ns': first_ns,
+                'last_ns': last_ns,
+                'wait_time': {
+                    'min': min_rtt,
+                    'max': max_rtt,
+                    'mean': total / returned if returned else None,
+                    'average': total,
+                    **(sketches[name] if name in sketches else QuantileSketch()).percentiles(),
+                },
+            }
+            for name, sent, returned, min_rtt, max_rtt, total, first_ns, last_ns in rows
+        }
+
+    @staticmethod
+    def __floor(timestamp_ns, width):
+        if timestamp_ns is None:
+            return None
+
+        return timestamp_ns - timestamp_ns % (width * 1_000_000_000)
+
+    @staticmethod
+    def __pick_resolution(start_ns, end_ns):
+        if start_ns is None:
+            return HOUR
+
+        span = ((end_ns if end_ns is not None else time_ns()) - start_ns) / 1_000_000_000
+
+        for longest, resolution in AUTO_RESOLUTION:
+            if span <= longest:
+                return resolution
+
+        return HOUR
+
+    @staticmethod
+    def __where(target, start_ns, end_ns, column='ts'):
+        clauses = ['1']
+        params = []
+
+        if target is not None:
+            clauses.append('name = ?')
+            params.append(target)
+
+        if start_ns is not None:
+            clauses.append(f'{column} >= ?')
+            params.append(start_ns)
+
+        if end_ns is not None:
+            clauses.append(f'{column} < ?')
+            params.append(end_ns)
+
+        return 'WHERE ' + ' AND '.join(clauses), params
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __repr__(self):
+        return f'<SQLiteHistory: {self.path}>'
+
+
+"""
+The MIT License (MIT)
+Copyright © 2023 Inspyre Softworks - https://inspyre.tech
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE."""
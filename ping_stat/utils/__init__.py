@@ -7,11 +7,12 @@ File:
 """
 from inspy_logger import InspyLogger
 import time
-from ping3 import ping, verbose_ping
+from ping3 import verbose_ping
 from ping_stat.logging import add_child as add_child_logger, PROG_NAME
 from rich.logging import RichHandler
 import inspect
 from ping_stat.utils.decorators import validate_properties
+from ping_stat.models.samples import STATUS_OK, TTLResult
 from statistics import mean, median
 
 
@@ -24,9 +25,19 @@ except (ModuleNotFoundError, NameError) as e:
 
 
 def get_ping_mean(ping_object, *args, **kwargs):
+    """
+    The mean round-trip time (in seconds) of the successful pings of `ping_object`, or None if there are none.
+
+    If `ping_object` (or the `Ping` it wraps) keeps running `stats`, the mean is read from them in constant time.
+    Otherwise it is computed from `ping_object.history`.
+    """
+    stats = getattr(getattr(ping_object, 'ping_object', ping_object), 'stats', None)
+    if stats is not None and not args and not kwargs:
+        return stats.mean
+
+    kwargs.setdefault('count_timeout_time_for_fails', False)
     times = gather_times(ping_object, *args, return_fail_list=False, **kwargs)
-    p_means = [mean(p_time) for p_time in times if p_time]
-    return mean(p_means)
+    return mean(times) if times else None
 
 
 def gather_times(
@@ -37,19 +48,43 @@ def gather_times(
         return_fail_list=True,
         format_fail_times=True
 ):
-    ping = ping_object
+    """
+    Split the samples in `ping_object.history` into round-trip times and failures.
+
+    Args:
+        ping_object:
+            Anything with a `history` of `PingSample` records (a `Ping`, or a worker or monitor wrapping one), or an
+            iterable of `PingSample` records, such as `ping_stat.storage.iter_samples()`. An iterator is consumed in
+            a single pass.
+        count_timeout_time_for_fails (bool):
+            Whether to add `timeout` to the round-trip times for every failed ping.
+        timeout (int|float):
+            The time to count for a failed ping.
+        return_success_list (bool):
+            Whether to return the round-trip times.
+        return_fail_list (bool):
+            Whether to return the failed samples.
+
+    Returns:
+        list or tuple:
+            The round-trip times (in seconds) and/or the failed `PingSample` records. A single list if only one
+            was asked for.
+    """
     ping_times = []
     failed_pings = []
-    history = ping.history
-    print(f'ping.history has {len(history)} entries.')
-    for item in ping.history:
+    history = getattr(ping_object, 'history', ping_object)
+
+    if hasattr(history, '__len__'):
+        LOGGER.debug(f'ping.history has {len(history)} entries.')
 
-        if item[2] is None:
+    for item in history:
+
+        if item.rtt is None:
             failed_pings.append(item)
             if count_timeout_time_for_fails:
                 ping_times.append(timeout)
         else:
-            ping_times.append(item[2])
+            ping_times.append(item.rtt)
 
     if failed_pings:
         if len(failed_pings) >= 2:
@@ -57,7 +92,7 @@ def gather_times(
         elif len(failed_pings) == 1:
             noun = 'ping'
 
-        print(f'WARNING: Found {len(failed_pings)} failed {noun}')
+        LOGGER.debug(f'Found {len(failed_pings)} failed {noun}')
 
     ret = ()
     if return_success_list:
@@ -71,13 +106,48 @@ def gather_times(
     return ret
 
 
+MAX_TTL = 30
+"""The highest TTL a `TTLTest` tries when no `end_at` is given."""
+
+
+def ttl_result(ttl, probe, started_ns, timeout):
+    """
+    Turn a finished probe into a `TTLResult`.
+
+    Args:
+        ttl (int):
+            The TTL the probe was sent with.
+        probe (PendingProbe):
+            The finished probe.
+        started_ns (int):
+            `time.monotonic_ns()` at the start of the test, for the `elapsed` field.
+        timeout (float):
+            The probe's timeout, used as its finishing time when nobody answered.
+
+    Returns:
+        TTLResult:
+            The result.
+    """
+    finished_ns = probe.sent_ns + int((timeout if probe.rtt is None else probe.rtt) * 1e9)
+
+    return TTLResult(ttl, probe.status, probe.rtt, probe.responder, max(0, finished_ns - started_ns) / 1e9)
+
 
 class TTLTest:
+    """
+    Find the minimum number of hops (IP time-to-live) needed to reach an address.
+
+    By default the test is parallel: one probe is sent for every TTL from `starting_at` to `end_at` at once, so the
+    answer arrives within roughly one timeout however many hops are tried. With `parallel=False`, TTLs are tried one
+    at a time and every hop that does not answer costs a full timeout.
+
+    Each probe's outcome is kept in `history` as a `TTLResult`.
+    """
     __auto_run: bool = False
     __end_at = None
-    __history = []
     __iterations = 5
     __min_ttl = None
+    __parallel = True
     __starting_at = 0
     __address = 'inspyre.tech'
     __timeout = 3
@@ -89,12 +159,16 @@ class TTLTest:
             iterations=__iterations,
             timeout=__timeout,
             starting_at=__starting_at,
-            end_at=__end_at
+            end_at=__end_at,
+            parallel=__parallel
     ):
+        self.__history = []
+
         self.address = str(address)
         self.auto_run: bool = auto_run
         self.end_at = end_at
         self.iterations = iterations
+        self.parallel = parallel
         self.starting_at = starting_at
         self.timeout = timeout
 
@@ -109,6 +183,21 @@ class TTLTest:
     def auto_run(self, new: bool):
         self.__auto_run = new
 
+    @property
+    def end_at(self):
+        """
+        int or None:
+            The highest TTL to try. None means `MAX_TTL`.
+        """
+        return self.__end_at
+
+    @end_at.setter
+    def end_at(self, new):
+        if new is not None and not isinstance(new, int):
+            raise TypeError('"end_at" must be an integer or None')
+
+        self.__end_at = new
+
     @property
     def iterations(self):
         return self.__iterations
@@ -126,8 +215,23 @@ class TTLTest:
 
     @property
     def history(self):
+        """
+        list:
+            A `TTLResult` for every probe sent by `run()`, in TTL order.
+        """
         return self.__history
 
+    @property
+    def parallel(self) -> bool:
+        return self.__parallel
+
+    @parallel.setter
+    def parallel(self, new):
+        if not isinstance(new, bool):
+            raise TypeError('"parallel" must be a boolean')
+
+        self.__parallel = new
+
     @property
     def timeout(self):
         return self.__timeout
@@ -148,8 +252,6 @@ class TTLTest:
 
     @address.setter
     def address(self, new):
-        print(dir(new))
-        print(type(new))
         if not isinstance(new, str):
             raise TypeError('Address must be a string!')
         self.__test_addr = new
@@ -164,7 +266,7 @@ class TTLTest:
 
     @minimum_ttl.setter
     def minimum_ttl(self, new):
-        if not isinstance(new, (int, None)):
+        if not isinstance(new, (int, type(None))):
             raise TypeError('minimum__ttl must be an integer')
 
         self.__min_ttl = new
@@ -188,7 +290,24 @@ class TTLTest:
     def get_property_list(self):
         return [name for name, value in inspect.getmembers(TTLTest) if isinstance(value, property)]
 
-    def run(self, address=None, timeout=None, starting_at=None):
+    def run(self, address=None, timeout=None, starting_at=None, parallel=None):
+        """
+        Find the minimum TTL needed to reach the address.
+
+        Parameters:
+            address (str, optional):
+                The address to test. Defaults to `address`.
+            timeout (int|float, optional):
+                Seconds to wait for each probe. Defaults to `timeout`.
+            starting_at (int, optional):
+                The lowest TTL to try. Defaults to `starting_at`.
+            parallel (bool, optional):
+                Whether to probe every TTL at once. Defaults to `parallel`.
+
+        Returns:
+            int or None:
+                The minimum TTL, or None if no TTL up to `end_at` reached the address.
+        """
         addr = address or self.address
 
         if addr != self.address:
@@ -199,31 +318,76 @@ class TTLTest:
         if timeout != self.timeout:
             self.timeout = timeout
 
-        cur_ttl = (starting_at or self.starting_at) - 1
+        if parallel is None:
+            parallel = self.parallel
+
+        first = max(1, starting_at or self.starting_at)
+        last = self.end_at or MAX_TTL
+
+        if last < first:
+            raise ValueError(f'"end_at" ({last}) is lower than the starting TTL ({first})')
+
+        self.minimum_ttl = None
+
+        started = time.monotonic_ns()
+
+        if parallel:
+            results = self.__sweep(first, last, started)
+        else:
+            results = self.__step(first, last, started)
+
+        self.__history.extend(results)
+
+        for result in results:
+            if result.reached:
+                self.minimum_ttl = result.ttl
+                break
+
+        LOGGER.debug(
+            f'{(time.monotonic_ns() - started) / 1e9:.3f} seconds elapsed total. In {len(results)} tries. '
+            f'Minimum TTL: {self.minimum_ttl}'
+        )
+
+        return self.minimum_ttl
+
+    def __sweep(self, first, last, started):
+        from ping_stat.utils.multiplexer import get_multiplexer
+
+        multiplexer = get_multiplexer()
+        probes = [
+            (ttl, multiplexer.send(self.address, timeout=self.timeout, ttl=ttl))
+            for ttl in range(first, last + 1)
+        ]
+
+        results = []
+
+        # Every lower TTL finishes no later than its own timeout, so by the time the first reply from the address
+        # itself is reached in TTL order, the answer is known. Higher TTLs are left to expire in the multiplexer.
+        for ttl, probe in probes:
+            probe.wait()
+            results.append(ttl_result(ttl, probe, started, self.timeout))
+
+            if probe.status == STATUS_OK:
+                break
+
+        return results
+
+    def __step(self, first, last, started):
+        from ping_stat.utils.multiplexer import get_multiplexer
 
-        markA = time.time()
+        multiplexer = get_multiplexer()
+        results = []
 
-        while self.minimum_ttl in [None, 0]:
-            cur_ttl += 1
-            mark1 = time.time()
-            print('Trying')
-            res = ping(self.address, timeout=self.timeout, ttl=cur_ttl)
-            print(f'Result: {res or "TIMEOUT"}')
-            mark2 = time.time()
-            if res:
-                self.minimum_ttl = cur_ttl
-                self.__history.append(f'FOUND:{self.minimum_ttl}')
-            else:
-                self.__history.append(f'TIMEOUT - {mark2 - mark1}')
+        for ttl in range(first, last + 1):
+            probe = multiplexer.send(self.address, timeout=self.timeout, ttl=ttl)
+            probe.wait()
+            results.append(ttl_result(ttl, probe, started, self.timeout))
 
-        markB = time.time()
+            if probe.status == STATUS_OK:
+                break
 
-        tries = len(self.history)
-        for item in self.history:
-            if item.startswith('FOUND'):
-                tries -= 1
+        return results
 
-        print(f'{markB - markA} seconds elapsed total. In {len(self.__history)} tries.')
 
 
 """
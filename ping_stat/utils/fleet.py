@@ -0,0 +1,586 @@
+"""
+Project: PingPing
+Author: Inspyre Softworks - https://inspyre.tech
+Created: 10/18/2026 @ 11:48 AM
+File:
+  Name: fleet.py
+  Filepath: ping_stat/utils
+
+Monitor a whole list of targets from one process. Targets are loaded from a plain-text, CSV or JSON file (each
+with its own interval, timeout and packet size if you like), dispatched by a single `PingEngine`, and tracked with
+their own statistics.
+
+Target files:
+    - Plain text: one address per line. Blank lines and lines starting with '#' are ignored.
+    - CSV: a header row with an 'address' (or 'target') column and optional 'interval', 'timeout' and
+      'packet_size' columns.
+    - JSON: a list of addresses or of objects with the same keys as the CSV columns, either at the top level or
+      under a 'targets' key.
+
+Usage:
+    from ping_stat.utils.fleet import PingFleet
+
+    fleet = PingFleet.from_file('hosts.csv', interval=5, timeout=2)
+    fleet.run(duration=60)
+    print(fleet.report())
+
+Sharding:
+    With `shards` greater than one, targets are split across that many worker processes by a consistent hash of
+    their address. Each process runs its own `PingEngine` and sends its samples back to the parent in packed binary
+    batches over a pipe; the parent keeps the per-target statistics. Probe throughput then scales with CPU cores
+    rather than stopping at what one interpreter can do.
+
+    Each shard opens its own ICMP socket. Datagram sockets only ever receive their own replies. Raw sockets get a
+    kernel filter on the shard's echo identifier (see `ping_stat.utils.icmp.attach_identifier_filter`), so a shard
+    is not woken for replies meant for the others. Without that filter (raw sockets outside Linux) every shard
+    would receive and parse every reply, and sharding would spread the sending but not the receiving.
+"""
+import asyncio
+import bisect
+import csv
+import hashlib
+import json
+import math
+import multiprocessing
+import struct
+import threading
+from multiprocessing.connection import wait as wait_for_connections
+from pathlib import Path
+from time import monotonic
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Sequence, Union
+
+from pypattyrn.behavioral.null import Null
+
+from ping_stat.errors import WorkerAlreadyStartedError, WorkerNotStartedError
+from ping_stat.models.detector import AnomalyDetector, Event
+from ping_stat.models.quality import LinkQuality
+from ping_stat.models.samples import PingSample
+from ping_stat.models.stats import RunningStats
+from ping_stat.utils.network import PingEngine, ProbeTarget
+
+
+DEFAULT_INTERVAL = 1
+DEFAULT_TIMEOUT = 5
+DEFAULT_PACKET_SIZE = 256
+
+SHARD_RECORD = struct.Struct('<qdIHB')
+"""Wire format of one sample sent from a shard: timestamp (ns), RTT (NaN if lost), target index, sequence, status."""
+
+
+class HashRing:
+    """
+    A consistent-hash ring.
+
+    Each node is placed on the ring at `replicas` points. A key belongs to the first node point at or after the
+    key's own hash, so adding or removing a node only moves the keys next to that node's points.
+    """
+
+    def __init__(self, nodes: Iterable[Hashable], replicas: int = 64):
+        self.replicas = replicas
+        self.__points = []
+
+        for node in nodes:
+            for replica in range(replicas):
+                self.__points.append((_hash(f'{node}#{replica}'), node))
+
+        self.__points.sort()
+        self.__hashes = [point for point, _ in self.__points]
+
+    def node_for(self, key: str) -> Hashable:
+        """
+        The node that `key` belongs to.
+        """
+        if not self.__points:
+            raise ValueError('The hash ring has no nodes')
+
+        index = bisect.bisect(self.__hashes, _hash(key)) % len(self.__points)
+
+        return self.__points[index][1]
+
+
+def _hash(key: str) -> int:
+    # Python's own hash() is salted per process, so it cannot be used to agree on placement across runs.
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), 'big')
+
+
+def _run_shard(conn, targets: Sequence[tuple], max_in_flight: int, batch_size: int, flush_interval: float):
+    """
+    The main function of a shard process.
+
+    Probes `targets` (tuples of address, interval, timeout and packet size) with a `PingEngine` and writes the
+    samples to `conn` in batches of packed `SHARD_RECORD`s. Any message from the parent stops the shard.
+    """
+    index = {target[0]: i for i, target in enumerate(targets)}
+    engine = PingEngine([ProbeTarget(*target) for target in targets], max_in_flight=max_in_flight)
+    batch = bytearray()
+    nan = float('nan')
+
+    def flush():
+        if batch:
+            conn.send_bytes(batch)
+            batch.clear()
+
+    async def flush_periodically():
+        while True:
+            await asyncio.sleep(flush_interval)
+            flush()
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        loop.add_reader(conn.fileno(), engine.stop)
+        flusher = loop.create_task(flush_periodically())
+
+        try:
+            async for sample in engine.stream():
+                batch.extend(
+                    SHARD_RECORD.pack(
+                        sample.timestamp_ns,
+                        nan if sample.rtt is None else sample.rtt,
+                        index[sample.target],
+                        sample.sequence,
+                        sample.status
+                    )
+                )
+
+                if len(batch) >= batch_size * SHARD_RECORD.size:
+                    flush()
+        finally:
+            flusher.cancel()
+            loop.remove_reader(conn.fileno())
+
+    try:
+        asyncio.run(main())
+        flush()
+    except (BrokenPipeError, KeyboardInterrupt):
+        pass
+    finally:
+        conn.close()
+
+
+def load_targets(
+        path: Union[str, Path],
+        interval: float = DEFAULT_INTERVAL,
+        timeout: float = DEFAULT_TIMEOUT,
+        packet_size: int = DEFAULT_PACKET_SIZE
+) -> List[ProbeTarget]:
+    """
+    Load a list of targets from a file.
+
+    The format is picked from the file extension: '.csv', '.json', and anything else is read as plain text.
+
+    Args:
+        path (str or Path):
+            The file to read.
+        interval (float):
+            Interval for targets that do not set their own.
+        timeout (float):
+            Timeout for targets that do not set their own.
+        packet_size (int):
+            Packet size for targets that do not set their own.
+
+    Returns:
+        list:
+            The targets, as `ProbeTarget` objects, in file order.
+
+    Raises:
+        ValueError:
+            If an entry has no address or the same address appears twice.
+    """
+    path = Path(path)
+    suffix = path.suffix.lower()
+
+    with path.open(newline='') as f:
+        if suffix == '.csv':
+            entries = list(csv.DictReader(f))
+        elif suffix == '.json':
+            entries = json.load(f)
+            if isinstance(entries, dict):
+                entries = entries['targets']
+        else:
+            entries = [
+                line.strip() for line in f
+                if line.strip() and not line.lstrip().startswith('#')
+            ]
+
+    targets = []
+    seen = set()
+
+    for entry in entries:
+        if isinstance(entry, str):
+            entry = {'address': entry}
+
+        address = (entry.get('address') or entry.get('target') or '').strip()
+        if not address:
+            raise ValueError(f'Target entry without an address in {path}: {entry!r}')
+
+        if address in seen:
+            raise ValueError(f'Duplicate target in {path}: {address}')
+
+        seen.add(address)
+        targets.append(
+            ProbeTarget(
+                address,
+                interval=float(entry.get('interval') or interval),
+                timeout=float(entry.get('timeout') or timeout),
+                packet_size=int(entry.get('packet_size') or packet_size)
+            )
+        )
+
+    return targets
+
+
+class PingFleet:
+    """
+    Watch many targets with one central scheduler and keep statistics for each of them.
+
+    Note:
+        Pinging a target is not a passive operation. Please only monitor hosts you have permission to probe.
+
+    Usage:
+        fleet = PingFleet(['1.1.1.1', '8.8.8.8'], interval=2)
+        fleet.start()
+        ...
+        fleet.stop()
+        print(fleet.report())
+    """
+    from ping_stat.logging import add_child
+
+    __cls_log = add_child('PingPing.PingFleet')
+
+    def __init__(
+            self,
+            targets: Iterable[Union[str, ProbeTarget]] = (),
+            interval: float = DEFAULT_INTERVAL,
+            timeout: float = DEFAULT_TIMEOUT,
+            packet_size: int = DEFAULT_PACKET_SIZE,
+            max_in_flight: int = 1024,
+            shards: int = 1,
+            batch_size: int = 512,
+            flush_interval: float = 0.25,
+            log_device=Null()
+    ):
+        """
+        Initializes the PingFleet object.
+
+        Args:
+            targets (iterable):
+                Addresses or `ProbeTarget` objects to watch.
+            interval (float):
+                Interval for targets that do not set their own.
+            timeout (float):
+                Timeout for targets that do not set their own.
+            packet_size (int):
+                Packet size for targets that do not set their own.
+            max_in_flight (int):
+                The maximum number of unanswered probes at once, across the whole fleet.
+            shards (int):
+                The number of worker processes to split the targets across. With 1, everything runs in this
+                process.
+            batch_size (int):
+                Sharded mode only: the number of samples a shard packs into one message to the parent.
+            flush_interval (float):
+                Sharded mode only: the longest time in seconds a shard holds on to a partial batch.
+        """
+        if not isinstance(shards, int):
+            raise TypeError('"shards" must be an integer')
+
+        if shards <= 0:
+            raise ValueError('"shards" must be positive')
+
+        self.log_device = log_device
+
+        self.max_in_flight = max_in_flight
+        self.shards = shards
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self.__engine = PingEngine(
+            targets,
+            interval=interval,
+            timeout=timeout,
+            packet_size=packet_size,
+            max_in_flight=max_in_flight,
+            log_device=log_device
+        )
+        self.__stats = {address: RunningStats() for address in self.__engine.targets}
+        self.__quality = {address: LinkQuality() for address in self.__engine.targets}
+
+        self.__loop = None
+        self.__thread = None
+        self.__callbacks = []
+        self.__event_callbacks = []
+        self.__detectors = {}
+
+        for address in self.__engine.targets:
+            self.__add_detector(address)
+        self.__stopping = threading.Event()
+        self.__sharded = False
+
+    @classmethod
+    def from_file(cls, path, interval=DEFAULT_INTERVAL, timeout=DEFAULT_TIMEOUT, packet_size=DEFAULT_PACKET_SIZE,
+                  **kwargs):
+        """
+        Build a fleet from a target file. See `load_targets` for the supported formats.
+        """
+        return cls(
+            load_targets(path, interval=interval, timeout=timeout, packet_size=packet_size),
+            interval=interval,
+            timeout=timeout,
+            packet_size=packet_size,
+            **kwargs
+        )
+
+    @property
+    def engine(self) -> PingEngine:
+        return self.__engine
+
+    @property
+    def running(self) -> bool:
+        return self.__sharded or self.__engine.running
+
+    @property
+    def stats(self) -> Dict[str, RunningStats]:
+        """
+        dict:
+            Per-target statistics, keyed by address.
+        """
+        return self.__stats
+
+    @property
+    def quality(self) -> Dict[str, LinkQuality]:
+        """
+        dict:
+            Per-target jitter and loss-burst statistics, keyed by address.
+        """
+        return self.__quality
+
+    @property
+    def detectors(self) -> Dict[str, AnomalyDetector]:
+        """
+        dict:
+            Per-target outage and latency-shift detectors, keyed by address.
+        """
+        return self.__detectors
+
+    @property
+    def thread(self) -> Optional[threading.Thread]:
+        return self.__thread
+
+    def add_callback(self, callback: Callable[[PingSample], None]):
+        """
+        Call `callback` with every sample the fleet records.
+        """
+        self.__callbacks.append(callback)
+
+    def add_event_callback(self, callback: Callable[[Event], None]):
+        """
+        Call `callback` with every outage and latency-shift event, from any target.
+        """
+        self.__event_callbacks.append(callback)
+
+    def add_target(self, address, **kwargs) -> ProbeTarget:
+        target = self.__engine.add_target(address, **kwargs)
+        self.__stats.setdefault(address, RunningStats())
+        self.__quality.setdefault(address, LinkQuality())
+
+        if address not in self.__detectors:
+            self.__add_detector(address)
+
+        return target
+
+    def remove_target(self, address):
+        self.__engine.remove_target(address)
+
+    def record(self, sample: PingSample):
+        """
+        Add a sample to its target's statistics and hand it to the callbacks.
+        """
+        stats = self.__stats.get(sample.target)
+        if stats is None:
+            stats = self.__stats[sample.target] = RunningStats()
+
+        stats.add(sample)
+
+        quality = self.__quality.get(sample.target)
+        if quality is None:
+            quality = self.__quality[sample.target] = LinkQuality()
+
+        quality.add(sample)
+
+        detector = self.__detectors.get(sample.target)
+        if detector is None:
+            detector = self.__add_detector(sample.target)
+
+        detector.add(sample)
+
+        for callback in self.__callbacks:
+            callback(sample)
+
+    def __add_detector(self, address) -> AnomalyDetector:
+        detector = self.__detectors[address] = AnomalyDetector(address)
+        detector.add_callback(self.__notify_event)
+
+        return detector
+
+    def __notify_event(self, event: Event):
+        for callback in self.__event_callbacks:
+            callback(event)
+
+    def run(self, duration: Optional[float] = None):
+        """
+        Monitor the fleet in the calling thread until `stop()` is called or `duration` seconds have passed.
+        """
+        self.__stopping.clear()
+
+        if self.shards > 1:
+            self.__run_sharded(duration)
+        else:
+            asyncio.run(self.__run(duration))
+
+    def start(self, duration: Optional[float] = None):
+        """
+        Monitor the fleet from a background thread.
+
+        Raises:
+            WorkerAlreadyStartedError:
+                If the fleet is already running.
+        """
+        if self.__thread is not None and self.__thread.is_alive():
+            raise WorkerAlreadyStartedError(self.__thread.name, str(self))
+
+        self.__thread = threading.Thread(target=self.run, args=(duration,), name='PingFleet', daemon=True)
+        self.__thread.start()
+
+    def stop(self):
+        """
+        Stop monitoring and wait for the background thread (if any) to finish.
+
+        Raises:
+            WorkerNotStartedError:
+                If the fleet is not running.
+        """
+        if self.__sharded:
+            self.__stopping.set()
+        elif self.__loop is not None:
+            self.__loop.call_soon_threadsafe(self.__engine.stop)
+        else:
+            raise WorkerNotStartedError(self.__class__.__name__, str(self))
+
+        if self.__thread is not None and self.__thread is not threading.current_thread():
+            self.__thread.join()
+
+    def report(self) -> Dict[str, dict]:
+        """
+        Generate a report for every target.
+
+        Returns:
+            dict:
+                Per-target report dictionaries, keyed by address, with the target's `LinkQuality` under 'quality'.
+        """
+        return {
+            address: {**stats.as_dict(), 'quality': self.__quality[address].as_dict()}
+            for address, stats in self.__stats.items()
+        }
+
+    async def __run(self, duration):
+        self.__loop = asyncio.get_running_loop()
+        self.__cls_log.debug(f'Monitoring {len(self.__engine.targets)} targets')
+
+        if duration is not None:
+            self.__loop.call_later(duration, self.__engine.stop)
+
+        try:
+            async for sample in self.__engine.stream():
+                self.record(sample)
+        finally:
+            self.__loop = None
+
+    def __run_sharded(self, duration):
+        ring = HashRing(range(self.shards))
+        groups = [[] for _ in range(self.shards)]
+
+        for address, target in self.__engine.targets.items():
+            groups[ring.node_for(address)].append(
+                (address, target.interval, target.timeout, target.packet_size)
+            )
+
+        context = multiprocessing.get_context()
+        max_in_flight = max(1, self.max_in_flight // self.shards)
+        addresses = {}
+        processes = []
+
+        for group in groups:
+            if not group:
+                continue
+
+            parent_conn, child_conn = context.Pipe()
+            process = context.Process(
+                target=_run_shard,
+                args=(child_conn, group, max_in_flight, self.batch_size, self.flush_interval),
+                name=f'PingFleet-shard-{len(processes)}',
+                daemon=True
+            )
+            process.start()
+            child_conn.close()
+
+            addresses[parent_conn] = [target[0] for target in group]
+            processes.append(process)
+
+        self.__cls_log.debug(
+            f'Monitoring {len(self.__engine.targets)} targets across {len(processes)} shard processes'
+        )
+
+        self.__sharded = True
+        stop_at = None if duration is None else monotonic() + duration
+        stop_sent = False
+        open_conns = list(addresses)
+
+        try:
+            while open_conns:
+                if not stop_sent and (self.__stopping.is_set() or (stop_at is not None and monotonic() >= stop_at)):
+                    for conn in open_conns:
+                        try:
+                            conn.send_bytes(b'stop')
+                        except OSError:
+                            pass
+                    stop_sent = True
+
+                for conn in wait_for_connections(open_conns, timeout=.2):
+                    try:
+                        data = conn.recv_bytes()
+                    except (EOFError, OSError):
+                        open_conns.remove(conn)
+                        continue
+
+                    names = addresses[conn]
+                    for timestamp_ns, rtt, index, sequence, status in SHARD_RECORD.iter_unpack(data):
+                        self.record(
+                            PingSample(
+                                timestamp_ns,
+                                names[index],
+                                sequence,
+                                None if math.isnan(rtt) else rtt,
+                                status
+                            )
+                        )
+        finally:
+            for process in processes:
+                process.join(timeout=5)
+                if process.is_alive():
+                    process.terminate()
+
+            self.__sharded = False
+
+    def __repr__(self):
+        state = 'running' if self.running else 'not running'
+        return f'<PingFleet: {len(self.__stats)} targets, {state}>'
+
+
+"""
+The MIT License (MIT)
+Copyright © 2023 Inspyre Softworks - https://inspyre.tech
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE."""
@@ -0,0 +1,396 @@
+"""
+Project: PingPing
+Author: Inspyre Softworks - https://inspyre.tech
+Created: 10/18/2026 @ 9:20 AM
+File:
+  Name: icmp.py
+  Filepath: ping_stat/utils
+
+Low-level ICMP (IPv4) helpers shared by the probe engines: socket creation, echo request construction and reply
+parsing. Nothing in here blocks; callers decide how to wait on the socket.
+
+At high probe rates, building a fresh packet per probe costs more than sending it. `PacketTemplate` keeps one
+preallocated echo request per (identifier, size), patches just the sequence number and timestamp in place, and
+updates the checksum incrementally (RFC 1624) from the words that changed.
+
+A raw ICMP socket receives a copy of every ICMP packet the host gets, including replies meant for other processes.
+On Linux, `open_socket()` attaches a small BPF filter to raw sockets, so the kernel drops echo replies for other
+identifiers before they are copied to user space. Several processes probing at once (such as the shards of a
+`PingFleet`) then each only wake up for their own replies. Error messages (Time Exceeded, Unreachable) are rare and
+always let through, as their identifier is in the quoted packet.
+"""
+import ctypes
+import socket
+import struct
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional, Tuple
+
+
+ICMP_ECHO_REPLY = 0
+ICMP_DEST_UNREACHABLE = 3
+ICMP_ECHO_REQUEST = 8
+ICMP_TIME_EXCEEDED = 11
+
+ICMP_HEADER = struct.Struct('!BBHHH')
+TIMESTAMP = struct.Struct('!Q')
+
+# Byte offsets within an echo request.
+CHECKSUM_OFFSET = 2
+SEQUENCE_OFFSET = 6
+PAYLOAD_OFFSET = ICMP_HEADER.size
+
+_WORD = struct.Struct('!H')
+_TIMESTAMP_WORDS = struct.Struct('!4H')
+
+
+class IcmpMessage(NamedTuple):
+    """
+    A parsed ICMP message that refers to one of our echo requests.
+
+    Attributes:
+        type (int):
+            The ICMP type (`ICMP_ECHO_REPLY`, `ICMP_TIME_EXCEEDED`, ...).
+
+        code (int):
+            The ICMP code.
+
+        identifier (int):
+            The identifier of the echo request this message answers.
+
+        sequence (int):
+            The sequence number of the echo request this message answers.
+
+        responder (str):
+            The address of the host that sent the message.
+    """
+    type: int
+    code: int
+    identifier: int
+    sequence: int
+    responder: str
+
+
+def checksum(data: bytes) -> int:
+    """
+    Compute the Internet checksum (RFC 1071) of `data`.
+
+    Args:
+        data (bytes):
+            The bytes to checksum. An odd trailing byte is padded with zero.
+
+    Returns:
+        int:
+            The 16-bit one's complement checksum.
+    """
+    if len(data) % 2:
+        data += b'\x00'
+
+    total = sum(struct.unpack(f'!{len(data) // 2}H', data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+
+    return ~total & 0xFFFF
+
+
+def update_checksum(chksum: int, old_words, new_words) -> int:
+    """
+    Incrementally update an Internet checksum after some 16-bit words of the data changed (RFC 1624, eqn. 3).
+
+    Args:
+        chksum (int):
+            The checksum before the change.
+        old_words (iterable):
+            The old values of the changed words.
+        new_words (iterable):
+            The new values of the changed words, in the same order.
+
+    Returns:
+        int:
+            The checksum of the changed data.
+    """
+    total = ~chksum & 0xFFFF
+
+    for old, new in zip(old_words, new_words):
+        total += (~old & 0xFFFF) + new
+
+    while total >> 16:
+        total = (total & 0xFFFF) + (total >> 16)
+
+    return ~total & 0xFFFF
+
+
+def build_echo_request(identifier: int, sequence: int, size: int = 56) -> bytes:
+    """
+    Build an ICMP echo request.
+
+    The first eight bytes of the payload carry the monotonic send time in nanoseconds (when `size` allows it); the
+    rest is filler.
+
+    Args:
+        identifier (int):
+            The ICMP identifier.
+        sequence (int):
+            The ICMP sequence number.
+        size (int):
+            The payload size in bytes.
+
+    Returns:
+        bytes:
+            The complete ICMP packet, checksum included.
+    """
+    payload = bytearray(b'Q' * size)
+
+    if size >= TIMESTAMP.size:
+        TIMESTAMP.pack_into(payload, 0, time.monotonic_ns())
+
+    header = ICMP_HEADER.pack(ICMP_ECHO_REQUEST, 0, 0, identifier & 0xFFFF, sequence & 0xFFFF)
+    chksum = checksum(header + payload)
+
+    return ICMP_HEADER.pack(ICMP_ECHO_REQUEST, 0, chksum, identifier & 0xFFFF, sequence & 0xFFFF) + payload
+
+
+class PacketTemplate:
+    """
+    A reusable echo request for one identifier and payload size.
+
+    `render()` patches the sequence number and payload timestamp into the same preallocated buffer and updates the
+    checksum incrementally, so no packet is built, allocated or fully checksummed per probe.
+
+    Note:
+        The returned buffer is overwritten by the next `render()`. Send it (or copy it) before rendering again, and
+        do not share one template between threads without a lock.
+    """
+    __slots__ = ('identifier', 'size', 'buffer', '__view', '__timestamped')
+
+    def __init__(self, identifier: int, size: int):
+        self.identifier = identifier & 0xFFFF
+        self.size = size
+        self.buffer = bytearray(b'\x00' * (PAYLOAD_OFFSET + size))
+
+        # Build the constant parts once, with a zero sequence and timestamp, and checksum them in full.
+        ICMP_HEADER.pack_into(self.buffer, 0, ICMP_ECHO_REQUEST, 0, 0, self.identifier, 0)
+        self.buffer[PAYLOAD_OFFSET:] = b'Q' * size
+        self.__timestamped = size >= TIMESTAMP.size
+
+        if self.__timestamped:
+            TIMESTAMP.pack_into(self.buffer, PAYLOAD_OFFSET, 0)
+
+        _WORD.pack_into(self.buffer, CHECKSUM_OFFSET, checksum(bytes(self.buffer)))
+        self.__view = memoryview(self.buffer)
+
+    def render(self, sequence: int, timestamp_ns: Optional[int] = None) -> memoryview:
+        """
+        Patch `sequence` and the timestamp into the template.
+
+        Args:
+            sequence (int):
+                The ICMP sequence number.
+            timestamp_ns (int, optional):
+                The timestamp to put in the payload. Defaults to `time.monotonic_ns()`.
+
+        Returns:
+            memoryview:
+                A view of the ready-to-send packet.
+        """
+        buffer = self.buffer
+        old = [_WORD.unpack_from(buffer, SEQUENCE_OFFSET)[0]]
+        new = [sequence & 0xFFFF]
+        _WORD.pack_into(buffer, SEQUENCE_OFFSET, new[0])
+
+        if self.__timestamped:
+            old.extend(_TIMESTAMP_WORDS.unpack_from(buffer, PAYLOAD_OFFSET))
+            TIMESTAMP.pack_into(buffer, PAYLOAD_OFFSET, time.monotonic_ns() if timestamp_ns is None else timestamp_ns)
+            new.extend(_TIMESTAMP_WORDS.unpack_from(buffer, PAYLOAD_OFFSET))
+
+        chksum = _WORD.unpack_from(buffer, CHECKSUM_OFFSET)[0]
+        _WORD.pack_into(buffer, CHECKSUM_OFFSET, update_checksum(chksum, old, new))
+
+        return self.__view
+
+
+class PacketTemplateCache:
+    """
+    A bounded, thread-safe cache of `PacketTemplate` objects keyed by (identifier, size).
+
+    The least recently used template is dropped once `max_templates` is exceeded.
+    """
+
+    def __init__(self, max_templates: int = 64):
+        self.max_templates = max_templates
+        self.__templates = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.__templates)
+
+    def get(self, identifier: int, size: int) -> PacketTemplate:
+        key = (identifier & 0xFFFF, size)
+
+        with self.__lock:
+            template = self.__templates.get(key)
+
+            if template is None:
+                template = self.__templates[key] = PacketTemplate(identifier, size)
+
+                if len(self.__templates) > self.max_templates:
+                    self.__templates.popitem(last=False)
+            else:
+                self.__templates.move_to_end(key)
+
+            return template
+
+
+def parse_message(data: bytes, address: str, raw: bool) -> Optional[IcmpMessage]:
+    """
+    Parse an incoming datagram into an `IcmpMessage`.
+
+    Echo replies are returned as-is. Time Exceeded and Destination Unreachable messages are unwrapped so that the
+    identifier and sequence of the original echo request are reported.
+
+    Args:
+        data (bytes):
+            The datagram as returned by `recvfrom`.
+        address (str):
+            The source address returned by `recvfrom`.
+        raw (bool):
+            Whether the datagram came from a raw socket (and so starts with an IP header).
+
+    Returns:
+        IcmpMessage or None:
+            The parsed message, or None if it is not related to an echo request.
+    """
+    if raw:
+        if len(data) < 20:
+            return None
+        data = data[(data[0] & 0x0F) * 4:]
+
+    if len(data) < ICMP_HEADER.size:
+        return None
+
+    icmp_type, code, _, identifier, sequence = ICMP_HEADER.unpack_from(data)
+
+    if icmp_type == ICMP_ECHO_REPLY:
+        return IcmpMessage(icmp_type, code, identifier, sequence, address)
+
+    if icmp_type in (ICMP_TIME_EXCEEDED, ICMP_DEST_UNREACHABLE):
+        # The original IP header and the first eight bytes of our echo request follow the ICMP header.
+        inner = data[ICMP_HEADER.size:]
+        if len(inner) < 20:
+            return None
+
+        inner = inner[(inner[0] & 0x0F) * 4:]
+        if len(inner) < ICMP_HEADER.size:
+            return None
+
+        inner_type, _, _, identifier, sequence = ICMP_HEADER.unpack_from(inner)
+        if inner_type != ICMP_ECHO_REQUEST:
+            return None
+
+        return IcmpMessage(icmp_type, code, identifier, sequence, address)
+
+    return None
+
+
+SO_ATTACH_FILTER = 26
+"""The Linux socket option that attaches a classic BPF program to a socket."""
+
+_BPF_INSTRUCTION = struct.Struct('HBBI')
+_BPF_PROGRAM = struct.Struct('HL')
+
+
+def _identifier_filter(identifier: int) -> bytes:
+    # Classic BPF over a raw IPv4 ICMP packet (which starts at the IP header). Accept echo replies carrying
+    # `identifier`, and every Destination Unreachable and Time Exceeded; drop everything else.
+    program = (
+        (0xb1, 0, 0, 0),                     # 0: X = IP header length
+        (0x50, 0, 0, 0),                     # 1: A = ICMP type
+        (0x15, 3, 0, ICMP_ECHO_REPLY),       # 2: echo reply -> 6
+        (0x15, 4, 0, ICMP_DEST_UNREACHABLE), # 3: -> accept
+        (0x15, 3, 0, ICMP_TIME_EXCEEDED),    # 4: -> accept
+        (0x06, 0, 0, 0),                     # 5: drop
+        (0x48, 0, 0, 4),                     # 6: A = echo identifier
+        (0x15, 0, 1, identifier),            # 7: ours -> accept, else drop
+        (0x06, 0, 0, 0x40000),               # 8: accept
+        (0x06, 0, 0, 0),                     # 9: drop
+    )
+
+    return b''.join(_BPF_INSTRUCTION.pack(*instruction) for instruction in program)
+
+
+def attach_identifier_filter(sock: socket.socket, identifier: int) -> bool:
+    """
+    Have the kernel drop echo replies for any identifier but `identifier` on a raw ICMP socket.
+
+    Returns:
+        bool:
+            True if the filter was attached. It is only supported on Linux; elsewhere the caller keeps filtering on
+            the identifier itself, as it must anyway.
+    """
+    if not sys.platform.startswith('linux'):
+        return False
+
+    instructions = _identifier_filter(identifier)
+    buffer = ctypes.create_string_buffer(instructions)
+
+    try:
+        # The kernel copies the program during the call, so `buffer` only has to outlive it.
+        sock.setsockopt(
+            socket.SOL_SOCKET,
+            SO_ATTACH_FILTER,
+            _BPF_PROGRAM.pack(len(instructions) // _BPF_INSTRUCTION.size, ctypes.addressof(buffer))
+        )
+    except OSError:
+        return False
+
+    return True
+
+
+def open_socket(blocking: bool = True, identifier: Optional[int] = None) -> Tuple[socket.socket, bool]:
+    """
+    Open an ICMP socket.
+
+    A raw socket is preferred (as `ping3` does); if the process lacks the privileges for one, an unprivileged
+    datagram ICMP socket is used instead. The kernel already delivers only the process's own replies to a datagram
+    socket. For a raw socket, pass `identifier` to have the kernel filter replies too (see
+    `attach_identifier_filter`).
+
+    Note:
+        On datagram ICMP sockets the kernel rewrites the echo identifier, so callers should only match replies on
+        the sequence number when `raw` is False.
+
+    Args:
+        blocking (bool):
+            Whether the socket should be left in blocking mode.
+        identifier (int, optional):
+            The echo identifier the caller sends with, to filter a raw socket on.
+
+    Returns:
+        tuple:
+            The socket and a flag that is True if it is a raw socket.
+    """
+    try:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_ICMP)
+        raw = True
+    except PermissionError:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_ICMP)
+        raw = False
+
+    if raw and identifier is not None:
+        attach_identifier_filter(sock, identifier)
+
+    sock.setblocking(blocking)
+
+    return sock, raw
+
+
+"""
+The MIT License (MIT)
+Copyright © 2023 Inspyre Softworks - https://inspyre.tech
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE."""
@@ -0,0 +1,595 @@
+"""
+Project: PingPing
+Author: Inspyre Softworks - https://inspyre.tech
+Created: 10/18/2026 @ 10:05 AM
+File:
+  Name: multiplexer.py
+  Filepath: ping_stat/utils
+
+A long-lived ICMP socket shared by every `Ping` and `TTLTest` in the process. Probes are sent from the caller's
+thread; a single receiver thread matches replies back to the waiting probe by ICMP identifier and sequence number
+and expires probes whose deadline passes.
+
+Usage:
+    from ping_stat.utils.multiplexer import get_multiplexer
+
+    rtt = get_multiplexer().ping('inspyre.tech', timeout=2)
+"""
+import heapq
+import itertools
+import os
+import select
+import socket
+import threading
+from time import monotonic_ns, sleep, time_ns
+from typing import Callable, List, Optional
+
+from pypattyrn.behavioral.null import Null
+
+from ping_stat.models.samples import STATUS_ERROR, STATUS_OK, STATUS_TIMEOUT, STATUS_TTL_EXCEEDED, \
+    STATUS_UNREACHABLE
+from ping_stat.utils.icmp import ICMP_ECHO_REPLY, ICMP_TIME_EXCEEDED, PacketTemplateCache, open_socket, \
+    parse_message
+from ping_stat.utils.resolver import get_resolver
+
+
+DEFAULT_TTL = 64
+
+SPIN_NS = 1_000_000
+"""How close to a deadline (in nanoseconds) `send_train` stops sleeping and busy-waits instead."""
+
+
+class PendingProbe:
+    """
+    A probe that has been sent and is (or was) waiting for a reply.
+
+    Attributes:
+        address (str):
+            The IP address or hostname the probe was sent to.
+
+        resolved (str or None):
+            The IPv4 address `address` resolved to.
+
+        sequence (int):
+            The ICMP sequence number of the probe.
+
+        ttl (int or None):
+            The TTL the probe was sent with, if one was set.
+
+        sent_ns (int):
+            Monotonic send time in nanoseconds.
+
+        sent_wall_ns (int):
+            Wall-clock send time in nanoseconds since the epoch.
+
+        deadline_ns (int):
+            Monotonic time (nanoseconds) after which the probe counts as timed out.
+
+        rtt (float or None):
+            Seconds until a reply (echo reply, Time Exceeded or Unreachable) arrived, or None.
+
+        status (int or None):
+            One of the `STATUS_*` constants from `ping_stat.models.samples`, or None while the probe is pending.
+
+        responder (str or None):
+            The address that answered the probe.
+    """
+    __slots__ = (
+        'address', 'resolved', 'identifier', 'sequence', 'ttl', 'sent_ns', 'sent_wall_ns', 'deadline_ns',
+        'rtt', 'status', 'responder', '_event', '_callback'
+    )
+
+    from ping_stat.logging import add_child
+
+    __cls_log = add_child('PingPing.PendingProbe')
+
+    def __init__(self, address, identifier, sequence, ttl, deadline_ns, callback=None):
+        self.address = address
+        self.resolved = None
+        self.identifier = identifier
+        self.sequence = sequence
+        self.ttl = ttl
+        self.sent_ns = 0
+        self.sent_wall_ns = 0
+        self.deadline_ns = deadline_ns
+        self.rtt = None
+        self.status = None
+        self.responder = None
+        self._event = threading.Event()
+        self._callback = callback
+
+    @property
+    def done(self) -> bool:
+        return self._event.is_set()
+
+    @property
+    def result(self):
+        """
+        float, None or False:
+            The round-trip time in seconds for an echo reply, None on timeout and False for any other outcome. This
+            mirrors the return value of `ping3.ping`.
+        """
+        if self.status == STATUS_OK:
+            return self.rtt
+
+        if self.status in (None, STATUS_TIMEOUT):
+            return None
+
+        return False
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until the probe has been answered or has expired.
+
+        Args:
+            timeout (float, optional):
+                The longest time in seconds to wait. Defaults to waiting until the probe's own deadline.
+
+        Returns:
+            bool:
+                True if the probe is done.
+        """
+        return self._event.wait(timeout)
+
+    def _finish(self, status, rtt=None, responder=None):
+        self.status = status
+        self.rtt = rtt
+        self.responder = responder
+        self._event.set()
+
+        if self._callback is None:
+            return
+
+        # Callbacks usually run on the shared receiver thread. An exception escaping here would kill it, and with it
+        # every probe in the process, so it is logged instead.
+        try:
+            self._callback(self)
+        except Exception as e:
+            self.__cls_log.error(f'Callback for probe {self.sequence} to {self.address} failed: {e!r}')
+
+    def __repr__(self):
+        return f'<PendingProbe: {self.address} seq={self.sequence} status={self.status} rtt={self.rtt}>'
+
+
+class IcmpMultiplexer:
+    """
+    One ICMP socket, many concurrent probes.
+
+    Probes can be sent from any thread. Outstanding probes are kept in a map keyed by (identifier, sequence)
+    alongside a heap of their deadlines, and a single receiver thread resolves them as replies arrive or deadlines
+    pass.
+
+    Note:
+        You normally want the process-wide instance from `get_multiplexer()` rather than building your own.
+    """
+    from ping_stat.logging import add_child
+
+    __cls_log = add_child('PingPing.IcmpMultiplexer')
+
+    def __init__(self, log_device=Null()):
+        self.log_device = log_device
+
+        self.__identifier = (os.getpid() ^ id(self)) & 0xFFFF
+        self.__sequence = 0
+        self.__ttl = DEFAULT_TTL
+
+        self.__pending = {}
+        self.__deadlines = []
+        self.__tiebreak = itertools.count()
+        self.__lock = threading.Lock()
+
+        # Templates are only rendered while holding `__lock`, so one buffer per (identifier, size) is safe to share.
+        self.__templates = PacketTemplateCache()
+
+        self.__socket = None
+        self.__raw = True
+        self.__wake_r = None
+        self.__wake_w = None
+        self.__thread = None
+        self.__running = False
+
+    @property
+    def identifier(self) -> int:
+        return self.__identifier
+
+    @property
+    def in_flight(self) -> int:
+        """
+        int:
+            The number of probes currently waiting for a reply.
+        """
+        return len(self.__pending)
+
+    @property
+    def running(self) -> bool:
+        return self.__running
+
+    @property
+    def thread(self) -> Optional[threading.Thread]:
+        return self.__thread
+
+    def open(self):
+        """
+        Open the socket and start the receiver thread. Called automatically by the first `send()`.
+        """
+        with self.__lock:
+            if self.__running:
+                return
+
+            self.__socket, self.__raw = open_socket(blocking=False, identifier=self.__identifier)
+            self.__wake_r, self.__wake_w = socket.socketpair()
+            self.__wake_r.setblocking(False)
+            self.__running = True
+
+            self.__thread = threading.Thread(target=self.__receiver, name='IcmpMultiplexer', daemon=True)
+            self.__thread.start()
+
+        self.__cls_log.debug(f'Opened shared {"raw" if self.__raw else "datagram"} ICMP socket')
+
+    def close(self):
+        """
+        Stop the receiver thread and close the socket. Probes still in flight are marked as errors.
+        """
+        with self.__lock:
+            if not self.__running:
+                return
+
+            self.__running = False
+
+        self.__wake()
+        self.__thread.join()
+
+        with self.__lock:
+            pending = list(self.__pending.values())
+            self.__pending.clear()
+            self.__deadlines.clear()
+
+            self.__socket.close()
+            self.__wake_r.close()
+            self.__wake_w.close()
+
+        for probe in pending:
+            probe._finish(STATUS_ERROR)
+
+    def send(
+            self,
+            address: str,
+            timeout: float = 5,
+            size: int = 56,
+            ttl: Optional[int] = None,
+            callback: Optional[Callable[[PendingProbe], None]] = None
+    ) -> PendingProbe:
+        """
+        Send one echo request without waiting for the reply.
+
+        Args:
+            address (str):
+                The IP address or hostname to probe.
+            timeout (float):
+                Seconds to wait for a reply before the probe expires.
+            size (int):
+                The payload size in bytes.
+            ttl (int, optional):
+                The IP time-to-live to send the probe with.
+            callback (callable, optional):
+                Called from the receiver thread with the `PendingProbe` once it is done.
+
+        Returns:
+            PendingProbe:
+                The probe. Call `wait()` on it, or poll `done`.
+        """
+        if not self.__running:
+            self.open()
+
+        try:
+            resolved = get_resolver().resolve(address)
+        except OSError as e:
+            self.__cls_log.debug(f'Could not resolve {address}: {e}')
+            probe = PendingProbe(address, self.__identifier, 0, ttl, monotonic_ns(), callback)
+            probe.sent_wall_ns = time_ns()
+            probe.sent_ns = probe.deadline_ns
+            probe._finish(STATUS_ERROR)
+            return probe
+
+        with self.__lock:
+            sequence = self.__next_sequence()
+            probe = PendingProbe(address, self.__identifier, sequence, ttl, 0, callback)
+            probe.resolved = resolved
+
+            try:
+                self.__set_ttl(ttl or DEFAULT_TTL)
+                probe.sent_wall_ns = time_ns()
+                probe.sent_ns = monotonic_ns()
+                self.__sendto(self.__templates.get(self.__identifier, size).render(sequence, probe.sent_ns), resolved)
+            except OSError as e:
+                self.__cls_log.debug(f'Probe to {address} failed: {e}')
+                probe._finish(STATUS_ERROR)
+                return probe
+
+            probe.deadline_ns = probe.sent_ns + int(timeout * 1e9)
+
+            self.__pending[(self.__identifier, sequence)] = probe
+            earliest = not self.__deadlines or probe.deadline_ns < self.__deadlines[0][0]
+            heapq.heappush(self.__deadlines, (probe.deadline_ns, next(self.__tiebreak), probe))
+
+        if earliest:
+            self.__wake()
+
+        return probe
+
+    def send_train(
+            self,
+            address: str,
+            count: int,
+            interval: float,
+            timeout: float = 5,
+            size: int = 56,
+            ttl: Optional[int] = None,
+            callback: Optional[Callable[[PendingProbe], None]] = None,
+            start_ns: Optional[int] = None
+    ) -> List[PendingProbe]:
+        """
+        Send `count` echo requests, `interval` seconds apart, from a tight loop.
+
+        The address is resolved and every sequence number reserved before the first send, so each iteration of the
+        loop only waits for its deadline, patches the sequence number into a prebuilt packet template, and sends. The last stretch before each deadline
+        is busy-waited, which keeps the spacing accurate at intervals of a few milliseconds.
+
+        Args:
+            address (str):
+                The IP address or hostname to probe.
+            count (int):
+                The number of probes to send.
+            interval (float):
+                Seconds between probes.
+            timeout (float):
+                Seconds to wait for each reply.
+            size (int):
+                The payload size in bytes.
+            ttl (int, optional):
+                The IP time-to-live to send the probes with.
+            callback (callable, optional):
+                Called with each `PendingProbe` once it is done.
+            start_ns (int, optional):
+                The monotonic time (nanoseconds) the first probe is due. Defaults to now. Back-to-back trains pass
+                the previous start plus `count` intervals, so the schedule does not drift between trains.
+
+        Returns:
+            list:
+                The `PendingProbe` objects, in send order.
+        """
+        if interval <= 0:
+            raise ValueError('"interval" must be positive')
+
+        if not self.__running:
+            self.open()
+
+        try:
+            resolved = get_resolver().resolve(address)
+        except OSError as e:
+            self.__cls_log.debug(f'Could not resolve {address}: {e}')
+            probes = [PendingProbe(address, self.__identifier, 0, ttl, monotonic_ns(), callback) for _ in range(count)]
+            for probe in probes:
+                probe.sent_wall_ns = time_ns()
+                probe.sent_ns = probe.deadline_ns
+                probe._finish(STATUS_ERROR)
+            return probes
+
+        probes = []
+        template = self.__templates.get(self.__identifier, size)
+
+        with self.__lock:
+            for _ in range(count):
+                sequence = self.__next_sequence()
+                probe = PendingProbe(address, self.__identifier, sequence, ttl, 0, callback)
+                probe.resolved = resolved
+
+                # Reserve the sequence number now; the deadline is only armed once the probe is actually sent.
+                self.__pending[(self.__identifier, sequence)] = probe
+                probes.append(probe)
+
+        timeout_ns = int(timeout * 1e9)
+        interval_ns = int(interval * 1e9)
+        started = monotonic_ns() if start_ns is None else start_ns
+
+        for index, probe in enumerate(probes):
+            _wait_until(started + index * interval_ns)
+
+            with self.__lock:
+                try:
+                    self.__set_ttl(ttl or DEFAULT_TTL)
+                    probe.sent_wall_ns = time_ns()
+                    probe.sent_ns = monotonic_ns()
+                    self.__sendto(template.render(probe.sequence, probe.sent_ns), resolved)
+                except OSError as e:
+                    self.__cls_log.debug(f'Probe to {address} failed: {e}')
+                    del self.__pending[(probe.identifier, probe.sequence)]
+                    probe._finish(STATUS_ERROR)
+                    continue
+
+                probe.deadline_ns = probe.sent_ns + timeout_ns
+                earliest = not self.__deadlines or probe.deadline_ns < self.__deadlines[0][0]
+                heapq.heappush(self.__deadlines, (probe.deadline_ns, next(self.__tiebreak), probe))
+
+            if earliest:
+                self.__wake()
+
+        return probes
+
+    def ping(self, address: str, timeout: float = 5, size: int = 56, ttl: Optional[int] = None):
+        """
+        Send one echo request and wait for the outcome.
+
+        Args:
+            address (str):
+                The IP address or hostname to probe.
+            timeout (float):
+                Seconds to wait for a reply.
+            size (int):
+                The payload size in bytes.
+            ttl (int, optional):
+                The IP time-to-live to send the probe with.
+
+        Returns:
+            float, None or False:
+                The round-trip time in seconds, None on timeout, or False if the probe failed (unknown host, TTL
+                exceeded, unreachable), just like `ping3.ping`.
+        """
+        probe = self.send(address, timeout=timeout, size=size, ttl=ttl)
+        probe.wait()
+
+        return probe.result
+
+    def __next_sequence(self) -> int:
+        for _ in range(0x10000):
+            self.__sequence = (self.__sequence + 1) & 0xFFFF
+            if (self.__identifier, self.__sequence) not in self.__pending:
+                return self.__sequence
+
+        raise RuntimeError('No free ICMP sequence numbers; too many probes in flight')
+
+    def __set_ttl(self, ttl):
+        if ttl != self.__ttl:
+            self.__socket.setsockopt(socket.IPPROTO_IP, socket.IP_TTL, ttl)
+            self.__ttl = ttl
+
+    def __sendto(self, packet, address):
+        while True:
+            try:
+                self.__socket.sendto(packet, (address, 0))
+                return
+            except BlockingIOError:
+                select.select([], [self.__socket], [], 1)
+
+    def __wake(self):
+        try:
+            self.__wake_w.send(b'\x00')
+        except OSError:
+            pass
+
+    def __receiver(self):
+        while self.__running:
+            with self.__lock:
+                wait = (self.__deadlines[0][0] - monotonic_ns()) / 1e9 if self.__deadlines else None
+
+            if wait is None or wait > 0:
+                try:
+                    readable, _, _ = select.select([self.__socket, self.__wake_r], [], [], wait)
+                except (OSError, ValueError):
+                    return
+
+                if self.__wake_r in readable:
+                    try:
+                        while self.__wake_r.recv(4096):
+                            pass
+                    except BlockingIOError:
+                        pass
+
+                if self.__socket in readable:
+                    self.__read_replies()
+
+            self.__expire()
+
+    def __read_replies(self):
+        while True:
+            try:
+                data, (responder, _) = self.__socket.recvfrom(65535)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError as e:
+                self.__cls_log.debug(f'Error reading from ICMP socket: {e}')
+                return
+
+            received_ns = monotonic_ns()
+            message = parse_message(data, responder, self.__raw)
+
+            if message is None:
+                continue
+
+            # Datagram sockets have their identifier rewritten by the kernel, which also filters replies for us.
+            identifier = message.identifier if self.__raw else self.__identifier
+
+            with self.__lock:
+                probe = self.__pending.get((identifier, message.sequence))
+
+                if probe is None:
+                    continue
+
+                if message.type == ICMP_ECHO_REPLY and message.responder != probe.resolved:
+                    continue
+
+                del self.__pending[(identifier, message.sequence)]
+
+            if message.type == ICMP_ECHO_REPLY:
+                status = STATUS_OK
+            elif message.type == ICMP_TIME_EXCEEDED:
+                status = STATUS_TTL_EXCEEDED
+            else:
+                status = STATUS_UNREACHABLE
+
+            probe._finish(status, (received_ns - probe.sent_ns) / 1e9, message.responder)
+
+    def __expire(self):
+        now = monotonic_ns()
+        expired = []
+
+        with self.__lock:
+            while self.__deadlines and self.__deadlines[0][0] <= now:
+                probe = heapq.heappop(self.__deadlines)[-1]
+                key = (probe.identifier, probe.sequence)
+
+                if self.__pending.get(key) is probe:
+                    del self.__pending[key]
+                    expired.append(probe)
+
+        for probe in expired:
+            probe._finish(STATUS_TIMEOUT)
+
+    def __repr__(self):
+        if self.__running:
+            return f'<IcmpMultiplexer: {"raw" if self.__raw else "datagram"} socket, {self.in_flight} in flight>'
+
+        return '<IcmpMultiplexer: closed>'
+
+
+def _wait_until(deadline_ns: int):
+    remaining = deadline_ns - monotonic_ns()
+
+    if remaining > SPIN_NS:
+        sleep((remaining - SPIN_NS) / 1e9)
+
+    while monotonic_ns() < deadline_ns:
+        pass
+
+
+_multiplexer = None
+_multiplexer_lock = threading.Lock()
+
+
+def get_multiplexer() -> IcmpMultiplexer:
+    """
+    Get the process-wide `IcmpMultiplexer`, creating it on first use.
+
+    A forked child gets a fresh instance rather than sharing its parent's socket and receiver thread.
+
+    Returns:
+        IcmpMultiplexer:
+            The shared multiplexer.
+    """
+    global _multiplexer
+
+    with _multiplexer_lock:
+        if _multiplexer is None or _multiplexer[0] != os.getpid():
+            _multiplexer = (os.getpid(), IcmpMultiplexer())
+
+        return _multiplexer[1]
+
+
+"""
+The MIT License (MIT)
+Copyright © 2023 Inspyre Softworks - https://inspyre.tech
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE."""
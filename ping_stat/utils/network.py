@@ -10,11 +10,14 @@ network operations, including the following:
 1. Pinging operations on a specific target (IP address or hostname).
 2. Generating network operation reports.
 3. Managing the state and execution of the PingWorker and PingMonitor classes.
+4. Probing many targets at once from a single asyncio event loop.
 
 Classes:
 - Ping: This class represents a ping operation on a target. It has several configurable parameters like
   target IP or hostname, timeout, and the number of times to perform the operation. It can also perform
   the operation automatically upon initialization.
+- PingEngine: An asyncio engine that probes any number of targets over one non-blocking ICMP socket and yields
+  the results as a stream of `PingSample` objects.
 
 Attributes:
 - console: An instance of the rich.console.Console class for console operations.
@@ -36,17 +39,31 @@ legal or otherwise, caused by its use. Pinging a target is not a passive operati
 intrusion detection systems or firewall logs. Irresponsible use of this tool could potentially cause a
 denial of service to the target system's network services, or your own.
 """
-from ping3 import ping as _ping
+import asyncio
+import os
 from ping_stat.errors import RedundantWorkOrderError, WorkerAlreadyStartedError
-
-from ping_stat.utils import gather_times
+from ping_stat.models.detector import AnomalyDetector
+from ping_stat.models.history import DEFAULT_CAPACITY, SampleHistory
+from ping_stat.models.quality import LinkQuality
+from ping_stat.models.rollups import Rollups
+from ping_stat.models.stats import RunningStats
+from ping_stat.models.windows import SlidingWindow
+from ping_stat.models.samples import PingSample, ReorderBuffer, STATUS_ERROR, STATUS_OK, STATUS_TIMEOUT, \
+    STATUS_TTL_EXCEEDED, STATUS_UNREACHABLE
+from ping_stat.storage.sqlite import SQLiteSink
+from ping_stat.utils.icmp import ICMP_ECHO_REPLY, ICMP_TIME_EXCEEDED, PacketTemplateCache, open_socket, \
+    parse_message
+from ping_stat.utils.multiplexer import get_multiplexer
+from ping_stat.utils.resolver import get_resolver
+from ping_stat.utils.scheduler import PeriodicScheduler
 from ping_stat.utils.workers import PingMonitor, PingWorker
 from pypattyrn.behavioral.null import Null
 import queue
 from rich.console import Console
-from statistics import mean, median
+from statistics import median
 from threading import Thread
-from time import sleep, time
+from time import monotonic, monotonic_ns, sleep, time, time_ns
+from typing import Dict, Iterable, Optional
 
 
 console = Console()
@@ -54,6 +71,12 @@ console = Console()
 
 track_mean = False
 
+MIN_INTERVAL = 0.01
+"""The shortest supported time (in seconds) between probes to one target."""
+
+DEFAULT_WINDOWS = ({'duration': 60}, {'size': 100})
+"""The sliding windows every `Ping` keeps: the last 60 seconds and the last 100 results."""
+
 
 class Ping:
     """
@@ -81,7 +104,25 @@ class Ping:
             The time in seconds to wait for a response before timing out.
 
         runs (int):
-            The number of times to send a ping request to the target.
+            The number of times `ping()` sends a ping request to the target. Continuous pinging sends one per
+            interval, or trains of `runs` in high-rate mode.
+
+        interval (float):
+            The time in seconds between ping attempts, down to `MIN_INTERVAL`.
+
+        pipelined (bool):
+            Whether `ping()` and continuous pinging send probes on the interval schedule without waiting for earlier
+            replies.
+
+        high_rate (bool):
+            Whether `ping()` and continuous pinging send prebuilt packets from a tight send loop, for intervals well
+            below a second.
+
+        history (SampleHistory):
+            The most recent `history_size` results from continuous pinging, in a fixed-size ring buffer.
+
+        rollups (Rollups):
+            Per-minute and per-hour aggregates of every result, for reports over longer periods than `history`.
 
     Methods:
         ping():
@@ -103,9 +144,18 @@ class Ping:
     __results = None
     __interval = 1
     __size = 256
-    __history = []
+    __history = None
+    __rollups = None
+    __stats = None
+    __quality = None
+    __detector = None
+    __windows = None
+    __history_size = DEFAULT_CAPACITY
+    __database = None
     __monitoring = False
     __continuous_ping = False
+    __pipelined = False
+    __high_rate = False
 
     def __init__(
             self,
@@ -119,7 +169,11 @@ class Ping:
             packet_size=__size,
             live_mode=None,
             debug_mode=False,
-            gui_mode=False
+            gui_mode=False,
+            pipelined=__pipelined,
+            high_rate=__high_rate,
+            history_size=__history_size,
+            database=None
     ):
         """
         Initializes the Ping object.
@@ -133,6 +187,17 @@ class Ping:
                 The time in seconds to wait for a response before timing out.
             runs (int):
                 The number of times to send a ping request to the target.
+            pipelined (bool):
+                Whether to send probes on the interval schedule without waiting for earlier replies. A run of N
+                probes then takes about N × interval plus one timeout, rather than up to N × (timeout + interval).
+            high_rate (bool):
+                Whether to prebuild every packet and send them from a tight loop. Use this (with an interval as low
+                as `MIN_INTERVAL`) for short link-quality tests at 50–100 probes per second.
+            history_size (int):
+                How many results `history` keeps before overwriting the oldest. Memory use is fixed at about
+                19 bytes per sample, whatever the run time.
+            database (SQLiteSink):
+                A database to also write every result to, for reports longer than `history` can hold.
 
         Raises:
             TypeError:
@@ -159,6 +224,31 @@ class Ping:
         self.interval = interval
         log.debug(f'Ping interval: {self.interval}')
 
+        self.pipelined = pipelined
+        log.debug(f'Pipelined: {self.pipelined}')
+
+        self.high_rate = high_rate
+        log.debug(f'High-rate mode: {self.high_rate}')
+
+        self.__history = SampleHistory(history_size, target=self.target)
+        log.debug(f'History size: {self.__history.capacity}')
+
+        self.__rollups = Rollups(self.target)
+
+        self.__stats = RunningStats()
+
+        self.__quality = LinkQuality()
+
+        self.__detector = AnomalyDetector(self.target)
+
+        self.__windows = {}
+        for window in DEFAULT_WINDOWS:
+            self.add_window(**window)
+
+        self.__callbacks = []
+
+        self.database = database
+
         self.__debug_mode = debug_mode
 
         self.__ping_worker = None
@@ -215,16 +305,51 @@ class Ping:
         return self.__continuous_ping
 
     @property
-    def interval(self) -> int:
+    def interval(self) -> float:
+        """
+        float:
+            The time in seconds between ping attempts.
+        """
         return self.__interval
 
     @interval.setter
     def interval(self, new):
-        if not isinstance(new, int):
-            raise TypeError('"interval" must be of type "int".')
+        """
+        Sets the interval attribute.
+
+        Args:
+            new (float):
+                The time in seconds between ping attempts.
+
+        Raises:
+            TypeError:
+                If new is not a float or an integer.
+            ValueError:
+                If new is shorter than `MIN_INTERVAL`.
+        """
+        if not isinstance(new, (int, float)) or isinstance(new, bool):
+            raise TypeError('"interval" must be a float or an integer.')
+
+        if new < MIN_INTERVAL:
+            raise ValueError(f'"interval" must be at least {MIN_INTERVAL} seconds.')
 
         self.__interval = new
 
+    @property
+    def high_rate(self) -> bool:
+        """
+        bool:
+            Whether `ping()` sends prebuilt packets from a tight send loop.
+        """
+        return self.__high_rate
+
+    @high_rate.setter
+    def high_rate(self, new):
+        if not isinstance(new, bool):
+            raise TypeError('"high_rate" must be of type "bool".')
+
+        self.__high_rate = new
+
     @property
     def gui_mode(self) -> bool:
         return self.__gui_mode
@@ -250,6 +375,21 @@ class Ping:
 
         self.__size = new
 
+    @property
+    def pipelined(self) -> bool:
+        """
+        bool:
+            Whether `ping()` sends probes on the interval schedule without waiting for earlier replies.
+        """
+        return self.__pipelined
+
+    @pipelined.setter
+    def pipelined(self, new):
+        if not isinstance(new, bool):
+            raise TypeError('"pipelined" must be of type "bool".')
+
+        self.__pipelined = new
+
     @property
     def ping_worker(self):
         return self.__ping_worker
@@ -285,6 +425,15 @@ class Ping:
 
         self.__target = new
 
+        if self.__history is not None:
+            self.__history.target = new
+
+        if self.__rollups is not None:
+            self.__rollups.target = new
+
+        if self.__detector is not None:
+            self.__detector.target = new
+
     @property
     def continuous_ping(self):
         return self.__continuous_ping
@@ -308,20 +457,121 @@ class Ping:
         self.__monitoring = new
 
     @property
-    def history(self):
+    def history(self) -> SampleHistory:
+        """
+        SampleHistory:
+            The results recorded so far. This is the live buffer, not a copy.
+        """
         return self.__history
 
     @history.setter
     def history(self, new):
-        if not isinstance(new, list):
-            raise TypeError('"new" must be of type list!')
+        if not isinstance(new, SampleHistory):
+            raise TypeError('"history" must be of type SampleHistory!')
+
+        self.__history = new
 
     @property
-    def latest(self):
-        try:
-            return self.history[-1][-1]
-        except TypeError:
-            return self.history
+    def database(self) -> Optional[SQLiteSink]:
+        """
+        SQLiteSink or None:
+            A database every recorded result is also written to. When set, `generate_report()` queries it instead
+            of `history`.
+        """
+        return self.__database
+
+    @database.setter
+    def database(self, new):
+        if new is not None and not isinstance(new, SQLiteSink):
+            raise TypeError('"database" must be of type SQLiteSink or None!')
+
+        if self.__database is not None:
+            self.__callbacks.remove(self.__database.add)
+
+        if new is not None:
+            self.add_callback(new.add)
+
+        self.__database = new
+
+    @property
+    def rollups(self) -> Rollups:
+        """
+        Rollups:
+            Per-minute and per-hour aggregates of every recorded result, kept long after `history` has overwritten
+            the samples themselves.
+        """
+        return self.__rollups
+
+    @property
+    def stats(self) -> RunningStats:
+        """
+        RunningStats:
+            Running statistics of every recorded result: count, loss, min, max, mean and variance. Reading them is
+            constant time, however long the run.
+        """
+        return self.__stats
+
+    @property
+    def quality(self) -> LinkQuality:
+        """
+        LinkQuality:
+            Jitter, loss bursts and the gaps between them, over every recorded result.
+        """
+        return self.__quality
+
+    @property
+    def detector(self) -> AnomalyDetector:
+        """
+        AnomalyDetector:
+            Watches the recorded results for outages and latency shifts. Add a callback to it (such as
+            `ping_stat.storage.events.EventLog.write`) to be told when one starts or ends.
+        """
+        return self.__detector
+
+    @property
+    def windows(self) -> Dict[str, SlidingWindow]:
+        """
+        dict:
+            The sliding windows kept over the most recent results, keyed by name. By default, the last 60 seconds
+            ('60s') and the last 100 results ('100 samples'); see `add_window()`.
+        """
+        return self.__windows
+
+    def add_window(
+            self,
+            size: Optional[int] = None,
+            duration: Optional[float] = None,
+            name: Optional[str] = None
+    ) -> SlidingWindow:
+        """
+        Keep statistics over the last `size` results, or the results of the last `duration` seconds.
+
+        Args:
+            name (str or None):
+                The key for the window in `windows`. Defaults to the window's own name, such as '60s'.
+
+        Returns:
+            SlidingWindow:
+                The window. It only sees results recorded after it was added.
+        """
+        window = SlidingWindow(size=size, duration=duration)
+        self.__windows[name or window.name] = window
+
+        return window
+
+    def remove_window(self, name: str):
+        """
+        Stop keeping the window called `name`.
+        """
+        del self.__windows[name]
+
+    @property
+    def latest(self) -> Optional[PingSample]:
+        """
+        PingSample or None:
+            The most recent result in `history`.
+        """
+        return self.__history.latest
 
     @property
     def timeout(self) -> float:
@@ -346,13 +596,13 @@ class Ping:
             ValueError:
                 If new is not positive.
         """
-        if not isinstance(new, (int, float)):
+        if not isinstance(new, (int, float)) or isinstance(new, bool):
             raise TypeError('"timeout" must be a float or an integer')
 
         if new <= 0:
             raise ValueError('"timeout" must be positive')
 
-        self.__timeout = int(new)
+        self.__timeout = new
 
     @property
     def queue(self):
@@ -427,6 +677,38 @@ class Ping:
             }
         }
 
+    def add_callback(self, callback):
+        """
+        Call `callback` with every `PingSample` that `record()` adds to `history`.
+        """
+        self.__callbacks.append(callback)
+
+    def record(self, sample: PingSample, notify: bool = True):
+        """
+        Add a result to `history` and hand it to the callbacks.
+
+        Args:
+            sample (PingSample):
+                The result to add.
+            notify (bool):
+                Whether to call the callbacks. Replaying results that were already stored passes False, so they are
+                not stored twice.
+        """
+        self.__history.add(sample)
+        self.__rollups.add(sample)
+        self.__stats.add(sample)
+        self.__quality.add(sample)
+        self.__detector.add(sample)
+
+        for window in self.__windows.values():
+            window.add(sample)
+
+        if not notify:
+            return
+
+        for callback in self.__callbacks:
+            callback(sample)
+
     def create_worker(self, reset=False):
         from ping_stat.utils.workers import PingWorker
         if self.ping_worker is not None and not reset:
@@ -459,51 +741,181 @@ class Ping:
         #     for _ in range(self.runs)
         # ]
         pings = []
+        multiplexer = get_multiplexer()
+
+        if self.high_rate:
+            pings = self.__ping_high_rate(multiplexer)
+        elif self.pipelined:
+            pings = self.__ping_pipelined(multiplexer)
+        else:
+            for _ in range(self.runs):
+                log = self.log_device.add_child('PingPing.Ping.ping')
+                log.debug(f'Pinging {self.target} with a payload of {self.packet_size} bytes and a titmeout of '
+                          f'{self.timeout}')
+
+                # Ping the target with the given parameters over the shared ICMP socket and append this
+                # to the list of ping results.
+                pings.append(
+                    multiplexer.ping(
+                        self.target,
+                        size=self.packet_size,
+                        timeout=self.timeout
+                    )
+                )
+
+                sleep(self.interval)
+
+        if len(pings) == 1:
+            pings = pings[0]
+
+        self.__results = pings
 
-        for _ in range(self.runs):
-            log = self.log_device.add_child('PingPing.Ping.ping')
-            log.debug(f'Pinging {self.target} with a payload of {self.packet_size} bytes and a titmeout of '
-                      f'{self.timeout}')
+        return pings
+
+    def __ping_pipelined(self, multiplexer):
+        """
+        Send `runs` probes on the interval schedule, then collect the replies.
+
+        Probes go out at fixed offsets from the first one whether or not earlier replies have arrived; each probe
+        expires on its own deadline.
+
+        Returns:
+            list:
+                The ping times, in the order the probes were sent.
+        """
+        log = self.log_device.add_child('PingPing.Ping.ping_pipelined')
+        log.debug(f'Pipelining {self.runs} probes to {self.target} every {self.interval} seconds')
+
+        probes = []
+        started = monotonic()
 
+        for run in range(self.runs):
+            delay = started + (run * self.interval) - monotonic()
+            if delay > 0:
+                sleep(delay)
 
-            # Ping the target with the given parameters and app end this
-            # to the list of ping results.
-            pings.append(
-                _ping(
+            probes.append(
+                multiplexer.send(
                     self.target,
                     size=self.packet_size,
-                    timeout=int(self.timeout)
+                    timeout=self.timeout
                 )
             )
 
-            sleep(self.interval)
+        for probe in probes:
+            probe.wait()
 
-        if len(pings) == 1:
-            pings = pings[0]
+        return [probe.result for probe in probes]
 
-        self.__results = pings
+    def __ping_high_rate(self, multiplexer):
+        """
+        Send `runs` prebuilt probes from a tight send loop, then collect the replies.
 
-        return pings
+        Returns:
+            list:
+                The ping times, in the order the probes were sent.
+        """
+        log = self.log_device.add_child('PingPing.Ping.ping_high_rate')
+        log.debug(f'Sending {self.runs} probes to {self.target} every {self.interval} seconds')
 
+        probes = multiplexer.send_train(
+            self.target,
+            self.runs,
+            self.interval,
+            size=self.packet_size,
+            timeout=self.timeout
+        )
 
-    def generate_report(self):
-        successful, failed = gather_times(self, count_timeout_time_for_fails=True)
-        num_successful = len(successful)
-        num_failed = len(failed)
-        ping_mean = mean(successful)
-        max_time = max(successful)
-        min_time = min(successful)
-
-        return {
-            'pings_returned': num_successful,
-            'pings_failed': num_failed,
-            'wait_time': {
-                'min': min_time,
-                'max': max_time,
-                'mean': ping_mean,
-                'average': sum(successful)
-            },
-        }
+        for probe in probes:
+            probe.wait()
+
+        return [probe.result for probe in probes]
+
+
+    def generate_report(
+            self,
+            start_ns: Optional[int] = None,
+            end_ns: Optional[int] = None,
+            samples: Optional[Iterable[PingSample]] = None,
+            window: Optional[str] = None
+    ) -> dict:
+        """
+        Summarize the results between `start_ns` (inclusive) and `end_ns` (exclusive), in nanoseconds since the
+        epoch. None means unbounded.
+
+        With a `database` attached, the report is aggregated in SQL over everything ever written for this target,
+        not just what `history` still holds. Otherwise a report over everything recorded is read from `stats` in
+        constant time. A report over a range covers `history`, unless the range reaches back past samples `history`
+        has already overwritten; then it is merged from `rollups`, widened to whole buckets.
+
+        Args:
+            samples (iterable or None):
+                Report on these samples instead, such as `ping_stat.storage.iter_samples()` over a stored capture.
+                They are consumed in a single pass, in constant memory.
+            window (str or None):
+                Report on the sliding window with this name in `windows` instead, in constant time. The range is
+                ignored.
+
+        Returns:
+            dict:
+                The number of pings sent, returned and failed, the loss ratio, and the min, max, mean, total (under
+                'average') and percentile ('p50', 'p90', 'p95', 'p99', 'p99.9') wait times in seconds. Wait times are
+                None if nothing returned. Percentiles read from `rollups` are within about 17%, the rest within 1%.
+                A window report has no percentiles.
+                A report that is not read from `rollups` or the database also has the standard deviation, under
+                'stdev'. One over everything recorded, or over `history` or `samples`, also has the jitter and loss
+                burst statistics of `LinkQuality`, under 'quality'.
+        """
+        if window is not None:
+            try:
+                return self.__windows[window].as_dict()
+            except KeyError:
+                raise ValueError(f'No window named {window!r}. Windows: {", ".join(self.__windows)}') from None
+
+        if samples is None:
+            if self.__database is not None:
+                self.__database.flush()
+
+                with self.__database.history() as history:
+                    report = history.report(self.target, start_ns, end_ns).get(self.target)
+
+                if report is not None:
+                    return report
+
+            if start_ns is None and end_ns is None:
+                report = self.__stats.as_dict()
+                report['quality'] = self.__quality.as_dict()
+
+                return report
+
+            if self.__history.dropped:
+                try:
+                    oldest_ns = self.__history[0].timestamp_ns
+                except IndexError:
+                    oldest_ns = None
+
+                if start_ns is None or oldest_ns is None or start_ns < oldest_ns:
+                    return self.__rollups.report(start_ns, end_ns)
+
+            samples = self.__history
+
+        summary = RunningStats()
+        quality = LinkQuality()
+
+        for sample in samples:
+            if start_ns is not None and sample.timestamp_ns < start_ns:
+                continue
+
+            if end_ns is not None and sample.timestamp_ns >= end_ns:
+                continue
+
+            summary.add(sample)
+            quality.add(sample)
+
+        report = summary.as_dict()
+        report['quality'] = quality.as_dict()
+
+        return report
 
     def start(self):
         global monitoring
@@ -533,6 +945,494 @@ class Ping:
         self.ping_worker.join()
 
 
+class ProbeTarget:
+    """
+    A single target watched by a `PingEngine`.
+
+    Attributes:
+        address (str):
+            The IP address or hostname to probe.
+
+        interval (float):
+            The time in seconds between probes.
+
+        timeout (float):
+            The time in seconds to wait for a reply before recording a timeout.
+
+        packet_size (int):
+            Size of the packet payload in bytes.
+
+        resolved (str or None):
+            The IPv4 address that `address` resolved to, once known.
+
+        lateness_ns (int):
+            How late (in nanoseconds) the most recent probe was dispatched relative to its deadline.
+
+        order (ReorderBuffer or None):
+            Holds the target's results until they can be handed on in send order.
+    """
+    __slots__ = (
+        'address', 'interval', 'timeout', 'packet_size', 'resolved', 'sent', 'received', 'lateness_ns', 'order'
+    )
+
+    def __init__(self, address: str, interval: float, timeout: float, packet_size: int):
+        if not isinstance(address, str):
+            raise TypeError('"address" must be a string')
+
+        if not address:
+            raise ValueError('"address" cannot be an empty string')
+
+        if not isinstance(interval, (int, float)) or not isinstance(timeout, (int, float)):
+            raise TypeError('"interval" and "timeout" must be a float or an integer')
+
+        if interval < MIN_INTERVAL:
+            raise ValueError(f'"interval" must be at least {MIN_INTERVAL} seconds')
+
+        if timeout <= 0:
+            raise ValueError('"timeout" must be positive')
+
+        if not isinstance(packet_size, int):
+            raise TypeError("packet_size must be an integer!")
+
+        self.address = address
+        self.interval = interval
+        self.timeout = timeout
+        self.packet_size = packet_size
+        self.resolved = None
+        self.sent = 0
+        self.received = 0
+        self.lateness_ns = 0
+        self.order = None
+
+    def __repr__(self):
+        return f'<ProbeTarget: {self.address}, interval={self.interval}, timeout={self.timeout}>'
+
+
+class PingEngine:
+    """
+    Probe many targets concurrently from a single asyncio event loop.
+
+    Every target shares one non-blocking ICMP socket. Probes are sent on each target's own interval whether or not
+    earlier probes have been answered, replies are matched back to their probe by ICMP identifier and sequence
+    number, and each probe carries its own deadline. The number of OS threads stays at one no matter how many
+    targets are watched.
+
+    Dispatch is driven by a single timing-wheel scheduler: each target keeps to absolute deadlines (so its period
+    does not drift by the RTT or by scheduling overhead), and target start phases are staggered across their
+    interval so that probes do not go out in bursts.
+
+    Note:
+        Pinging a target is not a passive operation. The same disclaimer as for `Ping` applies here, multiplied by
+        the number of targets you hand to the engine.
+
+    Usage:
+        engine = PingEngine(['1.1.1.1', 'example.com'], interval=1, timeout=2)
+
+        async def watch():
+            async for sample in engine.stream():
+                print(sample)
+
+        asyncio.run(watch())
+    """
+    from ping_stat.logging import add_child
+
+    __cls_log = add_child('PingPing.PingEngine')
+
+    __interval = 1
+    __timeout = 5
+    __size = 256
+    __max_in_flight = 1024
+    __tick = 0.001
+
+    def __init__(
+            self,
+            targets=(),
+            interval=__interval,
+            timeout=__timeout,
+            packet_size=__size,
+            max_in_flight=__max_in_flight,
+            tick=__tick,
+            log_device=Null()
+    ):
+        """
+        Initializes the PingEngine object.
+
+        Args:
+            targets (iterable):
+                Addresses (or `ProbeTarget` objects) to watch.
+            interval (float):
+                Default time in seconds between probes to the same target.
+            timeout (float):
+                Default time in seconds to wait for a reply.
+            packet_size (int):
+                Default size of the packet payload in bytes.
+            max_in_flight (int):
+                The maximum number of unanswered probes allowed at once, across all targets.
+            tick (float):
+                The resolution of the dispatch scheduler in seconds.
+        """
+        if not isinstance(max_in_flight, int):
+            raise TypeError('"max_in_flight" must be an integer')
+
+        if max_in_flight <= 0:
+            raise ValueError('"max_in_flight" must be positive')
+
+        self.log_device = log_device
+
+        self.interval = interval
+        self.timeout = timeout
+        self.packet_size = packet_size
+        self.max_in_flight = max_in_flight
+        self.tick = tick
+
+        self.__identifier = (os.getpid() ^ id(self)) & 0xFFFF
+        self.__sequence = 0
+        self.__targets = {}
+        self.__pending = {}
+        self.__templates = PacketTemplateCache()
+        self.__scheduler = None
+        self.__dispatcher = None
+        self.__wake = None
+
+        self.__loop = None
+        self.__socket = None
+        self.__raw = True
+        self.__queue = None
+        self.__in_flight = None
+        self.__running = False
+
+        for target in targets:
+            if isinstance(target, ProbeTarget):
+                self.add_target(
+                    target.address,
+                    interval=target.interval,
+                    timeout=target.timeout,
+                    packet_size=target.packet_size
+                )
+            else:
+                self.add_target(target)
+
+    @property
+    def in_flight(self) -> int:
+        """
+        int:
+            The number of probes currently waiting for a reply.
+        """
+        return len(self.__pending)
+
+    @property
+    def lateness(self) -> dict:
+        """
+        dict:
+            Dispatch count with the mean and maximum lateness (in seconds) of probes behind their deadlines.
+        """
+        if self.__scheduler is None:
+            return {'dispatches': 0, 'mean': 0.0, 'max': 0.0}
+
+        return self.__scheduler.lateness
+
+    @property
+    def running(self) -> bool:
+        return self.__running
+
+    @property
+    def targets(self):
+        """
+        dict:
+            The watched targets, keyed by address.
+        """
+        return self.__targets
+
+    def add_target(self, address, interval=None, timeout=None, packet_size=None) -> ProbeTarget:
+        """
+        Start watching a target. If the engine is already streaming, probing starts right away.
+
+        Args:
+            address (str):
+                The IP address or hostname to probe.
+            interval (float, optional):
+                Time in seconds between probes. Defaults to the engine's interval.
+            timeout (float, optional):
+                Time in seconds to wait for a reply. Defaults to the engine's timeout.
+            packet_size (int, optional):
+                Size of the packet payload in bytes. Defaults to the engine's packet size.
+
+        Returns:
+            ProbeTarget:
+                The new target.
+
+        Raises:
+            RedundantWorkOrderError:
+                If the target is already being watched.
+        """
+        if address in self.__targets:
+            raise RedundantWorkOrderError(address, 'That target is already being watched.')
+
+        target = ProbeTarget(
+            address,
+            interval=interval or self.interval,
+            timeout=timeout or self.timeout,
+            packet_size=packet_size or self.packet_size
+        )
+        self.__targets[address] = target
+
+        if self.__running:
+            self.__scheduler.add(address, int(target.interval * 1e9))
+            self.__wake.set()
+
+        return target
+
+    def remove_target(self, address):
+        """
+        Stop watching a target. Probes already in flight are still reported.
+
+        Args:
+            address (str):
+                The address of the target to remove.
+        """
+        self.__targets.pop(address)
+
+        if self.__scheduler is not None:
+            self.__scheduler.remove(address)
+
+    async def stream(self):
+        """
+        Probe every target and yield the results as they come in.
+
+        Yields:
+            PingSample:
+                One sample per probe. Each target's samples come in the order its probes were sent, however their
+                replies and timeouts interleave; samples of different targets interleave as they complete.
+
+        Raises:
+            WorkerAlreadyStartedError:
+                If the engine is already streaming.
+        """
+        if self.__running:
+            raise WorkerAlreadyStartedError(self.__class__.__name__)
+
+        self.__open()
+
+        try:
+            while True:
+                sample = await self.__queue.get()
+                if sample is None:
+                    break
+                yield sample
+        finally:
+            self.__close()
+
+    def stop(self):
+        """
+        Stop probing. Any `stream()` in progress ends after yielding the samples already collected.
+        """
+        if not self.__running:
+            return
+
+        self.__running = False
+
+        self.__dispatcher.cancel()
+        self.__queue.put_nowait(None)
+
+    def __open(self):
+        log = self.__cls_log
+
+        self.__loop = asyncio.get_running_loop()
+        self.__socket, self.__raw = open_socket(blocking=False, identifier=self.__identifier)
+        self.__queue = asyncio.Queue()
+        self.__in_flight = asyncio.Semaphore(self.max_in_flight)
+        self.__wake = asyncio.Event()
+        self.__scheduler = PeriodicScheduler(tick_ns=int(self.tick * 1e9))
+        self.__running = True
+
+        log.debug(f'Opened {"raw" if self.__raw else "datagram"} ICMP socket for {len(self.__targets)} targets')
+
+        self.__loop.add_reader(self.__socket.fileno(), self.__on_readable)
+
+        for address, target in self.__targets.items():
+            self.__scheduler.add(address, int(target.interval * 1e9))
+
+        self.__dispatcher = self.__loop.create_task(self.__dispatch_loop())
+
+    def __close(self):
+        self.stop()
+
+        for *_, handle in self.__pending.values():
+            handle.cancel()
+
+        self.__pending.clear()
+
+        if self.__socket is not None:
+            self.__loop.remove_reader(self.__socket.fileno())
+            self.__socket.close()
+            self.__socket = None
+
+    def __next_sequence(self) -> int:
+        for _ in range(0x10000):
+            self.__sequence = (self.__sequence + 1) & 0xFFFF
+            if self.__sequence not in self.__pending:
+                return self.__sequence
+
+        raise RuntimeError('No free ICMP sequence numbers; too many probes in flight')
+
+    def __order(self, target) -> ReorderBuffer:
+        if target.order is None:
+            target.order = ReorderBuffer(self.__enqueue)
+
+        return target.order
+
+    def __enqueue(self, sample):
+        self.__queue.put_nowait(sample)
+
+    def __emit(self, target, sequence, sent_wall_ns, rtt, status):
+        self.__order(target).done(sequence, PingSample(sent_wall_ns, target.address, sequence, rtt, status))
+
+    async def __resolve(self, target):
+        resolver = get_resolver()
+
+        # Cache hits (fresh or stale) never block the loop; only a real lookup goes to the executor.
+        target.resolved = resolver.cached(target.address) or \
+            await self.__loop.run_in_executor(None, resolver.resolve, target.address)
+
+        return target.resolved
+
+    async def __dispatch_loop(self):
+        while self.__running:
+            for dispatch in self.__scheduler.due():
+                target = self.__targets.get(dispatch.key)
+
+                if target is not None:
+                    target.lateness_ns = dispatch.lateness_ns
+                    self.__loop.create_task(self.__probe(target))
+
+            next_deadline = self.__scheduler.next_deadline_ns()
+            self.__wake.clear()
+
+            if next_deadline is None:
+                await self.__wake.wait()
+                continue
+
+            handle = self.__loop.call_later(max(0, next_deadline - monotonic_ns()) / 1e9, self.__wake.set)
+            try:
+                await self.__wake.wait()
+            finally:
+                handle.cancel()
+
+    async def __probe(self, target):
+        await self.__in_flight.acquire()
+
+        if not self.__running:
+            self.__in_flight.release()
+            return
+
+        try:
+            await self.__send_probe(target)
+        except OSError as e:
+            self.__cls_log.debug(f'Probe to {target.address} failed: {e}')
+            self.__in_flight.release()
+
+            # The probe never got a sequence of its own, so it is ordered under a key nothing else can use.
+            key = object()
+            self.__order(target).sent(key)
+            self.__order(target).done(key, PingSample(time_ns(), target.address, 0, None, STATUS_ERROR))
+
+    async def __send_probe(self, target):
+        address = await self.__resolve(target)
+
+        sequence = self.__next_sequence()
+
+        sent_wall_ns = time_ns()
+        sent_ns = monotonic_ns()
+        packet = self.__templates.get(self.__identifier, target.packet_size).render(sequence, sent_ns)
+
+        while True:
+            try:
+                self.__socket.sendto(packet, (address, 0))
+                break
+            except BlockingIOError:
+                # Other probes reuse the template while we wait, so keep our own copy of the packet.
+                packet = bytes(packet)
+                await self.__writable()
+
+        handle = self.__loop.call_later(target.timeout, self.__expire, sequence)
+        self.__pending[sequence] = (target, address, sent_ns, sent_wall_ns, handle)
+        self.__order(target).sent(sequence)
+        target.sent += 1
+
+    async def __writable(self):
+        fut = self.__loop.create_future()
+        fd = self.__socket.fileno()
+
+        def _ready():
+            if not fut.done():
+                fut.set_result(None)
+
+        self.__loop.add_writer(fd, _ready)
+
+        try:
+            await fut
+        finally:
+            self.__loop.remove_writer(fd)
+
+    def __expire(self, sequence):
+        entry = self.__pending.pop(sequence, None)
+        if entry is None:
+            return
+
+        target, _, _, sent_wall_ns, _ = entry
+        self.__in_flight.release()
+        self.__emit(target, sequence, sent_wall_ns, None, STATUS_TIMEOUT)
+
+    def __on_readable(self):
+        while True:
+            try:
+                data, (responder, _) = self.__socket.recvfrom(65535)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError as e:
+                self.__cls_log.debug(f'Error reading from ICMP socket: {e}')
+                return
+
+            received_ns = monotonic_ns()
+            message = parse_message(data, responder, self.__raw)
+
+            if message is None:
+                continue
+
+            # Datagram sockets have their identifier rewritten by the kernel, which also filters replies for us.
+            if self.__raw and message.identifier != self.__identifier:
+                continue
+
+            entry = self.__pending.get(message.sequence)
+            if entry is None:
+                continue
+
+            target, address, sent_ns, sent_wall_ns, handle = entry
+
+            if message.type == ICMP_ECHO_REPLY:
+                if address != message.responder:
+                    continue
+                status = STATUS_OK
+                rtt = (received_ns - sent_ns) / 1e9
+                target.received += 1
+            elif message.type == ICMP_TIME_EXCEEDED:
+                status = STATUS_TTL_EXCEEDED
+                rtt = None
+            else:
+                status = STATUS_UNREACHABLE
+                rtt = None
+
+            del self.__pending[message.sequence]
+            handle.cancel()
+            self.__in_flight.release()
+            self.__emit(target, message.sequence, sent_wall_ns, rtt, status)
+
+    def __repr__(self):
+        if self.__running:
+            return f'<PingEngine: streaming {len(self.__targets)} targets, {self.in_flight} in flight>'
+
+        return f'<PingEngine: {len(self.__targets)} targets, not streaming>'
+
 
 """
 The MIT License (MIT)
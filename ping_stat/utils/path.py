@@ -0,0 +1,429 @@
+"""
+Project: PingPing
+Author: Inspyre Softworks - https://inspyre.tech
+Created: 10/18/2026 @ 3:40 PM
+File:
+  Name: path.py
+  Filepath: ping_stat/utils
+
+Continuous hop-by-hop path monitoring, in the spirit of `mtr`.
+
+`PathMonitor` uses a `TTLTest` to find how many hops away the target is. After that, each cycle sends one probe per
+hop at the same time through the shared ICMP multiplexer. Routers answer with ICMP Time Exceeded and the target answers
+with an echo reply, so a cycle takes about one timeout however long the path is. Loss and latency are kept per hop,
+which shows where along the path an outage starts.
+
+The path follows route changes: it is shortened when the target answers from a nearer hop, and probed beyond its end
+(up to `max_hops`) when the last hop answers as a router, or stops answering for `REDISCOVER_AFTER` cycles in a row.
+
+Usage:
+    from ping_stat.utils.path import PathMonitor
+
+    monitor = PathMonitor('inspyre.tech', interval=1, timeout=2)
+    monitor.run(cycles=10)
+
+    for hop in monitor.report():
+        print(hop)
+"""
+import math
+import threading
+from time import monotonic, monotonic_ns
+from typing import List, Optional
+
+from pypattyrn.behavioral.null import Null
+
+from ping_stat.errors import WorkerAlreadyStartedError, WorkerNotStartedError
+from ping_stat.models.samples import STATUS_OK, STATUS_TTL_EXCEEDED, STATUS_UNREACHABLE, TTLResult
+from ping_stat.utils import MAX_TTL, TTLTest, ttl_result
+from ping_stat.utils.multiplexer import get_multiplexer
+from ping_stat.utils.scheduler import get_scheduler
+
+
+ANSWERED = (STATUS_OK, STATUS_TTL_EXCEEDED, STATUS_UNREACHABLE)
+"""Statuses that mean some host on the path answered the probe."""
+
+REDISCOVER_AFTER = 5
+"""Cycles in a row without an answer from the destination before the hops beyond the path are probed."""
+
+
+class HopStats:
+    """
+    Loss and latency for one hop on the path.
+
+    Attributes:
+        ttl (int):
+            The hop number (the TTL its probes are sent with).
+
+        sent (int):
+            The number of probes with a known outcome.
+
+        received (int):
+            The number of probes that some host answered.
+
+        last (float or None):
+            The most recent round-trip time in seconds.
+
+        best (float or None):
+            The fastest round-trip time in seconds.
+
+        worst (float or None):
+            The slowest round-trip time in seconds.
+
+        total (float):
+            The sum of all round-trip times in seconds.
+
+        total_sq (float):
+            The sum of all squared round-trip times, for the standard deviation.
+
+        responder (str or None):
+            The address that answered most recently.
+
+        responders (set):
+            Every address that has answered for this hop. More than one means the route changes between cycles
+            (load balancing, for example).
+    """
+    __slots__ = ('ttl', 'sent', 'received', 'last', 'best', 'worst', 'total', 'total_sq', 'responder', 'responders')
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        self.sent = 0
+        self.received = 0
+        self.last = None
+        self.best = None
+        self.worst = None
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.responder = None
+        self.responders = set()
+
+    @property
+    def lost(self) -> int:
+        return self.sent - self.received
+
+    @property
+    def loss(self) -> float:
+        """
+        float:
+            The fraction of probes nobody answered.
+        """
+        return self.lost / self.sent if self.sent else 0.0
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total / self.received if self.received else None
+
+    @property
+    def stdev(self) -> Optional[float]:
+        """
+        float or None:
+            The population standard deviation of the round-trip times.
+        """
+        if not self.received:
+            return None
+
+        mean = self.total / self.received
+
+        return math.sqrt(max(0.0, self.total_sq / self.received - mean * mean))
+
+    def add(self, result: TTLResult):
+        self.sent += 1
+
+        if result.status not in ANSWERED or result.rtt is None:
+            return
+
+        rtt = result.rtt
+        self.received += 1
+        self.last = rtt
+        self.total += rtt
+        self.total_sq += rtt * rtt
+
+        if self.best is None or rtt < self.best:
+            self.best = rtt
+
+        if self.worst is None or rtt > self.worst:
+            self.worst = rtt
+
+        self.responder = result.responder
+        self.responders.add(result.responder)
+
+    def as_dict(self) -> dict:
+        return {
+            'hop': self.ttl,
+            'host': self.responder,
+            'sent': self.sent,
+            'lost': self.lost,
+            'loss': self.loss,
+            'last': self.last,
+            'mean': self.mean,
+            'best': self.best,
+            'worst': self.worst,
+            'stdev': self.stdev,
+        }
+
+
+class PathMonitor:
+    """
+    Probe every hop on the path to an address, every `interval` seconds.
+
+    Attributes:
+        address (str):
+            The destination.
+
+        interval (float):
+            Seconds between the starts of two cycles.
+
+        timeout (float):
+            Seconds to wait for each hop to answer.
+
+        max_hops (int):
+            The highest TTL to probe.
+    """
+    from ping_stat.logging import add_child
+
+    __cls_log = add_child('PingPing.PathMonitor')
+
+    def __init__(
+            self,
+            address: str,
+            interval: float = 1.0,
+            timeout: float = 2.0,
+            max_hops: int = MAX_TTL,
+            log_device=Null()
+    ):
+        if timeout <= 0:
+            raise ValueError('"timeout" must be positive')
+
+        if not isinstance(max_hops, int) or max_hops < 1:
+            raise ValueError('"max_hops" must be a positive integer')
+
+        self.log_device = log_device
+
+        self.address = address
+        self.interval = interval
+        self.timeout = timeout
+        self.max_hops = max_hops
+
+        self.__hops = []
+        self.__path_length = None
+        self.__cycles = 0
+        self.__misses = 0
+
+        self.__lock = threading.Lock()
+        self.__stopping = threading.Event()
+        self.__thread = None
+
+    @property
+    def cycles(self) -> int:
+        """
+        int:
+            The number of completed cycles.
+        """
+        return self.__cycles
+
+    @property
+    def hops(self) -> List[HopStats]:
+        """
+        list:
+            A `HopStats` for every hop on the path, nearest first.
+        """
+        with self.__lock:
+            return list(self.__hops)
+
+    @property
+    def path_length(self) -> Optional[int]:
+        """
+        int or None:
+            The number of hops to the destination, `max_hops` if it was never reached, or None before `discover()`.
+        """
+        return self.__path_length
+
+    @property
+    def running(self) -> bool:
+        return self.__thread is not None and self.__thread.is_alive()
+
+    @property
+    def thread(self) -> Optional[threading.Thread]:
+        return self.__thread
+
+    def discover(self) -> int:
+        """
+        Find the number of hops to the destination with a parallel `TTLTest`.
+
+        Returns:
+            int:
+                The path length that cycles will probe.
+        """
+        minimum = TTLTest(self.address, timeout=self.timeout, starting_at=1, end_at=self.max_hops).run()
+
+        if minimum is None:
+            self.__cls_log.debug(f'{self.address} did not answer within {self.max_hops} hops')
+
+        self.__set_path_length(minimum or self.max_hops)
+
+        return self.__path_length
+
+    def cycle(self) -> List[TTLResult]:
+        """
+        Probe every hop once, all at the same time, and add the outcomes to the per-hop statistics.
+
+        If the destination answers from fewer hops than expected, the path is shortened to match. If it doesn't
+        answer, and the last hop answers as a router (or nothing has answered for `REDISCOVER_AFTER` cycles), the
+        hops beyond the path are probed and the path is lengthened to wherever the destination is found.
+
+        Returns:
+            list:
+                A `TTLResult` for every hop, nearest first.
+        """
+        if self.__path_length is None:
+            self.discover()
+
+        multiplexer = get_multiplexer()
+        started = monotonic_ns()
+
+        probes = [
+            (ttl, multiplexer.send(self.address, timeout=self.timeout, ttl=ttl))
+            for ttl in range(1, self.__path_length + 1)
+        ]
+
+        results = []
+
+        for ttl, probe in probes:
+            probe.wait()
+            results.append(ttl_result(ttl, probe, started, self.timeout))
+
+        reached = next((result.ttl for result in results if result.reached), None)
+
+        if reached is not None and reached < self.__path_length:
+            self.__cls_log.debug(f'{self.address} is now {reached} hops away (was {self.__path_length})')
+            self.__set_path_length(reached)
+            results = results[:reached]
+
+        if reached is None and self.__path_length < self.max_hops:
+            self.__misses += 1
+
+            if results[-1].status == STATUS_TTL_EXCEEDED or self.__misses >= REDISCOVER_AFTER:
+                self.__misses = 0
+                self.__extend()
+        else:
+            self.__misses = 0
+
+        with self.__lock:
+            for hop, result in zip(self.__hops, results):
+                hop.add(result)
+
+            self.__cycles += 1
+
+        return results
+
+    def run(self, cycles: Optional[int] = None, duration: Optional[float] = None):
+        """
+        Run cycles in the calling thread until `stop()` is called, `cycles` cycles have run, or `duration` seconds
+        have passed.
+
+        Cycles are started by the shared scheduler on an absolute grid, so a slow cycle does not push back the
+        ones after it. If a cycle overruns the interval, the missed starts are skipped.
+        """
+        if self.__path_length is None:
+            self.discover()
+
+        self.__stopping.clear()
+
+        scheduler = get_scheduler()
+        job = scheduler.add(self, self.interval, phase=0)
+        deadline = None if duration is None else monotonic() + duration
+        done = 0
+
+        try:
+            while not self.__stopping.is_set():
+                if cycles is not None and done >= cycles:
+                    break
+
+                if deadline is not None and monotonic() >= deadline:
+                    break
+
+                if job.wait(timeout=.5) is None:
+                    continue
+
+                self.cycle()
+                done += 1
+        finally:
+            scheduler.remove(self)
+
+    def start(self, cycles: Optional[int] = None, duration: Optional[float] = None):
+        """
+        Run cycles from a background thread.
+
+        Raises:
+            WorkerAlreadyStartedError:
+                If the monitor is already running.
+        """
+        if self.running:
+            raise WorkerAlreadyStartedError(self.__thread.name, str(self))
+
+        self.__thread = threading.Thread(target=self.run, args=(cycles, duration), name='PathMonitor', daemon=True)
+        self.__thread.start()
+
+    def stop(self):
+        """
+        Stop after the current cycle and wait for the background thread to finish.
+
+        Raises:
+            WorkerNotStartedError:
+                If the monitor is not running.
+        """
+        if not self.running:
+            raise WorkerNotStartedError(self.__class__.__name__, str(self))
+
+        self.__stopping.set()
+
+        if self.__thread is not threading.current_thread():
+            self.__thread.join()
+
+    def report(self) -> List[dict]:
+        """
+        Generate a report for every hop.
+
+        Returns:
+            list:
+                Per-hop report dictionaries, nearest hop first.
+        """
+        return [hop.as_dict() for hop in self.hops]
+
+    def __extend(self):
+        beyond = TTLTest(
+            self.address,
+            timeout=self.timeout,
+            starting_at=self.__path_length + 1,
+            end_at=self.max_hops
+        ).run()
+
+        if beyond is None:
+            self.__cls_log.debug(f'{self.address} did not answer within {self.max_hops} hops')
+            return
+
+        self.__cls_log.debug(f'{self.address} is now {beyond} hops away (was {self.__path_length})')
+        self.__set_path_length(beyond)
+
+    def __set_path_length(self, length):
+        with self.__lock:
+            self.__path_length = length
+
+            if len(self.__hops) > length:
+                del self.__hops[length:]
+
+            while len(self.__hops) < length:
+                self.__hops.append(HopStats(len(self.__hops) + 1))
+
+    def __repr__(self):
+        hops = 'path not discovered' if self.__path_length is None else f'{self.__path_length} hops'
+        return f'<PathMonitor: {self.address}, {hops}, {self.__cycles} cycles>'
+
+
+"""
+The MIT License (MIT)
+Copyright © 2023 Inspyre Softworks - https://inspyre.tech
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE."""
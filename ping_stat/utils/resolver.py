@@ -0,0 +1,327 @@
+"""
+Project: PingPing
+Author: Inspyre Softworks - https://inspyre.tech
+Created: 10/18/2026 @ 11:02 AM
+File:
+  Name: resolver.py
+  Filepath: ping_stat/utils
+
+A process-wide DNS cache for probe targets, so that hostnames are not looked up on every probe. Entries are
+refreshed in the background shortly before they expire. Once expired, an entry is still served (and refreshed in the
+background) for `stale_ttl` seconds, so a slow or unreachable resolver never blocks a probe that has an address to
+use. Failed lookups are retried with exponential backoff rather than on every probe.
+
+If `dnspython` is installed, the TTL of the A record is honoured. Otherwise `socket.getaddrinfo` is used (which does
+not report TTLs) and every entry lives for `default_ttl` seconds.
+
+Usage:
+    from ping_stat.utils.resolver import get_resolver
+
+    address = get_resolver().resolve('inspyre.tech')
+"""
+import ipaddress
+import socket
+import threading
+from time import monotonic
+from typing import Optional
+
+from pypattyrn.behavioral.null import Null
+
+try:
+    import dns.resolver as _dns_resolver
+except ImportError:
+    _dns_resolver = None
+
+
+class _CacheEntry:
+    __slots__ = ('address', 'expires', 'refresh_at', 'stale_until', 'refreshing', 'failures', 'retry_at')
+
+    def __init__(self, address, ttl, refresh_ahead, stale_ttl):
+        now = monotonic()
+        self.address = address
+        self.expires = now + ttl
+        self.refresh_at = now + ttl * refresh_ahead
+        self.stale_until = self.expires + stale_ttl
+        self.refreshing = False
+        self.failures = 0
+        self.retry_at = 0.0
+
+
+class _Failure:
+    __slots__ = ('error', 'failures', 'retry_at')
+
+    def __init__(self, error):
+        self.error = error
+        self.failures = 0
+        self.retry_at = 0.0
+
+
+class ResolverCache:
+    """
+    A thread-safe hostname → IPv4 address cache.
+
+    Attributes:
+        default_ttl (float):
+            Seconds an entry lives when the record TTL is unknown.
+
+        min_ttl (float):
+            Record TTLs below this are raised to it, so very short TTLs do not put lookups back on the hot path.
+
+        max_ttl (float):
+            Record TTLs above this are lowered to it.
+
+        refresh_ahead (float):
+            Fraction of an entry's lifetime after which it is refreshed in the background.
+
+        stale_ttl (float):
+            Seconds past expiry for which an entry is still served while it is refreshed in the background.
+
+        retry_delay (float):
+            Seconds to wait before retrying a failed lookup. The delay doubles with each consecutive failure.
+
+        max_retry_delay (float):
+            The longest delay between retries of a failed lookup.
+    """
+    from ping_stat.logging import add_child
+
+    __cls_log = add_child('PingPing.ResolverCache')
+
+    def __init__(
+            self,
+            default_ttl: float = 300,
+            min_ttl: float = 5,
+            max_ttl: float = 86400,
+            refresh_ahead: float = 0.8,
+            stale_ttl: float = 3600,
+            retry_delay: float = 5,
+            max_retry_delay: float = 300,
+            log_device=Null()
+    ):
+        if not 0 < refresh_ahead <= 1:
+            raise ValueError('"refresh_ahead" must be greater than 0 and no more than 1')
+
+        self.log_device = log_device
+
+        self.default_ttl = default_ttl
+        self.min_ttl = min_ttl
+        self.max_ttl = max_ttl
+        self.refresh_ahead = refresh_ahead
+        self.stale_ttl = stale_ttl
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+
+        self.__entries = {}
+        # Hosts with no usable entry whose last lookup failed, so probes fail fast until the retry is due.
+        self.__failed = {}
+        self.__lock = threading.Lock()
+
+        self.__hits = 0
+        self.__misses = 0
+        self.__stale_hits = 0
+        self.__refreshes = 0
+        self.__failures = 0
+
+    @property
+    def stats(self) -> dict:
+        """
+        dict:
+            Hit, miss, stale-hit, background-refresh and failure counters, plus the number of cached entries.
+        """
+        return {
+            'hits': self.__hits,
+            'misses': self.__misses,
+            'stale_hits': self.__stale_hits,
+            'refreshes': self.__refreshes,
+            'failures': self.__failures,
+            'entries': len(self.__entries),
+        }
+
+    def cached(self, host: str) -> Optional[str]:
+        """
+        Return the cached address for `host` without ever blocking on a lookup.
+
+        A fresh entry that is due for refresh is refreshed in the background. An expired entry that is still within
+        its stale window is returned as well, with a background refresh started.
+
+        Args:
+            host (str):
+                The hostname or IP address.
+
+        Returns:
+            str or None:
+                The IPv4 address, or None if a blocking lookup is needed.
+        """
+        if _is_ip_address(host):
+            return host
+
+        now = monotonic()
+
+        with self.__lock:
+            entry = self.__entries.get(host)
+
+            if entry is None or now > entry.stale_until:
+                return None
+
+            if now < entry.expires:
+                self.__hits += 1
+            else:
+                self.__stale_hits += 1
+
+            if now >= entry.refresh_at:
+                self.__schedule_refresh(host, entry)
+
+            return entry.address
+
+    def resolve(self, host: str) -> str:
+        """
+        Resolve `host` to an IPv4 address, going through the cache.
+
+        Only blocks when there is no usable entry. An expired entry still within its stale window is returned at
+        once and refreshed in the background. After a failed lookup, the same error is raised without a new lookup
+        until the retry is due.
+
+        Args:
+            host (str):
+                The hostname or IP address.
+
+        Returns:
+            str:
+                The IPv4 address.
+
+        Raises:
+            socket.gaierror:
+                If the lookup failed and there is no usable stale entry.
+        """
+        address = self.cached(host)
+        if address is not None:
+            return address
+
+        with self.__lock:
+            failure = self.__failed.get(host)
+
+            now = monotonic()
+
+            if failure is not None and now < failure.retry_at:
+                self.__failures += 1
+                raise socket.gaierror(
+                    f'Lookup for {host} failed ({failure.error}); retrying in {failure.retry_at - now:.1f}s'
+                )
+
+            self.__misses += 1
+
+        try:
+            return self.__lookup(host)
+        except OSError as e:
+            with self.__lock:
+                self.__failures += 1
+
+                failure = self.__failed.setdefault(host, _Failure(e))
+                failure.error = e
+                self.__back_off(failure)
+
+            raise
+
+    def invalidate(self, host: Optional[str] = None):
+        """
+        Drop `host` from the cache, or every entry if `host` is None.
+        """
+        with self.__lock:
+            if host is None:
+                self.__entries.clear()
+                self.__failed.clear()
+            else:
+                self.__entries.pop(host, None)
+                self.__failed.pop(host, None)
+
+    def __lookup(self, host: str) -> str:
+        ttl = self.default_ttl
+
+        if _dns_resolver is not None:
+            try:
+                answer = _dns_resolver.resolve(host, 'A')
+                address = answer[0].to_text()
+                ttl = answer.rrset.ttl
+            except Exception:
+                # Fall back to the system resolver (hosts file, mDNS, ...).
+                address = socket.getaddrinfo(host, None, family=socket.AF_INET)[0][4][0]
+        else:
+            address = socket.getaddrinfo(host, None, family=socket.AF_INET)[0][4][0]
+
+        ttl = min(max(ttl, self.min_ttl), self.max_ttl)
+
+        with self.__lock:
+            self.__entries[host] = _CacheEntry(address, ttl, self.refresh_ahead, self.stale_ttl)
+            self.__failed.pop(host, None)
+
+        return address
+
+    def __back_off(self, failure):
+        # Caller holds the lock. `failure` is a `_CacheEntry` or a `_Failure`.
+        delay = min(self.retry_delay * 2 ** failure.failures, self.max_retry_delay)
+        failure.failures += 1
+        failure.retry_at = monotonic() + delay
+
+    def __schedule_refresh(self, host, entry):
+        # Caller holds the lock.
+        if entry.refreshing or monotonic() < entry.retry_at:
+            return
+
+        entry.refreshing = True
+        self.__refreshes += 1
+
+        threading.Thread(target=self.__refresh, args=(host, entry), daemon=True).start()
+
+    def __refresh(self, host, entry):
+        try:
+            self.__lookup(host)
+        except OSError as e:
+            self.__cls_log.debug(f'Background refresh for {host} failed: {e}')
+
+            with self.__lock:
+                self.__failures += 1
+                entry.refreshing = False
+                self.__back_off(entry)
+
+    def __repr__(self):
+        stats = self.stats
+        return f'<ResolverCache: {stats["entries"]} entries, {stats["hits"]} hits, {stats["misses"]} misses>'
+
+
+def _is_ip_address(host: str) -> bool:
+    try:
+        ipaddress.IPv4Address(host)
+    except ValueError:
+        return False
+
+    return True
+
+
+_resolver = None
+_resolver_lock = threading.Lock()
+
+
+def get_resolver() -> ResolverCache:
+    """
+    Get the process-wide `ResolverCache`, creating it on first use.
+
+    Returns:
+        ResolverCache:
+            The shared resolver cache.
+    """
+    global _resolver
+
+    with _resolver_lock:
+        if _resolver is None:
+            _resolver = ResolverCache()
+
+        return _resolver
+
+
+"""
+The MIT License (MIT)
+Copyright © 2023 Inspyre Softworks - https://inspyre.tech
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE."""
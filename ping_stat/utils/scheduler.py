@@ -0,0 +1,531 @@
+"""
+Project: PingPing
+Author: Inspyre Softworks - https://inspyre.tech
+Created: 10/18/2026 @ 1:15 PM
+File:
+  Name: scheduler.py
+  Filepath: ping_stat/utils
+
+Drift-free scheduling for periodic probes.
+
+- `TimingWheel` is a hierarchical timing wheel keyed on `time.monotonic_ns()`: O(1) insert and cancel, with expiry
+  cost proportional to the number of ticks advanced plus the number of entries that fall due.
+- `PeriodicScheduler` runs jobs on absolute deadlines (start + n × interval, never "now + interval"), spreads the
+  start phase of jobs across their interval so that many targets do not fire in bursts, and reports how late every
+  dispatch was.
+- `ThreadedScheduler` drives a `PeriodicScheduler` from one background thread for blocking callers such as
+  `PingWorker`; `get_scheduler()` returns the process-wide instance.
+"""
+import threading
+from time import monotonic_ns
+from typing import Any, Hashable, List, NamedTuple, Optional
+
+
+# 0.6180339887... The fractional parts of n × φ are as evenly spread over [0, 1) as any sequence can be, whatever
+# the number of jobs, so each new job lands in the largest remaining gap of the interval.
+GOLDEN_RATIO_FRACTION = 0.6180339887498949
+
+
+class _WheelEntry:
+    __slots__ = ('deadline_ns', 'tick', 'item', 'cancelled')
+
+    def __init__(self, deadline_ns, tick, item):
+        self.deadline_ns = deadline_ns
+        self.tick = tick
+        self.item = item
+        self.cancelled = False
+
+
+class TimingWheel:
+    """
+    A hierarchical timing wheel.
+
+    Level 0 has `slots` buckets of one tick each; every level above covers `slots` times the span of the one below.
+    Entries far in the future sit in a coarse level and cascade down as the wheel turns.
+
+    Attributes:
+        tick_ns (int):
+            The resolution of the wheel in nanoseconds.
+
+        slots (int):
+            Buckets per level.
+
+        levels (int):
+            The number of levels. Deadlines beyond the span of the top level are parked at its far edge and
+            cascade down until they fit.
+    """
+
+    def __init__(self, tick_ns: int = 1_000_000, slots: int = 256, levels: int = 4, start_ns: Optional[int] = None):
+        if tick_ns <= 0 or slots <= 1 or levels <= 0:
+            raise ValueError('"tick_ns" must be positive, "slots" greater than 1 and "levels" positive')
+
+        self.tick_ns = tick_ns
+        self.slots = slots
+        self.levels = levels
+
+        self.__wheels = [[[] for _ in range(slots)] for _ in range(levels)]
+        self.__tick = (monotonic_ns() if start_ns is None else start_ns) // tick_ns
+        self.__count = 0
+
+    def __len__(self):
+        return self.__count
+
+    @property
+    def now_tick(self) -> int:
+        return self.__tick
+
+    def schedule(self, deadline_ns: int, item: Any) -> _WheelEntry:
+        """
+        Add `item` to the wheel, due at `deadline_ns`.
+
+        Returns:
+            The wheel entry, which can be passed to `cancel()`.
+        """
+        entry = _WheelEntry(deadline_ns, max(deadline_ns // self.tick_ns, self.__tick), item)
+        self.__insert(entry)
+        self.__count += 1
+
+        return entry
+
+    def cancel(self, entry: _WheelEntry):
+        if not entry.cancelled:
+            entry.cancelled = True
+            self.__count -= 1
+
+    def advance(self, now_ns: int) -> List[_WheelEntry]:
+        """
+        Turn the wheel up to `now_ns` and collect everything that fell due.
+
+        Returns:
+            list:
+                The due entries, in deadline order.
+        """
+        target_tick = now_ns // self.tick_ns
+        due = []
+
+        # Nothing scheduled: jump straight to the target tick.
+        if not self.__count:
+            self.__tick = max(self.__tick, target_tick)
+            return due
+
+        slots = self.slots
+        level0 = self.__wheels[0]
+
+        while self.__tick <= target_tick:
+            tick = self.__tick
+            bucket = level0[tick % slots]
+
+            if bucket:
+                level0[tick % slots] = []
+                for entry in bucket:
+                    if entry.cancelled:
+                        continue
+
+                    if entry.tick <= tick:
+                        due.append(entry)
+                    else:
+                        self.__insert(entry)
+
+            self.__tick = tick + 1
+            self.__cascade(self.__tick)
+
+        due.sort(key=lambda e: e.deadline_ns)
+        self.__count -= len(due)
+
+        return due
+
+    def next_deadline_ns(self) -> Optional[int]:
+        """
+        The earliest time at which `advance()` may return something, or None if the wheel is empty.
+
+        This is exact for entries in level 0; for entries in higher levels it is the next cascade, which is never
+        later than the entry's own deadline.
+        """
+        if not self.__count:
+            return None
+
+        slots = self.slots
+        level0 = self.__wheels[0]
+
+        for offset in range(slots):
+            tick = self.__tick + offset
+            if any(not e.cancelled for e in level0[tick % slots]):
+                return tick * self.tick_ns
+
+            if (tick + 1) % slots == 0:
+                # The next tick cascades a higher level into level 0.
+                return (tick + 1) * self.tick_ns
+
+        return (self.__tick + slots) * self.tick_ns
+
+    def __insert(self, entry):
+        delta = entry.tick - self.__tick
+        slots = self.slots
+        span = 1
+
+        for level in range(self.levels):
+            if delta < span * slots or level == self.levels - 1:
+                if level == 0:
+                    index = max(entry.tick, self.__tick) % slots
+                else:
+                    # Park entries beyond the top level at its far edge; they are re-inserted as it cascades.
+                    tick = min(entry.tick, self.__tick + span * (slots - 1))
+                    index = (tick // span) % slots
+                self.__wheels[level][index].append(entry)
+                return
+
+            span *= slots
+
+    def __cascade(self, tick):
+        slots = self.slots
+        span = slots
+
+        for level in range(1, self.levels):
+            if tick % span:
+                return
+
+            index = (tick // span) % slots
+            bucket = self.__wheels[level][index]
+
+            if bucket:
+                self.__wheels[level][index] = []
+                for entry in bucket:
+                    if not entry.cancelled:
+                        self.__insert(entry)
+
+            span *= slots
+
+
+class Dispatch(NamedTuple):
+    """
+    One firing of a periodic job.
+
+    Attributes:
+        key (Hashable):
+            The job's key.
+
+        deadline_ns (int):
+            The monotonic time (nanoseconds) at which the job was due.
+
+        lateness_ns (int):
+            How long after its deadline the job was dispatched.
+
+        skipped (int):
+            How many whole periods were skipped because the job fell more than one interval behind.
+    """
+    key: Hashable
+    deadline_ns: int
+    lateness_ns: int
+    skipped: int = 0
+
+
+class PeriodicJob:
+    """
+    A job that `PeriodicScheduler` fires every `interval_ns`.
+
+    Attributes:
+        key (Hashable):
+            The job's key.
+
+        interval_ns (int):
+            The period in nanoseconds.
+
+        phase_ns (int):
+            The offset of the job's first deadline from the time it was added.
+
+        dispatches (int):
+            How many times the job has fired.
+
+        last_lateness_ns (int):
+            Lateness of the most recent dispatch.
+
+        max_lateness_ns (int):
+            The worst lateness seen so far.
+
+        skipped (int):
+            The total number of periods skipped because the job fell more than one interval behind.
+    """
+    __slots__ = (
+        'key', 'interval_ns', 'phase_ns', 'next_deadline_ns', 'dispatches', 'last_lateness_ns', 'max_lateness_ns',
+        'total_lateness_ns', 'skipped', '_entry', '_event', '_dispatch'
+    )
+
+    def __init__(self, key, interval_ns, phase_ns, first_deadline_ns):
+        self.key = key
+        self.interval_ns = interval_ns
+        self.phase_ns = phase_ns
+        self.next_deadline_ns = first_deadline_ns
+        self.dispatches = 0
+        self.last_lateness_ns = 0
+        self.max_lateness_ns = 0
+        self.total_lateness_ns = 0
+        self.skipped = 0
+        self._entry = None
+        self._event = None
+        self._dispatch = None
+
+    @property
+    def mean_lateness_ns(self) -> float:
+        return self.total_lateness_ns / self.dispatches if self.dispatches else 0.0
+
+    def wait(self, timeout: Optional[float] = None) -> Optional[Dispatch]:
+        """
+        Block until the job's next dispatch. Only meaningful for jobs owned by a `ThreadedScheduler`.
+
+        Args:
+            timeout (float, optional):
+                The longest time in seconds to wait.
+
+        Returns:
+            Dispatch or None:
+                The dispatch, or None if `timeout` passed first.
+        """
+        if not self._event.wait(timeout):
+            return None
+
+        self._event.clear()
+
+        return self._dispatch
+
+    def __repr__(self):
+        return f'<PeriodicJob: {self.key!r} every {self.interval_ns / 1e9}s, {self.dispatches} dispatches>'
+
+
+class PeriodicScheduler:
+    """
+    Fire periodic jobs on absolute deadlines.
+
+    A job added at time T with interval I and phase P fires at T + P, T + P + I, T + P + 2I, ... regardless of how
+    long the work done at each firing takes. Phases are spread across the interval with a golden-ratio sequence, so
+    any number of jobs with the same interval fire evenly spaced rather than together.
+
+    This class does no waiting itself: call `due()` whenever `next_deadline_ns()` has passed.
+    """
+
+    def __init__(self, tick_ns: int = 1_000_000, stagger: bool = True, slots: int = 256, levels: int = 4):
+        self.stagger = stagger
+
+        self.__wheel = TimingWheel(tick_ns=tick_ns, slots=slots, levels=levels)
+        self.__jobs = {}
+        self.__added = 0
+
+        self.__dispatches = 0
+        self.__total_lateness_ns = 0
+        self.__max_lateness_ns = 0
+
+    def __len__(self):
+        return len(self.__jobs)
+
+    def __contains__(self, key):
+        return key in self.__jobs
+
+    @property
+    def jobs(self):
+        return self.__jobs
+
+    @property
+    def lateness(self) -> dict:
+        """
+        dict:
+            Dispatch count with the mean and maximum lateness (in seconds) over all jobs.
+        """
+        return {
+            'dispatches': self.__dispatches,
+            'mean': (self.__total_lateness_ns / self.__dispatches / 1e9) if self.__dispatches else 0.0,
+            'max': self.__max_lateness_ns / 1e9,
+        }
+
+    def add(self, key: Hashable, interval_ns: int, phase_ns: Optional[int] = None,
+            now_ns: Optional[int] = None) -> PeriodicJob:
+        """
+        Start firing `key` every `interval_ns`.
+
+        Args:
+            key (Hashable):
+                A key identifying the job.
+            interval_ns (int):
+                The period in nanoseconds.
+            phase_ns (int, optional):
+                Offset of the first firing. Defaults to a staggered phase (or zero when staggering is off).
+            now_ns (int, optional):
+                The current monotonic time, if the caller already has it.
+
+        Returns:
+            PeriodicJob:
+                The new job.
+        """
+        if key in self.__jobs:
+            raise ValueError(f'A job with the key {key!r} is already scheduled')
+
+        interval_ns = int(interval_ns)
+        if interval_ns <= 0:
+            raise ValueError('"interval_ns" must be positive')
+
+        if phase_ns is None:
+            phase_ns = int(((self.__added * GOLDEN_RATIO_FRACTION) % 1.0) * interval_ns) if self.stagger else 0
+
+        self.__added += 1
+        now_ns = monotonic_ns() if now_ns is None else now_ns
+
+        job = PeriodicJob(key, interval_ns, phase_ns, now_ns + phase_ns)
+        job._entry = self.__wheel.schedule(job.next_deadline_ns, job)
+        self.__jobs[key] = job
+
+        return job
+
+    def remove(self, key: Hashable) -> Optional[PeriodicJob]:
+        job = self.__jobs.pop(key, None)
+
+        if job is not None:
+            self.__wheel.cancel(job._entry)
+
+        return job
+
+    def next_deadline_ns(self) -> Optional[int]:
+        return self.__wheel.next_deadline_ns()
+
+    def due(self, now_ns: Optional[int] = None) -> List[Dispatch]:
+        """
+        Collect every job whose deadline has passed and schedule its next firing.
+
+        Returns:
+            list:
+                One `Dispatch` per due job, in deadline order.
+        """
+        now_ns = monotonic_ns() if now_ns is None else now_ns
+        dispatches = []
+
+        for entry in self.__wheel.advance(now_ns):
+            job = entry.item
+            deadline = job.next_deadline_ns
+            lateness = max(0, now_ns - deadline)
+
+            # Stay on the original grid. If we fell more than a whole period behind, skip the missed periods
+            # instead of firing a burst to catch up.
+            skipped = lateness // job.interval_ns
+            job.next_deadline_ns = deadline + (skipped + 1) * job.interval_ns
+            job._entry = self.__wheel.schedule(job.next_deadline_ns, job)
+
+            job.dispatches += 1
+            job.skipped += skipped
+            job.last_lateness_ns = lateness
+            job.total_lateness_ns += lateness
+            job.max_lateness_ns = max(job.max_lateness_ns, lateness)
+
+            self.__dispatches += 1
+            self.__total_lateness_ns += lateness
+            self.__max_lateness_ns = max(self.__max_lateness_ns, lateness)
+
+            dispatches.append(Dispatch(job.key, deadline, lateness, skipped))
+
+        return dispatches
+
+
+class ThreadedScheduler:
+    """
+    A `PeriodicScheduler` driven by one background thread.
+
+    Each job gets an event that the thread sets at every deadline; the job's owner blocks in `PeriodicJob.wait()`.
+    """
+
+    def __init__(self, tick_ns: int = 1_000_000, stagger: bool = True):
+        self.__scheduler = PeriodicScheduler(tick_ns=tick_ns, stagger=stagger)
+        self.__condition = threading.Condition()
+        self.__thread = None
+
+    @property
+    def scheduler(self) -> PeriodicScheduler:
+        return self.__scheduler
+
+    @property
+    def thread(self) -> Optional[threading.Thread]:
+        return self.__thread
+
+    def add(self, key: Hashable, interval: float, phase: Optional[float] = None) -> PeriodicJob:
+        """
+        Start firing `key` every `interval` seconds.
+
+        Args:
+            key (Hashable):
+                A key identifying the job.
+            interval (float):
+                The period in seconds.
+            phase (float, optional):
+                Offset of the first firing in seconds. Defaults to a staggered phase.
+
+        Returns:
+            PeriodicJob:
+                The job. Call `wait()` on it to block until each firing.
+        """
+        with self.__condition:
+            job = self.__scheduler.add(
+                key,
+                int(interval * 1e9),
+                phase_ns=None if phase is None else int(phase * 1e9)
+            )
+            job._event = threading.Event()
+
+            if self.__thread is None:
+                self.__thread = threading.Thread(target=self.__run, name='PingScheduler', daemon=True)
+                self.__thread.start()
+
+            self.__condition.notify()
+
+        return job
+
+    def remove(self, key: Hashable):
+        with self.__condition:
+            job = self.__scheduler.remove(key)
+
+        if job is not None and job._event is not None:
+            # Wake anyone still waiting so they can notice the job is gone.
+            job._dispatch = None
+            job._event.set()
+
+    def __run(self):
+        with self.__condition:
+            while self.__scheduler.jobs:
+                for dispatch in self.__scheduler.due():
+                    job = self.__scheduler.jobs[dispatch.key]
+                    job._dispatch = dispatch
+                    job._event.set()
+
+                next_deadline = self.__scheduler.next_deadline_ns()
+                if next_deadline is None:
+                    break
+
+                self.__condition.wait(max(0, next_deadline - monotonic_ns()) / 1e9)
+
+            # Still holding the lock, so the next `add()` is guaranteed to see that it must start a new thread.
+            self.__thread = None
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> ThreadedScheduler:
+    """
+    Get the process-wide `ThreadedScheduler`, creating it on first use.
+
+    Returns:
+        ThreadedScheduler:
+            The shared scheduler.
+    """
+    global _scheduler
+
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = ThreadedScheduler()
+
+        return _scheduler
+
+
+"""
+The MIT License (MIT)
+Copyright © 2023 Inspyre Softworks - https://inspyre.tech
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE."""
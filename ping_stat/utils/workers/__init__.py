@@ -9,19 +9,25 @@ File:
 import datetime
 import threading
 import time
-from time import sleep
+from time import monotonic_ns
 from rich.console import Console
 from typing import Optional, Union, Type, TypeVar
 from ping_stat.errors import \
     RedundantWorkOrderError, \
     WorkerAlreadyStartedError, \
     WorkerNotStartedError
-from statistics import mean, median
+from statistics import median
+from ping_stat.models.samples import PingSample, ReorderBuffer, STATUS_OK
 from ping_stat.utils import get_ping_mean
+from ping_stat.utils.multiplexer import get_multiplexer
+from ping_stat.utils.scheduler import get_scheduler
 
 console = Console()
 PING = TypeVar('PING')
 
+MONITOR_WINDOW = '60s'
+"""The name of the sliding window (see `Ping.windows`) the monitor prints recent loss and latency from."""
+
 
 class PingMonitor:
     def __init__(self, ping_object):
@@ -42,36 +48,89 @@ class PingMonitor:
         if self.monitoring:
             return
         self.monitoring = True
+
+        detector = getattr(self.ping_object, 'detector', None)
+        if detector is not None:
+            detector.add_callback(self.print_event)
+
         thread = threading.Thread(target=self._monitor, daemon=True)
         self.__thread = thread
         thread.start()
 
     def stop(self):
+        if self.monitoring and getattr(self.ping_object, 'detector', None) is not None:
+            self.ping_object.detector.remove_callback(self.print_event)
+
         self.monitoring = False
 
+    @staticmethod
+    def print_event(event):
+        """
+        Print an outage or latency-shift event from the Ping's detector: starts in red, ends in green.
+        """
+        style = 'red' if event.phase == 'start' else 'green'
+        detail = f' after {event.duration:.1f}s' if event.duration is not None else ''
+
+        console.print(f'[bold {style}]{event.kind.capitalize()} {event.phase}[/][bold]: [/]{event.target}{detail}')
+
     def _monitor(self):
         while self.monitoring:
             time.sleep(0.3)
-            h_len = len(self.ping_object.history)
+            # The history is a fixed-size ring buffer, so its length stops growing once it is full; the number of
+            # samples ever appended does not.
+            h_len = self.ping_object.history.appended
             if h_len > self.hist_len:
                 self.hist_len = h_len
 
                 current_avg = get_ping_mean(self)
                 try:
-                    last_ping = self.history[-2][-1][-1]
+                    last_ping = self.history[-2].rtt or 0
                 except IndexError:
                     last_ping = 0
 
-                if self.latest is None:
-                    console.print('')
+                latest = self.latest
+                recent = self.recent_summary() + self.quality_summary()
+                if latest is None or latest.rtt is None:
+                    console.print(f'[bold]Last ping: [/][red]{latest.status_name if latest else "-"}[/]{recent}')
+                    continue
 
-                cur_style = 'green' if last_ping > mean(self.latest) else 'red'
-                avg_style = 'green' if current_avg < self.last_avg else 'red'
+                cur_style = 'green' if last_ping > latest.rtt else 'red'
+                avg_style = 'green' if current_avg is not None and current_avg < self.last_avg else 'red'
                 console.print(
-                    f'[bold]Last ping time: [/][{cur_style}]{self.ping_object.latest[-1]}[/]'
-                    f'[bold] | Average ping time: [/][{avg_style}]{current_avg}[/]'
+                    f'[bold]Last ping time: [/][{cur_style}]{latest.rtt}[/]'
+                    f'[bold] | Average ping time: [/][{avg_style}]{current_avg}[/]{recent}'
                 )
-                self.last_avg = current_avg
+                self.last_avg = current_avg or 0
+
+    def recent_summary(self) -> str:
+        """
+        The mean and loss over the monitor's sliding window, formatted to follow a status line. Empty if the Ping
+        keeps no such window.
+        """
+        window = getattr(self.ping_object, 'windows', {}).get(MONITOR_WINDOW)
+        if window is None or not window.count:
+            return ''
+
+        mean = f'{window.mean:.4f}' if window.mean is not None else '-'
+        loss_style = 'green' if not window.lost else 'red'
+
+        return f'[bold] | Last {window.name}: [/]{mean} [{loss_style}]({window.loss:.0%} lost)[/]'
+
+    def quality_summary(self) -> str:
+        """
+        The jitter and any loss burst in progress, formatted to follow a status line. Empty if the Ping keeps no
+        `quality` statistics.
+        """
+        quality = getattr(self.ping_object, 'quality', None)
+        if quality is None:
+            return ''
+
+        summary = f'[bold] | Jitter: [/]{quality.jitter * 1000:.2f} ms' if quality.jitter is not None else ''
+
+        if quality.current_burst:
+            summary += f'[bold] | Loss burst: [/][red]{quality.current_burst}[/]'
+
+        return summary
 
     @property
     def history(self):
@@ -104,6 +163,8 @@ class PingWorker:
     def __init__(self, ping_object: PING, auto_create=True):
         self.__started: Optional[Union[None, datetime.datetime]] = None
         self.__thread: Optional[Union[None, threading.Thread]] = None
+        self.__job = None
+        self.__order = None
 
         self.__ping_object = None
         self.ping_object = ping_object
@@ -150,6 +211,23 @@ class PingWorker:
     def target(self):
         return self.ping_object.target
 
+    @property
+    def lateness(self) -> Optional[dict]:
+        """
+        dict or None:
+            How late (in seconds) the most recent probe was dispatched, the mean and worst lateness so far, and how
+            many periods were skipped because the worker fell behind. None until the worker has started.
+        """
+        if self.__job is None:
+            return None
+
+        return {
+            'last': self.__job.last_lateness_ns / 1e9,
+            'mean': self.__job.mean_lateness_ns / 1e9,
+            'max': self.__job.max_lateness_ns / 1e9,
+            'skipped': self.__job.skipped,
+        }
+
     @property
     def started(self) -> Optional[Union[None, datetime.datetime]]:
         return self.__started
@@ -166,7 +244,8 @@ class PingWorker:
             return {'running': False, 'started': self.started or False}
         elif self.thread.is_alive():
             return {'running': True, 'started': self.started or False, 'runtime': datetime.datetime.now() -
-                                                                                  self.started}
+                                                                                  self.started,
+                    'lateness': self.lateness}
         else:
             stopped_at = datetime.datetime.now() if self.started else None
             runtime = self.thread.join() if self.thread and self.thread.is_alive() else None
@@ -213,23 +292,92 @@ class PingWorker:
         """
         The worker's main loop.
 
-        This method runs in the worker's thread and repeatedly pings the target at the specified interval, adding the
-        ping results to the worker's history.
+        This method runs in the worker's thread and pings the target once per interval, adding the ping results to
+        the worker's history.
+
+        Probes are dispatched by the shared scheduler on absolute deadlines, so the period does not drift by the
+        round-trip time or by logging overhead, and workers started together are staggered across their interval.
+        Results are recorded as they arrive. The Ping's sending mode is honored:
+
+            - By default, a probe is not sent while the previous one is still waiting for its reply, just like
+              `ping()`. A dispatch that comes due meanwhile is sent as soon as the reply (or timeout) arrives.
+            - With `pipelined`, each probe is sent on its deadline without waiting for earlier replies.
+            - With `high_rate`, probes are sent back to back in trains of `runs` (see `IcmpMultiplexer.send_train`),
+              for intervals too short for the scheduler's wakeups.
 
         Note:
             This method should not be called directly; instead, it should be run in a separate thread using the `start` method.
 
         """
         self.ping_object.monitoring = True
-        while self.monitoring:
-            sleep(self.interval)
-            self.history.append(
-                (
-                    str(datetime.datetime.fromtimestamp(time.time()).isoformat()),
+        multiplexer = get_multiplexer()
+
+        # Results are recorded in send order, not in the order replies and timeouts arrive.
+        self.__order = ReorderBuffer(self.ping_object.record)
+
+        if self.ping_object.high_rate:
+            self.__send_trains(multiplexer)
+            return
+
+        scheduler = get_scheduler()
+        self.__job = scheduler.add(self, self.interval)
+
+        try:
+            while self.monitoring:
+                dispatch = self.__job.wait(timeout=.5)
+                if dispatch is None:
+                    continue
+
+                probe = multiplexer.send(
                     self.target,
-                    self.ping()
+                    timeout=self.ping_object.timeout,
+                    size=self.ping_object.packet_size,
+                    callback=self.__record
                 )
+                self.__order.sent(probe)
+
+                if not self.ping_object.pipelined:
+                    probe.wait()
+        finally:
+            scheduler.remove(self)
+
+    def __send_trains(self, multiplexer):
+        interval_ns = int(self.interval * 1e9)
+        start_ns = monotonic_ns()
+
+        while self.monitoring:
+            runs = self.ping_object.runs
+
+            probes = multiplexer.send_train(
+                self.target,
+                runs,
+                self.interval,
+                timeout=self.ping_object.timeout,
+                size=self.ping_object.packet_size,
+                callback=self.__record,
+                start_ns=start_ns
+            )
+
+            for probe in probes:
+                self.__order.sent(probe)
+
+            start_ns += runs * interval_ns
+
+            # After falling more than an interval behind, start afresh rather than sending the backlog in a burst.
+            if monotonic_ns() - start_ns > interval_ns:
+                start_ns = monotonic_ns()
+
+    def __record(self, probe):
+        self.__order.done(
+            probe,
+            PingSample(
+                probe.sent_wall_ns,
+                self.target,
+                probe.sequence,
+                probe.rtt if probe.status == STATUS_OK else None,
+                probe.status
             )
+        )
 
     def __repr__(self):
         status = self.status